@@ -10,9 +10,12 @@ from fastapi_users.authentication import (
 )
 from fastapi_users.db import BaseUserDatabase
 
-from .sheets import sheets_client
+from .sheets import sheets_client, RowIndex
+from .quota import background_priority
 from .models import User, UserRead, UserCreate, UserUpdate
 import os
+import threading
+import time
 from datetime import datetime
 from dotenv import load_dotenv
 from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
@@ -42,6 +45,74 @@ conf = ConnectionConfig(
     VALIDATE_CERTS=True
 )
 
+# Validated users are kept this many seconds for the per-request JWT lookup (0 disables).
+# Our own writes invalidate entries right away; the TTL bounds staleness from edits
+# made directly in the sheet or by the admin scripts.
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "15"))
+
+
+class UserCache:
+    """Short-lived cache of validated User objects, keyed by UUID and by email."""
+
+    def __init__(self, ttl: float = USER_CACHE_TTL):
+        self.ttl = ttl
+        self._by_id = {}
+        self._by_email = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _email_key(email) -> str:
+        return str(email or "").strip().lower()
+
+    def _lookup(self, entries: dict, key) -> Optional[User]:
+        with self._lock:
+            entry = entries.get(key)
+            if not entry:
+                return None
+            user, stored_at = entry
+            if time.monotonic() - stored_at >= self.ttl:
+                self._drop(user)
+                return None
+        # Callers get their own copy, so nobody mutates the cached object
+        return user.model_copy()
+
+    def get_by_id(self, user_id) -> Optional[User]:
+        return self._lookup(self._by_id, str(user_id))
+
+    def get_by_email(self, email: str) -> Optional[User]:
+        return self._lookup(self._by_email, self._email_key(email))
+
+    def put(self, user: User):
+        if self.ttl <= 0:
+            return
+        entry = (user.model_copy(), time.monotonic())
+        with self._lock:
+            self._drop_keys(str(user.id), self._email_key(user.email))
+            self._by_id[str(user.id)] = entry
+            self._by_email[self._email_key(user.email)] = entry
+
+    def _drop(self, user: User):
+        self._drop_keys(str(user.id), self._email_key(user.email))
+
+    def _drop_keys(self, user_id: Optional[str], email: Optional[str]):
+        # Removes both entries of every user reachable through either key
+        for entries, key in ((self._by_id, user_id), (self._by_email, email)):
+            entry = entries.pop(key, None) if key else None
+            if entry:
+                self._by_id.pop(str(entry[0].id), None)
+                self._by_email.pop(self._email_key(entry[0].email), None)
+
+    def invalidate(self, user_id=None, email: Optional[str] = None):
+        with self._lock:
+            self._drop_keys(str(user_id) if user_id else None, self._email_key(email) or None)
+
+    def clear(self):
+        with self._lock:
+            self._by_id.clear()
+            self._by_email.clear()
+
+
+user_cache = UserCache()
 
 
 class GoogleSheetsUserDatabase(BaseUserDatabase[User, uuid.UUID]):
@@ -50,41 +121,36 @@ class GoogleSheetsUserDatabase(BaseUserDatabase[User, uuid.UUID]):
         self.id_type = id_type
 
     async def get(self, id: uuid.UUID) -> Optional[User]:
-        import asyncio
-        records = await asyncio.to_thread(sheets_client.get_all_records, "Partners")
-        for record in records:
-            try:
-                user_dict = self._to_user_dict(record)
-                if user_dict.get("id") == id:
-                    return User.model_validate(user_dict)
-            except Exception:
-                continue
-        return None
+        cached = user_cache.get_by_id(id)
+        if cached:
+            return cached
+        _, record = await sheets_client.afind_record("Partners", "id", str(id))
+        if not record:
+            return None
+        try:
+            user = User.model_validate(self._to_user_dict(record))
+        except Exception:
+            return None
+        user_cache.put(user)
+        return user
 
     async def get_by_email(self, email: str) -> Optional[User]:
-        import asyncio
+        cached = user_cache.get_by_email(email)
+        if cached:
+            return cached
         print(f"DEBUG: Searching for user with email: '{email}'")
-        records = await asyncio.to_thread(sheets_client.get_all_records, "Partners")
-        print(f"DEBUG: Found {len(records)} total records in Partners sheet.")
-        
-        if records:
-            # Keys check removed to avoid UnicodeEncodeError in some environments
-            pass
-        
-        target_email = email.lower().strip()
-        for record in records:
-            record_email = sheets_client.get_case_insensitive_val(record, "USERNAME", "Email", "Email Address", "emailaddress")
-            if str(record_email or "").lower().strip() == target_email:
-                # print(f"DEBUG: Match found for {email} in sheet record.") # Removed to avoid encoding issues
-                try:
-                    user_dict = self._to_user_dict(record)
-                    return User.model_validate(user_dict)
-                except Exception as e:
-                    print(f"DEBUG: Error validating user record: {e}")
-                    return None
-
-
-        print(f"DEBUG: No match found for {email} after checking all records.")
+        _, record = await sheets_client.afind_record("Partners", "email", email)
+        if record:
+            try:
+                user_dict = self._to_user_dict(record)
+                user = User.model_validate(user_dict)
+            except Exception as e:
+                print(f"DEBUG: Error validating user record: {e}")
+                return None
+            user_cache.put(user)
+            return user
+
+        print(f"DEBUG: No match found for {email} in Partners index.")
         return None
 
     async def create(self, user_dict: dict) -> User:
@@ -137,8 +203,9 @@ class GoogleSheetsUserDatabase(BaseUserDatabase[User, uuid.UUID]):
             user_dict.get("institution", "") # AB: INSTITUTION (27)
         ]
         
+        user_cache.invalidate(user_dict["id"], user_dict["email"])
         try:
-            sheets_client.append_row("Partners", row)
+            await sheets_client.aappend_row("Partners", row)
 
             user_dict["date_joined"] = now
             print(f"DEBUG: Successfully created user {user_dict['email']} in sheet with expanded columns.")
@@ -149,15 +216,10 @@ class GoogleSheetsUserDatabase(BaseUserDatabase[User, uuid.UUID]):
 
     async def update(self, user: User, update_dict: dict) -> User:
         print(f"DEBUG: Updating user {user.email} in sheet with: {list(update_dict.keys())}")
+        user_cache.invalidate(user.id, user.email)
         
         # 1. Find user in sheet by Email (A)
-        records = sheets_client.get_all_records("Partners")
-        row_idx = None
-        for i, record in enumerate(records):
-            # Check Column A (USERNAME)
-            if str(record.get("USERNAME", "")).lower().strip() == user.email.lower().strip():
-                row_idx = i + 2 # 1-indexed + header
-                break
+        row_idx = await sheets_client.afind_row("Partners", "email", user.email)
         
         if not row_idx:
             print(f"ERROR: Could not find user {user.email} to update.")
@@ -171,17 +233,18 @@ class GoogleSheetsUserDatabase(BaseUserDatabase[User, uuid.UUID]):
         # R: is_verified (18)
         
         try:
-            if "hashed_password" in update_dict:
-                sheets_client.update_cell("Partners", row_idx, 2, update_dict["hashed_password"])
+            async with sheets_client.unit_of_work():
+                if "hashed_password" in update_dict:
+                    await sheets_client.aupdate_cell("Partners", row_idx, 2, update_dict["hashed_password"])
             
-            if "is_superuser" in update_dict:
-                sheets_client.update_cell("Partners", row_idx, 16, "TRUE" if update_dict["is_superuser"] else "FALSE")
+                if "is_superuser" in update_dict:
+                    await sheets_client.aupdate_cell("Partners", row_idx, 16, "TRUE" if update_dict["is_superuser"] else "FALSE")
             
-            if "is_active" in update_dict:
-                sheets_client.update_cell("Partners", row_idx, 17, "TRUE" if update_dict["is_active"] else "FALSE")
+                if "is_active" in update_dict:
+                    await sheets_client.aupdate_cell("Partners", row_idx, 17, "TRUE" if update_dict["is_active"] else "FALSE")
                 
-            if "is_verified" in update_dict:
-                sheets_client.update_cell("Partners", row_idx, 18, "TRUE" if update_dict["is_verified"] else "FALSE")
+                if "is_verified" in update_dict:
+                    await sheets_client.aupdate_cell("Partners", row_idx, 18, "TRUE" if update_dict["is_verified"] else "FALSE")
 
             # Update in-memory user
             user_dict = user.model_dump()
@@ -190,17 +253,19 @@ class GoogleSheetsUserDatabase(BaseUserDatabase[User, uuid.UUID]):
         except Exception as e:
             print(f"ERROR: Failed to update sheet: {e}")
             raise e
+        finally:
+            # Drop anything a concurrent lookup cached while the cells were being written
+            user_cache.invalidate(user.id, user.email)
 
 
     async def delete(self, user: User) -> None:
-        pass
+        user_cache.invalidate(user.id, user.email)
 
     def _to_user_dict(self, record):
         # Removed local get_val as it is replaced by sheets_client helper
 
         # Determine email first as it's used for fallbacks
-        val = sheets_client.get_case_insensitive_val(record, "USERNAME", "Email Address", "Email")
-        email = str(val if val is not None else "").strip()
+        email = _partner_email(record)
 
 
         # Handle DateJoined parsing with fallback
@@ -214,22 +279,9 @@ class GoogleSheetsUserDatabase(BaseUserDatabase[User, uuid.UUID]):
             date_joined = datetime.now()
 
         hashed_password = sheets_client.get_case_insensitive_val(record, "Password", "hashed_password")
-        
-        # Handle ID with deterministic fallback if column is missing
-        user_id_str = sheets_client.get_case_insensitive_val(record, "id", "UUID")
-        if user_id_str:
-            try:
-                user_id = uuid.UUID(str(user_id_str))
-            except ValueError:
-                import hashlib
-                user_id = uuid.UUID(hashlib.md5(email.encode()).hexdigest())
-        else:
-            # Create a consistent ID based on email if sheet is missing the ID column
-            import hashlib
-            user_id = uuid.UUID(hashlib.md5(email.encode()).hexdigest())
 
         return {
-            "id": user_id,
+            "id": _partner_user_id(record),
             "email": email,
             "hashed_password": hashed_password,
             "is_active": str(sheets_client.get_case_insensitive_val(record, "is_active", "active", default="TRUE")).upper() == "TRUE",
@@ -247,6 +299,28 @@ class GoogleSheetsUserDatabase(BaseUserDatabase[User, uuid.UUID]):
         }
 
 
+def _partner_email(record) -> str:
+    val = sheets_client.get_case_insensitive_val(record, "USERNAME", "Email Address", "Email")
+    return str(val if val is not None else "").strip()
+
+
+def _partner_user_id(record) -> uuid.UUID:
+    """Reads the partner UUID, with a deterministic email-based fallback if the column is missing."""
+    user_id_str = sheets_client.get_case_insensitive_val(record, "id", "UUID")
+    if user_id_str:
+        try:
+            return uuid.UUID(str(user_id_str))
+        except ValueError:
+            pass
+    # Create a consistent ID based on email if sheet is missing the ID column
+    import hashlib
+    return uuid.UUID(hashlib.md5(_partner_email(record).encode()).hexdigest())
+
+
+# UUID -> row index used by the per-request JWT user lookup
+sheets_client.register_view("Partners", "id", lambda: RowIndex(key_func=lambda r: str(_partner_user_id(r))))
+
+
 def safe_float(v):
     """Robust conversion of sheet values (strings/None/numbers) to float."""
     if v is None:
@@ -272,6 +346,7 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
     reset_password_token_secret = SECRET
     verification_token_secret = SECRET
 
+    @background_priority
     async def send_partner_welcome_email(self, user: User):
         """Sends a welcome email to a new partner with their referral link."""
         referral_link = f"https://enchiridion.ng/?ref={user.referral_code}"
@@ -332,7 +407,7 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
                 "SUCCESS",
                 f"Welcome Email sent to {user.email}"
             ]
-            sheets_client.append_row("Admin Audit", log_row)
+            await sheets_client.aappend_row("Admin Audit", log_row)
             
         except Exception as e:
             print(f"ERROR: Failed to send welcome email or log: {e}")
@@ -345,7 +420,7 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
                     "FAILED",
                     f"Error: {str(e)}"
                 ]
-                sheets_client.append_row("Admin Audit", fail_row)
+                await sheets_client.aappend_row("Admin Audit", fail_row)
             except:
                 pass
 
@@ -404,16 +479,7 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
         print(f"DEBUG: Attempting to credit {referred_by} for conversion of {referee_email}...")
         
         # 1. Find referrer by code
-        records = sheets_client.get_all_records("Partners")
-        referrer_record = None
-        referrer_row_idx = None
-        
-        for i, record in enumerate(records):
-            ref_val = sheets_client.get_case_insensitive_val(record, "REFERRAL CODE", "ReferralCode", "referral_code")
-            if str(ref_val or "").strip().lower() == referred_by.strip().lower():
-                referrer_record = record
-                referrer_row_idx = i + 2 # 1-indexed + header
-                break
+        referrer_row_idx, referrer_record = await sheets_client.afind_record("Partners", "referral_code", referred_by, fresh=True)
         
         if not referrer_record:
             print(f"WARNING: Referrer with code {referred_by} not found during conversion.")
@@ -424,7 +490,7 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
         # 2. Fraud Prevention: Self-referral check (Email)
         if referrer_email == referee_email.lower().strip():
             print(f"WARNING: Self-referral (email) detected for {referee_email}. Skipping credit.")
-            sheets_client.log_audit("Fraud Check", f"Self-referral blocked: {referee_email}", "BLOCKED")
+            await sheets_client.alog_audit("Fraud Check", f"Self-referral blocked: {referee_email}", "BLOCKED")
             return
 
         # 3. Fraud Prevention: IP Check
@@ -432,13 +498,14 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
         referrer_ip = referrer_record.get("REGISTRATION_IP", "")
         if not referrer_ip:
              # Try absolute index check if header mapping failed
-             row_data = sheets_client.get_worksheet("Partners").row_values(referrer_row_idx)
+             partners_ws = await sheets_client.aget_worksheet("Partners")
+             row_data = await sheets_client.arun(partners_ws.row_values, referrer_row_idx)
              if len(row_data) > 13:
                  referrer_ip = row_data[13]
 
         if referrer_ip == referee_ip and referee_ip != "unknown" and referee_ip != "":
             print(f"WARNING: Self-referral (IP: {referee_ip}) detected for {referee_email}. Skipping credit.")
-            sheets_client.log_audit("Fraud Check", f"Self-referral IP block: {referee_email} matches referrer {referrer_email}", "BLOCKED")
+            await sheets_client.alog_audit("Fraud Check", f"Self-referral IP block: {referee_email} matches referrer {referrer_email}", "BLOCKED")
             # return # Optional: some users might share IP in a hospital/school. Maybe just log it?
             # User requirement says "checks that the Referee is a new user (unique IP/Email) to prevent self-referral fraud"
             return 
@@ -451,7 +518,7 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
             new_revenue = round(new_points * 100, 2)
             
             # Atomic update of columns E (Points) and F (Revenue)
-            sheets_client.update_range("Partners", f"E{referrer_row_idx}:F{referrer_row_idx}", [[new_points, new_revenue]])
+            await sheets_client.aupdate_range("Partners", f"E{referrer_row_idx}:F{referrer_row_idx}", [[new_points, new_revenue]])
             
             # 5. Log Activity
             activity_row = [
@@ -463,17 +530,17 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
                 "", # F: REPORTED Status
                 "PENDING" # G: Payout Status
             ]
-            sheets_client.append_row("ActivityLog", activity_row)
+            await sheets_client.aappend_row("ActivityLog", activity_row)
             
             # 6. Notify Referrer
             import asyncio
             asyncio.create_task(self.send_friend_joined_email(referrer_email, referee_email.split("@")[0]))
             
-            sheets_client.log_audit("Referral Credit", f"Credited {referred_by} for verification of {referee_email}")
+            await sheets_client.alog_audit("Referral Credit", f"Credited {referred_by} for verification of {referee_email}")
             print(f"DEBUG: Successfully credited {referred_by} with 0.1 points for {referee_email}")
         except Exception as e:
             print(f"ERROR: Failed to credit referrer during conversion: {e}")
-            sheets_client.log_audit("Referral Credit", f"Failed to credit {referred_by} for {referee_email}: {e}", "FAILED")
+            await sheets_client.alog_audit("Referral Credit", f"Failed to credit {referred_by} for {referee_email}: {e}", "FAILED")
 
     async def on_after_register(self, user: User, request: Optional[Request] = None):
         print(f"DEBUG: User {user.email} registered. Triggering onboarding...")
@@ -493,8 +560,8 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
                 datetime.now().isoformat()
             ]
             # Use get_or_create to ensure headers exist
-            sheets_client.get_or_create_worksheet("UserOnboarding", ["Email", "IsVerified", "IsPartner", "IsDistributor", "HasPurchasedBook", "LastUpdated"])
-            sheets_client.append_row("UserOnboarding", onboarding_row)
+            await sheets_client.aget_or_create_worksheet("UserOnboarding", ["Email", "IsVerified", "IsPartner", "IsDistributor", "HasPurchasedBook", "LastUpdated"])
+            await sheets_client.aappend_row("UserOnboarding", onboarding_row)
         except Exception as e:
             print(f"ERROR: Failed to initialize onboarding for {user.email}: {e}")
 
@@ -514,89 +581,87 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
                 "", # F: REPORTED Status
                 "PENDING_VERIFICATION" # G: Payout Status / Internal Status
             ]
-            sheets_client.append_row("ActivityLog", activity_row)
+            await sheets_client.aappend_row("ActivityLog", activity_row)
         else:
             print("DEBUG: No referral code provided for this registration.")
 
+    @background_priority
     async def record_milestone_and_credit(self, referrer_email: str, referee_email: str, milestone_type: str, points: float):
         """Records a unique milestone and credits the referrer if not already done."""
         unique_key = f"{referee_email.lower().strip()}_{milestone_type}"
         print(f"DEBUG: Recording milestone '{milestone_type}' for {referee_email} to credit {referrer_email}")
 
-        # 1. Idempotency Check (Prevent double points)
+        # 1. Idempotency Check (Prevent double points): claiming the key also stops a
+        # concurrent credit for the same milestone
         try:
-            ws = sheets_client.get_or_create_worksheet("ReferralMilestones", ["Timestamp", "ReferrerEmail", "RefereeEmail", "MilestoneType", "PointsAwarded", "UniqueKey"])
-            records = sheets_client.get_all_records("ReferralMilestones")
-            for r in records:
-                if str(r.get("UniqueKey", "")).lower().strip() == unique_key.lower().strip():
-                    print(f"DEBUG: Milestone '{unique_key}' already recorded. Skipping.")
-                    return
+            ws = await sheets_client.aget_or_create_worksheet("ReferralMilestones", ["Timestamp", "ReferrerEmail", "RefereeEmail", "MilestoneType", "PointsAwarded", "UniqueKey"])
+            if not await sheets_client.aclaim_milestone(unique_key):
+                print(f"DEBUG: Milestone '{unique_key}' already recorded. Skipping.")
+                return
         except Exception as e:
-            print(f"DEBUG: Milestone check error: {e}")
-
-        # 2. Find Referrer in Partners Sheet
-        records = sheets_client.get_all_records("Partners")
-        referrer_record = None
-        referrer_row_idx = None
-        for i, r in enumerate(records):
-            if str(r.get("USERNAME", "")).lower().strip() == referrer_email.lower().strip():
-                referrer_record = r
-                referrer_row_idx = i + 2
-                break
-        
-        if not referrer_record:
-            print(f"WARNING: Referrer {referrer_email} not found in Partners sheet.")
+            # Fail closed: without the claim we cannot tell whether it was already credited
+            print(f"ERROR: Milestone check failed, not crediting '{unique_key}': {e}")
             return
 
-        # 3. Apply Credit
         try:
-            p_val = sheets_client.get_case_insensitive_val(referrer_record, "POINTS", "points", "Pts")
-            current_points = safe_float(p_val)
-            new_points = round(current_points + points, 2)
-            new_revenue = round(new_points * 100, 2)
+            # 2. Find Referrer in Partners Sheet
+            referrer_row_idx, referrer_record = await sheets_client.afind_record("Partners", "email", referrer_email, fresh=True)
+        
+            if not referrer_record:
+                print(f"WARNING: Referrer {referrer_email} not found in Partners sheet.")
+                return
+
+            # 3. Apply Credit
+            try:
+                p_val = sheets_client.get_case_insensitive_val(referrer_record, "POINTS", "points", "Pts")
+                current_points = safe_float(p_val)
+                new_points = round(current_points + points, 2)
+                new_revenue = round(new_points * 100, 2)
             
-            sheets_client.update_range("Partners", f"E{referrer_row_idx}:F{referrer_row_idx}", [[new_points, new_revenue]])
+                await sheets_client.aupdate_range("Partners", f"E{referrer_row_idx}:F{referrer_row_idx}", [[new_points, new_revenue]])
             
-            # 4. Record Milestone
-            milestone_row = [
-                datetime.now().isoformat(),
-                referrer_email,
-                referee_email,
-                milestone_type,
-                points,
-                unique_key
-            ]
+                # 4. Record Milestone
+                milestone_row = [
+                    datetime.now().isoformat(),
+                    referrer_email,
+                    referee_email,
+                    milestone_type,
+                    points,
+                    unique_key
+                ]
             
-            # Ensure worksheet exists
-            sheets_client.get_or_create_worksheet("ReferralMilestones", ["Timestamp", "ReferrerEmail", "RefereeEmail", "MilestoneType", "PointsAwarded", "UniqueKey"])
-            sheets_client.append_row("ReferralMilestones", milestone_row)
-
-            # 5. Log Activity
-            activity_label = {
-                "partner": "Partner Onboarding",
-                "distributor": "Distributor Setup",
-                "network_spread": "Network Growth (Tier 2)",
-                "book_purchase": "Book Purchase"
-            }.get(milestone_type, milestone_type)
-
-            activity_row = [
-                datetime.now().isoformat(),
-                referrer_record.get("REFERRAL CODE", "N/A"),
-                activity_label,
-                points,
-                f"Referee: {referee_email}",
-                "", 
-                "PENDING"
-            ]
-            sheets_client.append_row("ActivityLog", activity_row)
+                # Ensure worksheet exists
+                await sheets_client.aget_or_create_worksheet("ReferralMilestones", ["Timestamp", "ReferrerEmail", "RefereeEmail", "MilestoneType", "PointsAwarded", "UniqueKey"])
+                await sheets_client.aappend_row("ReferralMilestones", milestone_row)
+
+                # 5. Log Activity
+                activity_label = {
+                    "partner": "Partner Onboarding",
+                    "distributor": "Distributor Setup",
+                    "network_spread": "Network Growth (Tier 2)",
+                    "book_purchase": "Book Purchase"
+                }.get(milestone_type, milestone_type)
+
+                activity_row = [
+                    datetime.now().isoformat(),
+                    referrer_record.get("REFERRAL CODE", "N/A"),
+                    activity_label,
+                    points,
+                    f"Referee: {referee_email}",
+                    "", 
+                    "PENDING"
+                ]
+                await sheets_client.aappend_row("ActivityLog", activity_row)
             
-            # 6. Notify Referrer
-            asyncio.create_task(self.send_milestone_notification(referrer_email, referee_email.split("@")[0], milestone_type, points))
+                # 6. Notify Referrer
+                asyncio.create_task(self.send_milestone_notification(referrer_email, referee_email.split("@")[0], milestone_type, points))
             
-            print(f"DEBUG: Successfully credited {referrer_email} for milestone {milestone_type}")
+                print(f"DEBUG: Successfully credited {referrer_email} for milestone {milestone_type}")
 
-        except Exception as e:
-            print(f"ERROR: Failed to credit milestone: {e}")
+            except Exception as e:
+                print(f"ERROR: Failed to credit milestone: {e}")
+        finally:
+            sheets_client.release_milestone(unique_key)
 
     async def send_milestone_notification(self, email: str, friend_name: str, m_type: str, points: float):
         """Sends specific notification for various milestones."""
@@ -642,7 +707,7 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
 
         # Update Onboarding Progress Sheet
         try:
-            records = sheets_client.get_all_records("UserOnboarding")
+            records = await sheets_client.aget_all_records("UserOnboarding")
             row_idx = None
             for i, r in enumerate(records):
                 if str(r.get("Email", "")).lower().strip() == user.email.lower().strip():
@@ -650,24 +715,20 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
                     break
             
             if row_idx:
-                sheets_client.update_cell("UserOnboarding", row_idx, 2, "TRUE")
-                sheets_client.update_cell("UserOnboarding", row_idx, 6, datetime.now().isoformat())
+                async with sheets_client.unit_of_work():
+                    await sheets_client.aupdate_cell("UserOnboarding", row_idx, 2, "TRUE")
+                    await sheets_client.aupdate_cell("UserOnboarding", row_idx, 6, datetime.now().isoformat())
             else:
                 # If for some reason it's missing, create it
                 onboarding_row = [user.email, "TRUE", "FALSE", "FALSE", "FALSE", datetime.now().isoformat()]
-                sheets_client.append_row("UserOnboarding", onboarding_row)
+                await sheets_client.aappend_row("UserOnboarding", onboarding_row)
         except Exception as e:
             print(f"ERROR: Failed to update onboarding verification for {user.email}: {e}")
         
         referred_by = getattr(user, "referred_by", None)
         if referred_by:
             # 1. Credit Referrer (Partner Onboarding)
-            records = sheets_client.get_all_records("Partners")
-            referrer_record = None
-            for r in records:
-                if str(r.get("REFERRAL CODE", "")).strip().lower() == referred_by.strip().lower():
-                    referrer_record = r
-                    break
+            _, referrer_record = await sheets_client.afind_record("Partners", "referral_code", referred_by)
             
             if referrer_record:
                 referrer_email = str(referrer_record.get("USERNAME", "")).lower().strip()
@@ -683,11 +744,7 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
                 # 2. Tier-2 Logic (Network Growth / User A)
                 u_a_code = referrer_record.get("REFERRED_BY", "")
                 if u_a_code:
-                    u_a_record = None
-                    for r in records:
-                        if str(r.get("REFERRAL CODE", "")).strip().lower() == u_a_code.strip().lower():
-                            u_a_record = r
-                            break
+                    _, u_a_record = await sheets_client.afind_record("Partners", "referral_code", u_a_code)
                     if u_a_record:
                         u_a_email = str(u_a_record.get("USERNAME", "")).lower().strip()
                         # User A gets +0.1 for User C's verification via User B
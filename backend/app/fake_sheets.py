@@ -0,0 +1,221 @@
+import collections
+import functools
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Union
+
+from gspread.exceptions import WorksheetNotFound
+
+from .storage import GridSpreadsheet, GridWorksheet, as_cell_text
+
+# Header rows of the production worksheets, for seeding fakes and synthetic data
+SHEET_HEADERS: Dict[str, List[str]] = {
+    "Partners": [
+        "USERNAME", "PASSWORD", "FULL NAME", "REFERRAL CODE", "POINTS", "REVENUE (₦)", "LIFETIME EARNINGS",
+        "TOTAL REFERRALS", "PAYOUT STATUS", "BANK NAME", "ACCOUNT NAME", "ACCOUNT NUMBER", "REFERRED_BY",
+        "REGISTRATION_IP", "DATE_JOINED", "is_superuser", "is_active", "is_verified", "LAST PAYOUT", "", "",
+        "MILESTONE 1", "MILESTONE 2", "STATE", "COUNTRY", "PROFESSION", "PHONE", "INSTITUTION",
+    ],
+    "ActivityLog": ["Timestamp", "REFERRED_BY", "Type", "Points", "DESCRIPTION", "Reported", "Payout Status"],
+    "ReferralMilestones": ["Timestamp", "ReferrerEmail", "RefereeEmail", "MilestoneType", "PointsAwarded", "UniqueKey"],
+    "GlobalNotifications": ["Timestamp", "BroadcastType", "Username", "City", "Text"],
+    "UserOnboarding": ["Email", "IsVerified", "IsPartner", "IsDistributor", "HasPurchasedBook", "LastUpdated"],
+    "Admin Audit": ["Timestamp", "Activity", "Details", "Status", "Notes"],
+    "Reviews": ["id", "Name", "Job Title", "Organization", "Rating", "Text", "Status", "CreatedAt", "ApprovedAt"],
+    "Delivery Pricing": ["STATE NAME", "COST", "HUB STATES"],
+    "Distributor Leads": ["Timestamp", "Name", "Phone Number", "Whatsapp Number", "Location", "RefCode"],
+    "sample chapter": ["Timestamp", "Email", "RefCode", "Context"],
+    "Newsletter": ["Timestamp", "Email", "RefCode", "Context"],
+}
+
+
+def empty_workbook() -> Dict[str, List[List]]:
+    """Every production worksheet with just its header row."""
+    return {title: [list(headers)] for title, headers in SHEET_HEADERS.items()}
+
+
+# Operations that change the spreadsheet; everything else counts as a read
+WRITE_OPERATIONS = frozenset({
+    "add_worksheet", "append_row", "append_rows", "update", "update_cell", "values_batch_update",
+})
+
+
+# Seconds to wait per call: one number for every call, or a function of (operation, worksheet title)
+Latency = Union[float, Callable[[str, Optional[str]], float]]
+
+
+class FakeAPIError(Exception):
+    """Injected failure, shaped like gspread's APIError (code 429 is treated as a quota error)."""
+
+    def __init__(self, code: int = 500, message: str = "Injected failure"):
+        super().__init__(f"{code}: {message}")
+        self.code = code
+
+
+def _api_call(operation: str):
+    """Counts the call, applies latency and injected failures. Nested calls are not counted."""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            spreadsheet = self if isinstance(self, FakeSpreadsheet) else self.spreadsheet
+            if getattr(spreadsheet._local, "busy", False):
+                return method(self, *args, **kwargs)
+            if self is spreadsheet:
+                # worksheet(title) / add_worksheet(title=...) are counted against that worksheet
+                title = args[0] if args and isinstance(args[0], str) else kwargs.get("title")
+            else:
+                title = self.title
+            spreadsheet._before_call(operation, title)
+            spreadsheet._local.busy = True
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                spreadsheet._local.busy = False
+        return wrapper
+    return decorator
+
+
+class FakeWorksheet(GridWorksheet):
+    spreadsheet: "FakeSpreadsheet"
+
+    def __init__(self, spreadsheet: "FakeSpreadsheet", title: str, sheet_id: int):
+        super().__init__(spreadsheet, title, sheet_id)
+        self.rows: Dict[int, List[str]] = {}
+
+    def _read_rows(self, start: int = 1, end: Optional[int] = None) -> Dict[int, List[str]]:
+        with self.spreadsheet.lock:
+            return {
+                row: list(cells) for row, cells in self.rows.items()
+                if row >= start and (end is None or row <= end)
+            }
+
+    def _write_rows(self, rows: Dict[int, List[str]]):
+        with self.spreadsheet.lock:
+            self.rows.update((row, list(cells)) for row, cells in rows.items())
+
+    def _last_row(self) -> int:
+        with self.spreadsheet.lock:
+            return max((row for row, cells in self.rows.items() if any(cells)), default=0)
+
+    get_all_values = _api_call("get_all_values")(GridWorksheet.get_all_values)
+    get_values = _api_call("get_values")(GridWorksheet.get_values)
+    row_values = _api_call("row_values")(GridWorksheet.row_values)
+    append_row = _api_call("append_row")(GridWorksheet.append_row)
+    append_rows = _api_call("append_rows")(GridWorksheet.append_rows)
+    update = _api_call("update")(GridWorksheet.update)
+    update_cell = _api_call("update_cell")(GridWorksheet.update_cell)
+    find = _api_call("find")(GridWorksheet.find)
+
+
+class FakeSpreadsheet(GridSpreadsheet):
+    """
+    In-memory stand-in for a gspread Spreadsheet, for tests and benchmarks:
+
+        fake = FakeSpreadsheet({"Partners": [headers, row, ...]}, latency=0.05)
+        fake.fail_next("append_row", worksheet="ActivityLog")
+        client = GoogleSheetsClient(spreadsheet=fake)
+        ...
+        fake.call_count("get_all_values", "Partners")
+
+    Every API-level call is counted per (operation, worksheet) and can be slowed down or
+    made to fail; calls the fake makes internally are not counted.
+    """
+
+    def __init__(self, worksheets: Optional[Dict[str, List[List]]] = None, latency: Latency = 0.0,
+                 failure_rate: float = 0.0, seed: Optional[int] = None):
+        self.id = "fake-spreadsheet"
+        self.lock = threading.RLock()
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.calls = collections.Counter()
+        self._random = random.Random(seed)
+        self._failures: List[dict] = []
+        self._worksheets: Dict[str, FakeWorksheet] = {}
+        self._local = threading.local()
+        for title, values in (worksheets or {}).items():
+            self.seed(title, values)
+
+    # --- set-up and inspection (not counted) -----------------------------------
+
+    def seed(self, title: str, values: List[List]) -> FakeWorksheet:
+        """Creates or replaces a worksheet's contents without counting it as a call."""
+        with self.lock:
+            ws = self._worksheets.get(title) or FakeWorksheet(self, title, len(self._worksheets))
+            self._worksheets[title] = ws
+            ws.rows = {i + 1: [as_cell_text(v) for v in row] for i, row in enumerate(values)}
+        return ws
+
+    def values(self, title: str) -> List[List[str]]:
+        """Current contents of a worksheet, for assertions."""
+        with self.lock:
+            ws = self._worksheets[title]
+            return [list(ws.rows.get(row, [])) for row in range(1, max(ws.rows, default=0) + 1)]
+
+    def call_count(self, operation: Optional[str] = None, worksheet: Optional[str] = None,
+                   kind: Optional[str] = None) -> int:
+        """Calls made so far, optionally narrowed to one operation, worksheet or kind ("read"/"write")."""
+        with self.lock:
+            return sum(
+                count for (op, title), count in self.calls.items()
+                if (operation is None or op == operation) and (worksheet is None or title == worksheet)
+                and (kind is None or kind == ("write" if op in WRITE_OPERATIONS else "read"))
+            )
+
+    def reset_calls(self):
+        with self.lock:
+            self.calls.clear()
+
+    def fail_next(self, operation: Optional[str] = None, worksheet: Optional[str] = None,
+                  error: Optional[Exception] = None, times: int = 1):
+        """Makes the next `times` matching calls raise `error` (a 500 FakeAPIError by default)."""
+        with self.lock:
+            self._failures.append({
+                "operation": operation, "worksheet": worksheet,
+                "error": error or FakeAPIError(), "times": times,
+            })
+
+    def _before_call(self, operation: str, title: Optional[str]):
+        with self.lock:
+            self.calls[(operation, title)] += 1
+            error = self._take_failure(operation, title)
+            if error is None and self.failure_rate and self._random.random() < self.failure_rate:
+                error = FakeAPIError()
+        delay = self.latency(operation, title) if callable(self.latency) else self.latency
+        if delay:
+            time.sleep(delay)
+        if error is not None:
+            raise error
+
+    def _take_failure(self, operation: str, title: Optional[str]) -> Optional[Exception]:
+        for failure in self._failures:
+            if failure["operation"] not in (None, operation) or failure["worksheet"] not in (None, title):
+                continue
+            failure["times"] -= 1
+            if failure["times"] <= 0:
+                self._failures.remove(failure)
+            return failure["error"]
+        return None
+
+    # --- gspread surface -----------------------------------------------------------
+
+    def worksheets(self) -> List[FakeWorksheet]:
+        with self.lock:
+            return list(self._worksheets.values())
+
+    @_api_call("worksheet")
+    def worksheet(self, title: str) -> FakeWorksheet:
+        with self.lock:
+            if title not in self._worksheets:
+                raise WorksheetNotFound(title)
+            return self._worksheets[title]
+
+    @_api_call("add_worksheet")
+    def add_worksheet(self, title: str, rows: int = 1000, cols: int = 26, **kwargs) -> FakeWorksheet:
+        with self.lock:
+            if title in self._worksheets:
+                raise FakeAPIError(400, f'A sheet with the name "{title}" already exists.')
+            return self.seed(title, [])
+
+    values_batch_get = _api_call("values_batch_get")(GridSpreadsheet.values_batch_get)
+    values_batch_update = _api_call("values_batch_update")(GridSpreadsheet.values_batch_update)
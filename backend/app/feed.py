@@ -0,0 +1,288 @@
+import asyncio
+import collections
+import heapq
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from .schema import BROADCAST, MILESTONE, PARTNER, CompiledSchema, timestamp
+
+# Events kept in memory for the landing page's live feed
+LIVE_FEED_SIZE = int(os.getenv("LIVE_FEED_SIZE", "50"))
+# Seconds after which the feed is re-seeded from the sheets, to pick up events written
+# by other instances or straight into the sheet.
+LIVE_FEED_RESEED_INTERVAL = float(os.getenv("LIVE_FEED_RESEED_INTERVAL", "300"))
+# Global broadcasts kept in memory for Last-Event-ID resume and /global-broadcasts
+BROADCAST_HISTORY = int(os.getenv("BROADCAST_HISTORY", "100"))
+# Seconds after which GlobalNotifications is re-read (by its tail, a small read) for
+# broadcasts from other instances. Toasts only live for 10 minutes, so this is much
+# shorter than the live feed's re-seed.
+BROADCAST_REFRESH_INTERVAL = float(os.getenv("BROADCAST_REFRESH_INTERVAL", "10"))
+# Events a slow stream subscriber may fall behind by before it misses some
+SUBSCRIBER_QUEUE_SIZE = 100
+# Seconds between heartbeat comments on idle broadcast streams, and the reconnect delay
+# (milliseconds) suggested to EventSource clients
+SSE_HEARTBEAT_INTERVAL = float(os.getenv("SSE_HEARTBEAT_INTERVAL", "15"))
+SSE_RETRY_MS = 5000
+
+# The worksheets the feed is built from, and how their rows decode
+FEED_SOURCES = {"ReferralMilestones": MILESTONE, "Partners": PARTNER, "GlobalNotifications": BROADCAST}
+
+FeedEvent = collections.namedtuple("FeedEvent", "timestamp type text")
+
+
+def _broadcast_event(b) -> Optional[FeedEvent]:
+    name = b.username or "Someone"
+    if b.type == "sage_rank":
+        return FeedEvent(b.timestamp, "sage", f"{name} just achieved the rank of Sage! 🥈")
+    if b.type == "master_rank":
+        return FeedEvent(b.timestamp, "master", f"{name} just reached Enchiridion Mastery! 🏆")
+    return None
+
+
+def _milestone_event(m) -> Optional[FeedEvent]:
+    name = m.referee_email.split("@")[0].capitalize() or "Someone"
+    if m.type == "book_purchase":
+        return FeedEvent(m.timestamp, "purchase", f"{name} just bought their Enchiridion guide (Book)! 📘")
+    if m.type == "distributor":
+        return FeedEvent(m.timestamp, "distributor", f"{name} just promoted to Distributor Status! 🚀")
+    if m.type == "partner":
+        return FeedEvent(m.timestamp, "partner", f"{name} just reached Partner Status! 🎉")
+    return None
+
+
+def _registration_event(p) -> Optional[FeedEvent]:
+    if not p.date_joined:
+        return None
+    name = p.name.split()[0] if p.name else "Someone"
+    return FeedEvent(p.date_joined, "registration", f"{name} from {p.state or 'Nigeria'} just registered with us! ✨")
+
+
+_EVENTS = {"ReferralMilestones": _milestone_event, "Partners": _registration_event, "GlobalNotifications": _broadcast_event}
+
+
+class LiveFeed:
+    """
+    The newest community events (purchases, promotions, rank-ups, registrations) in a
+    bounded, time-ordered ring buffer. Seeded from the sheets, then fed by the client's
+    appends to them (and the rows its tail reads find), so serving the feed costs no reads.
+    """
+
+    def __init__(self, size: int = LIVE_FEED_SIZE, reseed_interval: float = LIVE_FEED_RESEED_INTERVAL):
+        self.size = size
+        self.reseed_interval = reseed_interval
+        self.seeded_at: Optional[float] = None
+        # Oldest first; rows appended in time order land at the right end
+        self._events = collections.deque(maxlen=size)
+        # Header row -> schema compiled for it, to decode appended rows
+        self._compiled: Dict[tuple, CompiledSchema] = {}
+        self._reseeding = False
+        self._lock = threading.RLock()
+
+    def seed(self, sheets: Dict[str, List]):
+        """Replaces the buffer with the newest events in the given typed rows (see FEED_SOURCES)."""
+        events = [e for name, rows in sheets.items() for e in map(_EVENTS[name], rows) if e is not None]
+        newest = heapq.nlargest(self.size, events, key=lambda e: e.timestamp)
+        with self._lock:
+            # Keep events appended while the sheets were being read
+            seen = set(newest)
+            latest = newest[0].timestamp if newest else ""
+            newest += [e for e in self._events if e.timestamp > latest and e not in seen]
+            newest.sort(key=lambda e: e.timestamp)
+            self._events = collections.deque(newest[-self.size:], maxlen=self.size)
+            self.seeded_at = time.monotonic()
+
+    def on_append(self, worksheet_name: str, headers: Optional[List[str]], row: List):
+        """Append listener: a row just written to one of the source worksheets."""
+        if self.seeded_at is None or not headers:
+            # Not seeded yet: the seeding read will pick the row up
+            return
+        key = tuple(headers)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            compiled = self._compiled[key] = FEED_SOURCES[worksheet_name].compile(headers)
+        event = _EVENTS[worksheet_name](compiled.decode(row))
+        if event is not None:
+            self.add(event)
+
+    def add(self, event: FeedEvent):
+        with self._lock:
+            events = self._events
+            if len(events) == self.size and event.timestamp < events[0].timestamp:
+                return
+            if not events or event.timestamp >= events[-1].timestamp:
+                events.append(event)
+                return
+            # Out of order (a late buffered write): insert in place
+            if len(events) == self.size:
+                events.popleft()
+            i = len(events)
+            while i > 0 and events[i - 1].timestamp > event.timestamp:
+                i -= 1
+            events.insert(i, event)
+
+    def latest(self, limit: int = 10) -> List[dict]:
+        with self._lock:
+            events = list(self._events)[-limit:] if limit > 0 else []
+        return [{"type": e.type, "text": e.text, "timestamp": e.timestamp} for e in reversed(events)]
+
+    def stale(self) -> bool:
+        with self._lock:
+            return self.seeded_at is None or time.monotonic() - self.seeded_at >= self.reseed_interval
+
+    def claim_reseed(self) -> bool:
+        """True (once) when the feed is due a re-seed and nobody is re-seeding it yet."""
+        with self._lock:
+            if self._reseeding or not self.stale():
+                return False
+            self._reseeding = True
+            return True
+
+    def release_reseed(self):
+        with self._lock:
+            self._reseeding = False
+
+    def clear(self):
+        with self._lock:
+            self._events.clear()
+            self.seeded_at = None
+
+
+Broadcast = collections.namedtuple("Broadcast", "timestamp type username text")
+
+
+def broadcast_payload(b: Broadcast) -> dict:
+    """The JSON shape clients get for a broadcast, polled or streamed."""
+    return {"id": f"{b.type}_{b.timestamp}", "type": b.type, "username": b.username, "text": b.text, "timestamp": b.timestamp}
+
+
+class BroadcastHub:
+    """
+    In-process pub/sub for GlobalNotifications (the Sage/Master rank-up toasts).
+
+    Fed by the client's appends to the worksheet like the live feed, and refreshed every
+    refresh_interval seconds by a tail read for other instances' broadcasts, it pushes
+    each new broadcast to the subscribed streams and keeps the latest ones, ordered by
+    timestamp, so a reconnecting stream can resume after its Last-Event-ID (the broadcast
+    timestamp).
+    """
+
+    def __init__(self, history: int = BROADCAST_HISTORY, refresh_interval: float = BROADCAST_REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self._history = collections.deque(maxlen=history)
+        self._known = set()
+        # queue -> the event loop it is read on; publishers run on worker threads
+        self._subscribers: Dict[asyncio.Queue, asyncio.AbstractEventLoop] = {}
+        self._compiled: Dict[tuple, CompiledSchema] = {}
+        self.seeded_at: Optional[float] = None
+        self._refreshing = False
+        self._lock = threading.RLock()
+
+    def seed(self, rows: List):
+        """Merges the newest broadcasts from typed GlobalNotifications rows into the history."""
+        rows = [r for r in rows if r.timestamp]
+        newest = heapq.nlargest(self._history.maxlen, rows, key=lambda r: r.timestamp)
+        with self._lock:
+            first_seed = self.seeded_at is None
+            self.seeded_at = time.monotonic()
+            latest = self._history[-1].timestamp if self._history else ""
+        for row in reversed(newest):
+            b = Broadcast(row.timestamp, row.type, row.username, row.text)
+            # Broadcasts written by other instances since we last looked go out to the streams
+            self.publish(b, notify=not first_seed and b.timestamp > latest)
+
+    def on_append(self, worksheet_name: str, headers: Optional[List[str]], row: List):
+        """Append listener on GlobalNotifications."""
+        if self.seeded_at is None or not headers:
+            return
+        key = tuple(headers)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            compiled = self._compiled[key] = BROADCAST.compile(headers)
+        r = compiled.decode(row)
+        if r.timestamp:
+            self.publish(Broadcast(r.timestamp, r.type, r.username, r.text))
+
+    def publish(self, b: Broadcast, notify: bool = True):
+        with self._lock:
+            if b in self._known:
+                return
+            history = self._history
+            if len(history) == history.maxlen:
+                if b.timestamp < history[0].timestamp:
+                    return
+                self._known.discard(history.popleft())
+            i = len(history)
+            while i > 0 and history[i - 1].timestamp > b.timestamp:
+                i -= 1
+            history.insert(i, b)
+            self._known.add(b)
+            subscribers = list(self._subscribers.items()) if notify else []
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, b)
+            except RuntimeError:
+                # The subscriber's loop is closed
+                self.unsubscribe(queue)
+
+    @staticmethod
+    def _deliver(queue: asyncio.Queue, b: Broadcast):
+        try:
+            queue.put_nowait(b)
+        except asyncio.QueueFull:
+            pass
+
+    def subscribe(self) -> asyncio.Queue:
+        """A queue receiving every broadcast published from now on; read it on this event loop."""
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    def since(self, last_id: str) -> List[Broadcast]:
+        """Broadcasts after the given event id (a broadcast timestamp), oldest first."""
+        with self._lock:
+            return [b for b in self._history if b.timestamp > last_id]
+
+    def recent(self, minutes: float = 10, limit: int = 5) -> List[Broadcast]:
+        """Up to limit broadcasts from the past minutes, newest first."""
+        threshold = datetime.now().timestamp() - minutes * 60
+        with self._lock:
+            history = list(self._history)
+        recent = []
+        for b in reversed(history):
+            at = timestamp(b.timestamp)
+            if at is None:
+                continue
+            if at.timestamp() < threshold or len(recent) >= limit:
+                break
+            recent.append(b)
+        return recent
+
+    def stale(self) -> bool:
+        with self._lock:
+            return self.seeded_at is None or time.monotonic() - self.seeded_at >= self.refresh_interval
+
+    def claim_refresh(self) -> bool:
+        """True (once) when the history is due a refresh and nobody is refreshing it yet."""
+        with self._lock:
+            if self._refreshing or not self.stale():
+                return False
+            self._refreshing = True
+            return True
+
+    def release_refresh(self):
+        with self._lock:
+            self._refreshing = False
+
+    def clear(self):
+        with self._lock:
+            self._history.clear()
+            self._known.clear()
+            self.seeded_at = None
@@ -0,0 +1,187 @@
+import bisect
+import collections
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .schema import PARTNER
+
+# Seconds after which the leaderboard is rebuilt from a fresh read of Partners, to pick
+# up edits that did not go through this instance (the sheet itself, other instances).
+RECONCILE_INTERVAL = float(os.getenv("LEADERBOARD_RECONCILE_INTERVAL", "300"))
+
+LeaderboardEntry = collections.namedtuple("LeaderboardEntry", "points revenue lifetime_earnings name email")
+
+
+def _entry(partner) -> LeaderboardEntry:
+    name = partner.name or "Anonymous Partner"
+    points, revenue = partner.points, partner.revenue
+    # Ensure they tally based on 1 pt = 100 naira conversion
+    if points > 0 and revenue == 0:
+        revenue = points * 100
+    elif revenue > 0 and points == 0:
+        points = revenue / 100
+
+    # Privacy Filter: "B. McLoughlin" instead of "Brendan McLoughlin"
+    if name != "Anonymous Partner":
+        parts = name.split()
+        if len(parts) > 1:
+            name = f"{parts[0][0]}. {' '.join(parts[1:])}"
+    return LeaderboardEntry(points, revenue, partner.lifetime_earnings, name, partner.email)
+
+
+def impact_badge(rank: int) -> str:
+    if rank == 1:
+        return "Elite Partner"
+    if rank <= 3:
+        return "Platinum Partner"
+    if rank <= 10:
+        return "Gold Partner"
+    if rank <= 25:
+        return "Silver Partner"
+    return "Rising Star"
+
+
+class Leaderboard:
+    """
+    Partners ordered by points, held in memory between reads of the sheet.
+
+    Registered as an eager view on Partners: every downloaded snapshot rebuilds it (the
+    reconciliation), and the writes patched into the cache in between (the point credits)
+    move single entries. Ties keep sheet order, as the old sort did.
+    """
+
+    schema = PARTNER
+
+    def __init__(self, reconcile_interval: float = RECONCILE_INTERVAL):
+        self.reconcile_interval = reconcile_interval
+        self.built_at: Optional[float] = None
+        self._entries: Dict[int, LeaderboardEntry] = {}
+        # email -> sheet row of the first partner with it
+        self._rows_by_email: Dict[str, int] = {}
+        # (-points, sheet row), ascending: best first
+        self._order: List[Tuple[float, int]] = []
+        self._stale = False
+        self._reconciling = False
+        self._lock = threading.RLock()
+
+    def build(self, headers: List[str], partners: List):
+        entries = {row: _entry(partner) for row, partner in enumerate(partners, 2)}
+        order = sorted((-entry.points, row) for row, entry in entries.items())
+        rows_by_email = {}
+        for row, entry in entries.items():
+            if entry.email:
+                rows_by_email.setdefault(entry.email, row)
+        with self._lock:
+            self._entries, self._order, self._rows_by_email = entries, order, rows_by_email
+            self.built_at = time.monotonic()
+            self._stale = False
+
+    def on_append(self, row: int, partner):
+        self._set(row, _entry(partner))
+
+    def on_update(self, row: int, partner):
+        self._set(row, _entry(partner))
+
+    def on_invalidate(self):
+        """The cached Partners sheet was dropped (e.g. a failed write): our copy may be off too."""
+        with self._lock:
+            self._stale = True
+
+    def _set(self, row: int, entry: LeaderboardEntry):
+        with self._lock:
+            old = self._entries.get(row)
+            if old is not None:
+                if old == entry:
+                    return
+                i = self._position(old.points, row)
+                if i is not None:
+                    del self._order[i]
+                if old.email != entry.email and self._rows_by_email.get(old.email) == row:
+                    del self._rows_by_email[old.email]
+                    # Another row may share the old email (rare); fall back to it
+                    for other_row, other in sorted(self._entries.items()):
+                        if other_row != row and other.email == old.email:
+                            self._rows_by_email[old.email] = other_row
+                            break
+            self._entries[row] = entry
+            bisect.insort(self._order, (-entry.points, row))
+            if entry.email and self._rows_by_email.get(entry.email, row + 1) > row:
+                self._rows_by_email[entry.email] = row
+
+    def _position(self, points: float, row: int) -> Optional[int]:
+        """Index of a row's key in the ordering, found by binary search."""
+        key = (-points, row)
+        i = bisect.bisect_left(self._order, key)
+        return i if i < len(self._order) and self._order[i] == key else None
+
+    def __len__(self):
+        return len(self._order)
+
+    def top(self, limit: int = 50) -> List[dict]:
+        with self._lock:
+            entries = [self._entries[row] for _, row in self._order[:limit]]
+        return [
+            {
+                "rank": rank,
+                "name": entry.name,
+                "points": entry.points,
+                "revenue": entry.revenue,
+                "lifetimeEarnings": entry.lifetime_earnings,
+                "impact": impact_badge(rank),
+                "email": entry.email,
+            }
+            for rank, entry in enumerate(entries, 1)
+        ]
+
+    def rank_of(self, email: str, neighbours: int = 2) -> Optional[dict]:
+        """
+        The partner's 1-based rank, percentile and the entries around them, or None when the
+        email is not on the board. O(log n): the email map gives the row, bisect the position.
+        """
+        email = str(email or "").strip().lower()
+        with self._lock:
+            row = self._rows_by_email.get(email)
+            entry = self._entries.get(row) if row is not None else None
+            i = self._position(entry.points, row) if entry is not None else None
+            if i is None:
+                return None
+            total = len(self._order)
+            start, end = max(0, i - neighbours), min(total, i + neighbours + 1)
+            nearby = [(j + 1, other_row, self._entries[other_row]) for j, (_, other_row) in enumerate(self._order[start:end], start)]
+        rank = i + 1
+        return {
+            "rank": rank,
+            "total": total,
+            # Share of partners ranked at or below this one
+            "percentile": round(100.0 * (total - rank + 1) / total, 1),
+            "points": entry.points,
+            "impact": impact_badge(rank),
+            "neighbours": [
+                {"rank": r, "name": e.name, "points": e.points, "impact": impact_badge(r), "isYou": other_row == row}
+                for r, other_row, e in nearby
+            ],
+        }
+
+    def stale(self) -> bool:
+        with self._lock:
+            return self._stale or self.built_at is None or time.monotonic() - self.built_at >= self.reconcile_interval
+
+    def claim_reconcile(self) -> bool:
+        """True (once) when the board is due a rebuild and nobody is rebuilding it yet."""
+        with self._lock:
+            if self._reconciling or not self.stale():
+                return False
+            self._reconciling = True
+            return True
+
+    def release_reconcile(self):
+        with self._lock:
+            self._reconciling = False
+
+    def clear(self):
+        with self._lock:
+            self._entries, self._order, self._rows_by_email = {}, [], {}
+            self.built_at = None
+            self._stale = False
@@ -1,11 +1,39 @@
-from fastapi import FastAPI, Depends
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from .auth import auth_backend, fastapi_users, UserRead, UserCreate, UserUpdate
 from .routers import referral, reviews
+from .sheets import sheets_client
+from .tracing import registry, request_seconds, request_sheets_calls, request_trace
 
+import hmac
 import os
+import time
 
-app = FastAPI(title="Enchiridion Backend")
+# Bearer token required by GET /metrics; the endpoint is disabled (404) without one
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+# Report each request's Sheets calls in a Server-Timing response header. It names
+# worksheets and timings to whoever made the request, so it is for debugging only.
+SERVER_TIMING = os.getenv("SERVER_TIMING", "").strip().lower() in ("1", "true", "yes")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Seed the live feed up front so the landing page's first poll is served from memory
+    try:
+        await referral.seed_live_feed()
+    except Exception as e:
+        print(f"WARNING: Could not seed the live feed on startup: {e}")
+    yield
+    # Write out any rows still sitting in the write-behind append buffers
+    try:
+        await sheets_client.aflush()
+    except Exception as e:
+        print(f"ERROR: Failed to flush buffered sheet rows on shutdown: {e}")
+
+
+app = FastAPI(title="Enchiridion Backend", lifespan=lifespan)
 
 # CORS configuration
 origins = os.getenv("CORS_ORIGINS", "http://localhost:3000,http://127.0.0.1:3000").split(",")
@@ -18,6 +46,48 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def _route_template(request: Request) -> str:
+    """The matched route's path template (e.g. /reviews/{review_id}), so metric labels stay bounded."""
+    route = request.scope.get("route")
+    if getattr(route, "path_regex", None) is None:
+        return "unmatched"
+    # Recent FastAPI versions leave the include_router prefix out of route.path: put back
+    # the (literal) prefix the route's template matched under
+    path = request.scope["path"]
+    for i, char in enumerate(path):
+        if char == "/" and route.path_regex.match(path[i:]):
+            return path[:i] + route.path
+    return route.path
+
+
+@app.middleware("http")
+async def trace_sheets_calls(request: Request, call_next):
+    """Times the request and records metrics; with SERVER_TIMING, reports its Sheets calls in a header."""
+    with request_trace() as trace:
+        response = await call_next(request)
+    route = _route_template(request)
+    request_seconds.observe(time.perf_counter() - trace.started, request.method, route, str(response.status_code))
+    request_sheets_calls.observe(len(trace.calls), request.method, route)
+    if SERVER_TIMING:
+        response.headers["Server-Timing"] = trace.server_timing()
+    return response
+
+
+def _client_metrics():
+    """Exposition lines for the counters sheets_client and its quota scheduler keep themselves."""
+    lines = ["# HELP sheets_snapshot_fetches_total Worksheet snapshots fetched, and requests that joined an in-flight fetch.",
+             "# TYPE sheets_snapshot_fetches_total counter"]
+    for outcome in ("fetches", "tail_fetches", "deduplicated_fetches"):
+        lines.append(f'sheets_snapshot_fetches_total{{outcome="{outcome}"}} {sheets_client.metrics[outcome]}')
+    lines += ["# HELP sheets_quota_rate_limited_total 429 responses from the Sheets API.",
+              "# TYPE sheets_quota_rate_limited_total counter"]
+    for kind, stats in sheets_client.quota.stats.items():
+        lines.append(f'sheets_quota_rate_limited_total{{kind="{kind}"}} {stats["rate_limited"]}')
+    return lines
+
+
+registry.add_collector(_client_metrics)
+
 # Auth routes
 app.include_router(
     fastapi_users.get_auth_router(auth_backend),
@@ -54,3 +124,14 @@ app.include_router(reviews.router, prefix="/reviews", tags=["reviews"])
 async def root():
 
     return {"message": "Enchiridion API is running"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Prometheus scrape endpoint: Sheets call latencies and counts, request latencies."""
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    supplied = request.headers.get("authorization", "").removeprefix("Bearer ").strip()
+    if not hmac.compare_digest(supplied.encode(), METRICS_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,244 @@
+import bisect
+import collections
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from .schema import MILESTONE, column_positions
+
+# Local file the milestone UniqueKeys are kept in between restarts (empty: memory only)
+MILESTONE_KEYS_PATH = os.getenv("MILESTONE_KEYS_PATH", "")
+
+# Book purchases a referrer needs for each legacy rank
+SAGE_AT = 6
+MASTER_AT = 16
+
+LegacyRank = collections.namedtuple("LegacyRank", "rank souls_guided sage_date mastery_date")
+
+
+def legacy_rank(count: int) -> str:
+    if count >= MASTER_AT:
+        return "Master"
+    if count >= SAGE_AT:
+        return "Sage"
+    return "Seeker"
+
+
+class LegacyRanks:
+    """
+    Per-referrer book_purchase aggregate over ReferralMilestones: how many souls each
+    referrer guided, when they reached Sage (6th) and Master (16th), and who the Masters
+    are. A view on the worksheet, so appended milestones are counted as they are written.
+    """
+
+    schema = MILESTONE
+
+    def __init__(self):
+        # referrer email -> book_purchase timestamps, sorted (attainment dates are the 6th/16th)
+        self._timestamps: Dict[str, List[str]] = {}
+        # sheet row -> (referrer email, timestamp) of each book_purchase row, to undo on edits
+        self._rows: Dict[int, Tuple[str, str]] = {}
+        # Masters in the order they first appear in the sheet
+        self._masters: Dict[str, int] = {}
+
+    def build(self, headers: List[str], milestones: List):
+        for row, milestone in enumerate(milestones, 2):
+            self._add(row, milestone)
+
+    def on_append(self, row: int, milestone):
+        self._add(row, milestone)
+
+    def on_update(self, row: int, milestone):
+        old = self._rows.pop(row, None)
+        if old:
+            email, timestamp = old
+            timestamps = self._timestamps[email]
+            del timestamps[bisect.bisect_left(timestamps, timestamp)]
+            if len(timestamps) < MASTER_AT:
+                self._masters.pop(email, None)
+        self._add(row, milestone)
+
+    def _add(self, row: int, milestone):
+        if milestone.type != "book_purchase" or not milestone.referrer_email:
+            return
+        email = milestone.referrer_email
+        self._rows[row] = (email, milestone.timestamp)
+        timestamps = self._timestamps.setdefault(email, [])
+        bisect.insort(timestamps, milestone.timestamp)
+        if len(timestamps) >= MASTER_AT:
+            self._masters.setdefault(email, row)
+
+    def count(self, email: str) -> int:
+        return len(self._timestamps.get(str(email or "").strip().lower(), ()))
+
+    def get(self, email: str) -> LegacyRank:
+        timestamps = self._timestamps.get(str(email or "").strip().lower(), [])
+        count = len(timestamps)
+        return LegacyRank(
+            legacy_rank(count),
+            count,
+            timestamps[SAGE_AT - 1] if count >= SAGE_AT else None,
+            timestamps[MASTER_AT - 1] if count >= MASTER_AT else None,
+        )
+
+    def rank_data(self, email: str) -> dict:
+        """The /stats shape: rank, soulsGuided and the date the current rank was reached."""
+        entry = self.get(email)
+        return {
+            "rank": entry.rank,
+            "soulsGuided": entry.souls_guided,
+            "masteryDate": entry.mastery_date if entry.rank == "Master" else entry.sage_date,
+        }
+
+    def masters(self) -> List[str]:
+        return list(self._masters)
+
+
+def _normalize_key(key) -> str:
+    return str(key or "").strip().lower()
+
+
+class MilestoneKeysView:
+    """
+    Eager view on ReferralMilestones that feeds MilestoneKeys: every downloaded snapshot
+    (including reloads picking up other instances' rows) and every row appended or
+    tail-read into it.
+    """
+
+    schema = MILESTONE
+
+    def __init__(self, keys: "MilestoneKeys"):
+        self.keys = keys
+
+    def build(self, headers: List[str], milestones: List):
+        self.keys.add(m.unique_key for m in milestones)
+
+    def on_append(self, row: int, milestone):
+        self.keys.add([milestone.unique_key])
+
+    def on_update(self, row: int, milestone):
+        self.keys.add([milestone.unique_key])
+
+
+class MilestoneKeys:
+    """
+    The UniqueKeys of ReferralMilestones, for O(1) "already credited?" checks.
+
+    Loaded once (one column, not the whole sheet), then kept current by the client's
+    appends to the worksheet and by every snapshot of it the client reads (see
+    MilestoneKeysView), so keys recorded by other instances are learned as soon as the
+    worksheet is re-read. claim() is atomic, so two credit tasks for the same milestone
+    cannot both pass the check. With a path, keys are also written to a local file and
+    a restart only reads the rows added since.
+    """
+
+    def __init__(self, path: str = ""):
+        self.path = path
+        self.loaded = False
+        self._keys = set()
+        # Claimed by a credit in progress, not appended yet
+        self._pending = set()
+        # Sheet rows covered by the keys on file
+        self._synced_rows = 0
+        self._lock = threading.RLock()
+        # Held for the whole load; self._lock only around state changes, as snapshots
+        # read during the load feed keys in (under the client's cache lock)
+        self._load_lock = threading.Lock()
+
+    def load(self, read_column):
+        """
+        Fills the set once. read_column(start) returns the UniqueKey cells of sheet rows
+        start.. (one tuple per row).
+        """
+        with self._load_lock:
+            if self.loaded:
+                return
+            with self._lock:
+                keys, synced_rows = self._read_file()
+            rows = read_column(synced_rows + 2)
+            keys.update(_normalize_key(row[0]) for row in rows)
+            keys.discard("")
+            with self._lock:
+                self._keys |= keys
+                self._synced_rows = synced_rows + len(rows)
+                self._write_file(self._keys, self._synced_rows, replace=True)
+                self.loaded = True
+
+    def add(self, keys):
+        """Records UniqueKeys found in the sheet."""
+        new = {_normalize_key(key) for key in keys}
+        new.discard("")
+        with self._lock:
+            new -= self._keys
+            if not new:
+                return
+            self._keys |= new
+            if self.loaded:
+                # Before that, load() saves them with the rest
+                self._write_file(sorted(new))
+
+    def __contains__(self, key) -> bool:
+        with self._lock:
+            return _normalize_key(key) in self._keys
+
+    def claim(self, key) -> bool:
+        """True if the key is new and now reserved for the caller; False if already taken."""
+        key = _normalize_key(key)
+        with self._lock:
+            if key in self._keys or key in self._pending:
+                return False
+            self._pending.add(key)
+            return True
+
+    def release(self, key):
+        """Gives up a claim (the credit did not happen, or its milestone row is written)."""
+        with self._lock:
+            self._pending.discard(_normalize_key(key))
+
+    def on_append(self, worksheet_name: str, headers: Optional[List[str]], row: List):
+        """Append listener on ReferralMilestones."""
+        position = column_positions(headers or [], ["UniqueKey"])[0]
+        if position is None or position >= len(row):
+            return
+        self.add([row[position]])
+
+    def _read_file(self):
+        keys, synced_rows = set(), 0
+        if not self.path or not os.path.exists(self.path):
+            return keys, synced_rows
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.rstrip("\n")
+                    if line.startswith("#rows "):
+                        synced_rows = int(line[6:])
+                    elif line:
+                        keys.add(line)
+        except (OSError, ValueError) as e:
+            print(f"WARNING: Could not read milestone keys from {self.path}, reloading them: {e}")
+            return set(), 0
+        return keys, synced_rows
+
+    def _write_file(self, keys, synced_rows: Optional[int] = None, replace: bool = False):
+        # Caller holds self._lock
+        if not self.path:
+            return
+        try:
+            if replace:
+                tmp = f"{self.path}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.write(f"#rows {synced_rows}\n")
+                    f.writelines(f"{key}\n" for key in sorted(keys))
+                os.replace(tmp, self.path)
+            else:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.writelines(f"{key}\n" for key in keys)
+        except OSError as e:
+            print(f"WARNING: Could not save milestone keys to {self.path}: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+            self._pending.clear()
+            self._synced_rows = 0
+            self.loaded = False
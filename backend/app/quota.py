@@ -0,0 +1,159 @@
+import contextlib
+import contextvars
+import functools
+import heapq
+import inspect
+import itertools
+import os
+import random
+import threading
+import time
+from typing import Dict, Optional
+
+# Google Sheets quotas are per minute and counted separately for reads and writes.
+# Set either to 0 to stop throttling that kind of call (429 backoff still applies).
+READS_PER_MINUTE = float(os.getenv("SHEETS_READS_PER_MINUTE", "60"))
+WRITES_PER_MINUTE = float(os.getenv("SHEETS_WRITES_PER_MINUTE", "60"))
+# How often a call that hit a 429 is retried, and the longest pause between attempts
+MAX_RETRIES = int(os.getenv("SHEETS_MAX_RETRIES", "5"))
+MAX_BACKOFF = float(os.getenv("SHEETS_MAX_BACKOFF", "64"))
+
+# Lower numbers are served first when calls are waiting for quota
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+
+_call_priority = contextvars.ContextVar("sheets_call_priority", default=PRIORITY_INTERACTIVE)
+
+
+def current_priority() -> int:
+    return _call_priority.get()
+
+
+@contextlib.contextmanager
+def call_priority(priority: int):
+    """Runs the Sheets calls made inside the block at the given priority."""
+    token = _call_priority.set(priority)
+    try:
+        yield
+    finally:
+        _call_priority.reset(token)
+
+
+def background_priority(func):
+    """Decorator for background tasks: their Sheets calls queue behind user-facing ones."""
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            with call_priority(PRIORITY_BACKGROUND):
+                return await func(*args, **kwargs)
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with call_priority(PRIORITY_BACKGROUND):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """True for a 429 / RESOURCE_EXHAUSTED response from the Sheets API."""
+    response = getattr(error, "response", None)
+    status = getattr(error, "code", None) or getattr(response, "status_code", None)
+    return status == 429
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+class _Bucket:
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.strikes = 0
+        self.waiting = []
+
+    def refill(self, now: float):
+        # No tokens accrue while paused after a 429
+        since = max(self.updated, min(self.paused_until, now))
+        if self.capacity > 0:
+            self.tokens = min(self.capacity, self.tokens + (now - since) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Seconds until the head of the queue may go, 0 if it may go now."""
+        pause = max(0.0, self.paused_until - now)
+        if self.capacity <= 0 or self.tokens >= 1:
+            return pause
+        return max(pause, (1 - self.tokens) / self.rate)
+
+
+class QuotaScheduler:
+    """
+    Token buckets for Sheets reads and writes. Callers waiting for quota are served by
+    priority (then arrival order), and a 429 pauses that bucket with exponential backoff.
+    """
+
+    def __init__(self, reads_per_minute: float = READS_PER_MINUTE, writes_per_minute: float = WRITES_PER_MINUTE,
+                 max_backoff: float = MAX_BACKOFF):
+        self.max_backoff = max_backoff
+        self._buckets: Dict[str, _Bucket] = {"read": _Bucket(reads_per_minute), "write": _Bucket(writes_per_minute)}
+        self._cond = threading.Condition()
+        self._sequence = itertools.count()
+        # Counters: calls granted, time spent waiting and 429s seen, per kind
+        self.stats = {kind: {"granted": 0, "waited_seconds": 0.0, "rate_limited": 0} for kind in self._buckets}
+
+    def acquire(self, kind: str, priority: Optional[int] = None):
+        """Blocks until a call of this kind ("read" or "write") may be sent."""
+        bucket = self._buckets[kind]
+        ticket = (current_priority() if priority is None else priority, next(self._sequence))
+        started = time.monotonic()
+        with self._cond:
+            heapq.heappush(bucket.waiting, ticket)
+            while True:
+                now = time.monotonic()
+                bucket.refill(now)
+                if bucket.waiting[0] == ticket:
+                    delay = bucket.delay(now)
+                    if delay <= 0:
+                        heapq.heappop(bucket.waiting)
+                        if bucket.capacity > 0:
+                            bucket.tokens -= 1
+                        stats = self.stats[kind]
+                        stats["granted"] += 1
+                        stats["waited_seconds"] += now - started
+                        # Let the next caller in line check its turn
+                        self._cond.notify_all()
+                        return
+                    self._cond.wait(delay)
+                else:
+                    self._cond.wait()
+
+    def rate_limited(self, kind: str, error: Optional[Exception] = None) -> float:
+        """Records a 429 and pauses the bucket. Returns the pause in seconds."""
+        with self._cond:
+            bucket = self._buckets[kind]
+            bucket.strikes += 1
+            self.stats[kind]["rate_limited"] += 1
+            pause = retry_after(error) if error is not None else None
+            if pause is None:
+                # 1s, 2s, 4s ... plus jitter so parallel workers do not retry in lockstep
+                pause = min(self.max_backoff, 2 ** (bucket.strikes - 1)) + random.uniform(0, 1)
+            now = time.monotonic()
+            bucket.paused_until = max(bucket.paused_until, now + pause)
+            bucket.tokens = 0
+            bucket.updated = now
+            self._cond.notify_all()
+            return pause
+
+    def succeeded(self, kind: str):
+        with self._cond:
+            self._buckets[kind].strikes = 0
@@ -1,8 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Request, Response, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from typing import Optional, List
 from pydantic import BaseModel
 from ..models import ActivityLog, PayoutSettings, SessionTrack, MarkAsPaidRequest, UserRead, LeadCapture, DistributorLead, ShareTrack, UserProgress
-from ..sheets import sheets_client, safe_float
+from ..sheets import sheets_client, safe_float, PARTNER_CODE_KEYS
+from ..schema import ACTIVITY, MILESTONE, PARTNER, column_positions
+from ..quota import background_priority
+from ..milestones import MASTER_AT, SAGE_AT
+from ..feed import FEED_SOURCES, SSE_HEARTBEAT_INTERVAL, SSE_RETRY_MS, broadcast_payload
 from ..auth import current_active_user, current_active_superuser, UserRead, conf, FastMail, MessageSchema, MessageType
 from datetime import datetime, timedelta
 import csv
@@ -12,19 +17,28 @@ import hmac
 import hashlib
 import json
 import os
+import time
+import asyncio
 
 router = APIRouter()
 
 @router.get("/referrer-name")
 async def get_referrer_name(refCode: str):
     """Returns the name of the referrer for a given code."""
-    records = sheets_client.get_all_records("Partners")
-    target_code = refCode.strip().lower()
-    for record in records:
-        if str(record.get("REFERRAL CODE", "")).strip().lower() == target_code:
+    if sheets_client.is_cached("Partners"):
+        _, record = await sheets_client.afind_record("Partners", "referral_code", refCode)
+        if record:
             return {"name": record.get("NAME", record.get("FULL NAME", "a friend"))}
+        raise HTTPException(status_code=404, detail="Referrer not found")
+
+    # Cold cache: download two columns instead of the whole Partners sheet
+    wanted = str(refCode or "").strip().lower()
+    for code, name in await sheets_client.aget_columns("Partners", PARTNER_CODE_KEYS, ("NAME", "FULL NAME")):
+        if wanted and code.strip().lower() == wanted:
+            return {"name": name or "a friend"}
     raise HTTPException(status_code=404, detail="Referrer not found")
 
+@background_priority
 def _log_activity_background(row: list):
     """Saves activity log in the background."""
     try:
@@ -32,6 +46,7 @@ def _log_activity_background(row: list):
     except Exception as e:
         print(f"ERROR: Background ActivityLog append failed: {e}")
 
+@background_priority
 def _log_global_broadcast(type: str, username: str, city: str = "Nigeria"):
     """
     Logs a community-wide broadcast event to the 'GlobalNotifications' sheet.
@@ -65,6 +80,7 @@ async def log_activity(activity: ActivityLog, background_tasks: BackgroundTasks)
     background_tasks.add_task(_log_activity_background, row)
     return {"success": True}
 
+@background_priority
 def _save_lead_to_sheet(lead_data: list, sheet_name: str):
     """Internal helper to save lead data in the background (runs in threadpool)."""
     try:
@@ -120,6 +136,7 @@ async def subscribe_newsletter(lead: LeadCapture, background_tasks: BackgroundTa
     return {"success": True}
 
 
+@background_priority
 def _save_distributor_lead_background(row: list):
     """Saves distributor lead data in the background."""
     sheet_name = "Distributor Leads"
@@ -207,75 +224,62 @@ async def distributor_lead(lead: DistributorLead, background_tasks: BackgroundTa
         
     return {"success": True}
 
+@background_priority
 def _credit_distributor_milestone_background(ref_code: str, referee_name: str, referee_id: str):
     """Credits the referrer for a distributor lead milestone."""
     try:
         # Re-using the logic from purchase milestone but for 'distributor'
-        target_code = ref_code.strip().lower()
-        records = sheets_client.get_all_records("Partners")
-        referrer_email = None
-        for r in records:
-            if str(r.get("REFERRAL CODE", "")).strip().lower() == target_code:
-                referrer_email = str(r.get("USERNAME", "")).lower().strip()
-                break
+        _, referrer = sheets_client.find_record("Partners", "referral_code", ref_code)
+        referrer_email = str(referrer.get("USERNAME", "")).lower().strip() if referrer else None
         
         if referrer_email:
             unique_key = f"{referee_id}_distributor"
             # Idempotency
-            m_records = sheets_client.get_all_records("ReferralMilestones")
-            if any(str(r.get("UniqueKey", "")).lower().strip() == unique_key.lower().strip() for r in m_records):
+            if not sheets_client.claim_milestone(unique_key):
                 return
             
-            # Find Referrer Indices
-            for i, record in enumerate(records):
-                if str(record.get("USERNAME", "")).lower().strip() == referrer_email:
-                    row_idx = i + 2
+            try:
+                # Find Referrer Indices
+                row_idx, record = sheets_client.find_record("Partners", "email", referrer_email, fresh=True)
+                if record:
                     pts = safe_float(sheets_client.get_case_insensitive_val(record, "POINTS", "points")) + 0.1
                     sheets_client.update_range("Partners", f"E{row_idx}:F{row_idx}", [[pts, pts*100]])
                     # Milestone log
                     sheets_client.append_row("ReferralMilestones", [datetime.now().isoformat(), referrer_email, referee_id, "distributor", 0.1, unique_key])
                     # Activity log
                     sheets_client.append_row("ActivityLog", [datetime.now().isoformat(), ref_code, "Distributor Setup", 0.1, f"Referee: {referee_name}", "", "PENDING"])
-                    break
+            finally:
+                sheets_client.release_milestone(unique_key)
     except Exception as e:
         print(f"ERROR: Distributor milestone failed: {e}")
 
 
+@background_priority
 def _credit_visit_background(ref_code: str, ip: str):
     """Handles the entire visit processing (lookup + credit) in the background."""
     try:
-        target_code = ref_code.strip().lower()
-        records = sheets_client.get_all_records("Partners")
+        referrer_row_idx, referrer = sheets_client.find_typed("Partners", "referral_code", ref_code, PARTNER, fresh=True)
         
-        referrer_row_idx = None
-        referrer_record = None
-        for i, record in enumerate(records):
-            ref_val = sheets_client.get_case_insensitive_val(record, "REFERRAL CODE", "ReferralCode", "referral_code", "REFERRAL_CODE")
-            if str(ref_val or "").strip().lower() == target_code:
-                referrer_record = record
-                referrer_row_idx = i + 2 # 1-indexed + header
-                break
-        
-        if not referrer_record:
+        if not referrer:
             sheets_client.log_audit("Point Credit", f"Referrer code {ref_code} NOT FOUND. Visit credit skipped.", "WARNING")
             print(f"DEBUG: Referrer code {ref_code} not found. Skipping credit.")
             return
 
         # Fraud Prevention: Self-referral check (IP)
-        referrer_ip = referrer_record.get("LAST_IP", "")
+        referrer_ip = referrer.last_ip
         if referrer_ip == ip:
             sheets_client.log_audit("Point Credit", f"Self-referral blocked for {ref_code} (IP: {ip})", "BLOCKED")
             print(f"DEBUG: Self-referral blocked in background for {ref_code} (IP: {ip})")
             return
 
-        p_val = sheets_client.get_case_insensitive_val(referrer_record, "POINTS", "points", "Pts")
-        current_points = safe_float(p_val)
+        current_points = referrer.points
         new_points = round(current_points + 0.0, 2)
         new_revenue = round(new_points * 100, 2)
         
         # Atomic update
-        sheets_client.update_range("Partners", f"E{referrer_row_idx}:F{referrer_row_idx}", [[new_points, new_revenue]])
-        sheets_client.update_cell("Partners", referrer_row_idx, 9, "PENDING")
+        with sheets_client.unit_of_work():
+            sheets_client.update_range("Partners", f"E{referrer_row_idx}:F{referrer_row_idx}", [[new_points, new_revenue]])
+            sheets_client.update_cell("Partners", referrer_row_idx, 9, "PENDING")
         
         # Log Activity
         activity_row = [
@@ -300,28 +304,18 @@ async def record_share(track: SessionTrack, background_tasks: BackgroundTasks, p
     background_tasks.add_task(_credit_share_background, track.refCode, track.ip, platform)
     return {"status": "success", "message": "Share recorded"}
 
+@background_priority
 def _credit_share_background(ref_code: str, ip: str, platform: str):
     """Awards points for sharing the referral link."""
     try:
-        target_code = ref_code.strip().lower()
-        records = sheets_client.get_all_records("Partners")
-        
-        referrer_row_idx = None
-        referrer_record = None
-        for i, record in enumerate(records):
-            ref_val = sheets_client.get_case_insensitive_val(record, "REFERRAL CODE", "ReferralCode", "referral_code")
-            if str(ref_val or "").strip().lower() == target_code:
-                referrer_record = record
-                referrer_row_idx = i + 2
-                break
+        referrer_row_idx, referrer = sheets_client.find_typed("Partners", "referral_code", ref_code, PARTNER, fresh=True)
         
-        if not referrer_record:
+        if not referrer:
             sheets_client.log_audit("Share Credit", f"Referrer code '{ref_code}' NOT FOUND. Share reward skipped.", "WARNING")
             print(f"DEBUG: Referrer code '{ref_code}' NOT FOUND in sheet. Sharing reward skipped.")
             return
 
-        p_val = sheets_client.get_case_insensitive_val(referrer_record, "POINTS", "points", "Pts")
-        current_points = safe_float(p_val)
+        current_points = referrer.points
         new_points = round(current_points + 0.0, 2)
         new_revenue = round(new_points * 100, 2)
         
@@ -376,13 +370,13 @@ async def verify_integrity(user: UserRead = Depends(current_active_user)):
         raise HTTPException(status_code=403, detail="Admin access required")
     try:
         # Get raw values to check mapping explicitly (no header mapping)
-        ws = sheets_client.get_worksheet("Partners")
+        ws = await sheets_client.aget_worksheet("Partners")
         if not ws:
             return {"error": f"Worksheet 'Partners' not found in spreadsheet {sheets_client.spreadsheet_id}. Check backend logs for gspread errors."}
 
         
         # Get last 5 rows to audit
-        all_values = ws.get_all_values()
+        all_values = await sheets_client.arun(ws.get_all_values)
         if len(all_values) < 2:
             return {"error": "Sheet is empty"}
             
@@ -498,26 +492,22 @@ async def mock_register(email: str, refCode: str, request: Request):
     # We bypass the full FastAPI-users flow to simulate exactly what we need
     try:
         # Search for referrer
-        records = sheets_client.get_all_records("Partners")
-        referrer_row = None
-        for i, r in enumerate(records):
-            if str(r.get("REFERRAL CODE", "")).strip().lower() == refCode.strip().lower():
-                referrer_row = i + 2
-                break
+        referrer_row, referrer_record = await sheets_client.afind_record("Partners", "referral_code", refCode, fresh=True)
         
         if not referrer_row:
             return {"error": "Referrer not found"}
 
         # Simulate the 'on_after_register' logic
         # Increment points by 0.1
-        current = float(records[referrer_row-2].get("POINTS", 0.0))
+        current = float(referrer_record.get("POINTS", 0.0))
         new_points = round(current + 0.1, 2)
         new_revenue = round(new_points * 100, 2)
         
         # Atomic update of columns E (Points) and F (Revenue)
         # And reset status to PENDING in Column I (9th col)
-        sheets_client.update_range("Partners", f"E{referrer_row}:F{referrer_row}", [[new_points, new_revenue]])
-        sheets_client.update_cell("Partners", referrer_row, 9, "PENDING")
+        async with sheets_client.unit_of_work():
+            await sheets_client.aupdate_range("Partners", f"E{referrer_row}:F{referrer_row}", [[new_points, new_revenue]])
+            await sheets_client.aupdate_cell("Partners", referrer_row, 9, "PENDING")
 
         
         # Log to ActivityLog
@@ -530,7 +520,7 @@ async def mock_register(email: str, refCode: str, request: Request):
             "", # F: REPORTED Status
             "PENDING" # G: Payout Status
         ]
-        sheets_client.append_row("ActivityLog", activity_row)
+        await sheets_client.aappend_row("ActivityLog", activity_row)
         
         return {"success": True, "credited": 0.1, "referrer_row": referrer_row}
     except Exception as e:
@@ -542,7 +532,7 @@ async def sync_all_revenue(user: UserRead = Depends(current_active_user)):
     if not user.is_superuser:
         raise HTTPException(status_code=403, detail="Admin access required")
     try:
-        records = sheets_client.get_all_records("Partners")
+        records = await sheets_client.aget_all_records("Partners")
         updates = []
         for i, record in enumerate(records):
             row_idx = i + 2
@@ -559,7 +549,7 @@ async def sync_all_revenue(user: UserRead = Depends(current_active_user)):
                 if abs(current_revenue - revenue) > 0.01:
                     updates.append({"row": row_idx, "points": points, "revenue": revenue})
                     # Perform update for this row
-                    sheets_client.update_range("Partners", f"E{row_idx}:F{row_idx}", [[points, revenue]])
+                    await sheets_client.aupdate_range("Partners", f"E{row_idx}:F{row_idx}", [[points, revenue]])
             except Exception as e:
                 print(f"Skipping row {row_idx} due to error: {e}")
                 
@@ -667,31 +657,31 @@ async def payment_webhook(payload: PaystackWebhook, background_tasks: Background
             
     return {"status": "ignored"}
 
+@background_priority
 async def _handle_payment_milestone(referee_email: str):
     """Finds the referrer for a referee and credits them, and also credits the buyer (cash-back)."""
     try:
         # 1. Update UserOnboarding status
         try:
-            on_records = sheets_client.get_all_records("UserOnboarding")
+            on_records = await sheets_client.aget_all_records("UserOnboarding")
             o_row = None
             for i, r in enumerate(on_records):
                 if str(r.get("Email", "")).lower().strip() == referee_email.lower().strip():
                     o_row = i + 2
                     break
             if o_row:
-                sheets_client.update_cell("UserOnboarding", o_row, 5, "TRUE")
-                sheets_client.update_cell("UserOnboarding", o_row, 6, datetime.now().isoformat())
+                async with sheets_client.unit_of_work():
+                    await sheets_client.aupdate_cell("UserOnboarding", o_row, 5, "TRUE")
+                    await sheets_client.aupdate_cell("UserOnboarding", o_row, 6, datetime.now().isoformat())
         except Exception as e:
             print(f"ERROR: Failed to update onboarding purchase state for {referee_email}: {e}")
 
         # 2. Credit the Buyer (Cash-Back)
         buyer_name = "Master"
         try:
-            p_records = sheets_client.get_all_records("Partners")
-            for r in p_records:
-                if str(r.get("USERNAME", "")).lower().strip() == referee_email.lower().strip():
-                    buyer_name = r.get("FULL NAME", r.get("NAME", "Master"))
-                    break
+            _, buyer = await sheets_client.afind_record("Partners", "email", referee_email)
+            if buyer:
+                buyer_name = buyer.get("FULL NAME", buyer.get("NAME", "Master"))
             
             await _credit_buyer_cashback(referee_email)
             await _send_cashback_confirmation_email(referee_email, buyer_name)
@@ -699,54 +689,27 @@ async def _handle_payment_milestone(referee_email: str):
             print(f"ERROR: Failed buyer cashback for {referee_email}: {e}")
 
         # 3. Credit the Referrer
-        records = sheets_client.get_all_records("Partners")
-        referred_by = None
-        for r in records:
-            if str(r.get("USERNAME", "")).lower().strip() == referee_email.lower().strip():
-                referred_by = str(r.get("REFERRED_BY", "")).strip()
-                break
+        _, referee = await sheets_client.afind_record("Partners", "email", referee_email)
+        referred_by = str(referee.get("REFERRED_BY", "")).strip() if referee else None
         
         if referred_by:
-            # Trigger the purchase credit logic (Credits Referrer 5.0)
-            _credit_purchase_background(referred_by, referee_email)
+            # Trigger the purchase credit logic (Credits Referrer 5.0). It is blocking and
+            # runs its own loop for the mastery email, so keep it off the event loop.
+            await sheets_client.arun(_credit_purchase_background, referred_by, referee_email)
             
     except Exception as e:
         print(f"ERROR: Failed to handle payment milestone for {referee_email}: {e}")
 
 async def _get_legacy_rank_data(email: str):
-    """Calculates Legacy Rank and Souls Guided count based on ReferralMilestones."""
+    """
+    Legacy Rank and Souls Guided count, read from the per-referrer aggregate kept over
+    ReferralMilestones (see app.milestones) instead of rescanning the sheet.
+    """
     try:
-        email = email.lower().strip()
-        milestones = sheets_client.get_all_records("ReferralMilestones")
-        
-        # Filter for book_purchase milestones where this user is the referrer
-        book_refs = [
-            m for m in milestones 
-            if str(m.get("MilestoneType", "")).lower().strip() == "book_purchase" and 
-            str(m.get("ReferrerEmail", "")).lower().strip() == email
-        ]
-        
-        # Sort by timestamp to find attainment dates
-        book_refs.sort(key=lambda x: x.get("Timestamp", ""))
-        
-        count = len(book_refs)
-        rank = "Seeker"
-        mastery_date = None
-        
-        if count >= 16:
-            rank = "Master"
-            # 16th referral date
-            mastery_date = book_refs[15].get("Timestamp")
-        elif count >= 6:
-            rank = "Sage"
-            # 6th referral date
-            mastery_date = book_refs[5].get("Timestamp")
-            
-        return {
-            "rank": rank,
-            "soulsGuided": count,
-            "masteryDate": mastery_date
-        }
+        ranks = await sheets_client.aget_view("ReferralMilestones", "legacy_ranks")
+        if ranks is None:
+            return {"rank": "Seeker", "soulsGuided": 0, "masteryDate": None}
+        return ranks.rank_data(email)
     except Exception as e:
         print(f"ERROR calculating legacy rank for {email}: {e}")
         return {"rank": "Seeker", "soulsGuided": 0, "masteryDate": None}
@@ -755,20 +718,13 @@ async def _trigger_onboarding_reward(target_email: str, step: str):
     """Internal helper to find referrer and award points for onboarding steps."""
     try:
         # Find the user's referrer code
-        p_records = sheets_client.get_all_records("Partners")
-        referred_by_code = None
-        for p in p_records:
-            if str(p.get("USERNAME", "")).lower().strip() == target_email.lower().strip():
-                referred_by_code = str(p.get("REFERRED_BY", "")).strip()
-                break
+        _, target = await sheets_client.afind_record("Partners", "email", target_email)
+        referred_by_code = str(target.get("REFERRED_BY", "")).strip() if target else None
         
         if referred_by_code:
             # Find referrer email
-            referrer_email = None
-            for p in p_records:
-                if str(p.get("REFERRAL CODE", "")).lower().strip() == referred_by_code.lower().strip():
-                    referrer_email = str(p.get("USERNAME", "")).lower().strip()
-                    break
+            _, referrer = await sheets_client.afind_record("Partners", "referral_code", referred_by_code)
+            referrer_email = str(referrer.get("USERNAME", "")).lower().strip() if referrer else None
             
             if referrer_email:
                 from ..auth import GoogleSheetsUserDatabase, UserManager, User
@@ -783,7 +739,7 @@ async def _trigger_onboarding_reward(target_email: str, step: str):
 @router.get("/progress", response_model=UserProgress)
 async def get_user_progress(user: UserRead = Depends(current_active_user)):
     """Fetches the onboarding progress for the current user and auto-syncs login milestones."""
-    records = sheets_client.get_all_records("UserOnboarding")
+    records = await sheets_client.aget_all_records("UserOnboarding")
     target = user.email.lower().strip()
     
     current_progress = None
@@ -797,8 +753,8 @@ async def get_user_progress(user: UserRead = Depends(current_active_user)):
     if not current_progress:
         # Create record if missing (legacy users)
         onboarding_row = [target, "TRUE" if user.is_verified else "FALSE", "TRUE", "FALSE", "FALSE", datetime.now().isoformat()]
-        sheets_client.get_or_create_worksheet("UserOnboarding", ["Email", "IsVerified", "IsPartner", "IsDistributor", "HasPurchasedBook", "LastUpdated"])
-        sheets_client.append_row("UserOnboarding", onboarding_row)
+        await sheets_client.aget_or_create_worksheet("UserOnboarding", ["Email", "IsVerified", "IsPartner", "IsDistributor", "HasPurchasedBook", "LastUpdated"])
+        await sheets_client.aappend_row("UserOnboarding", onboarding_row)
         # Award reward for partner status
         await _trigger_onboarding_reward(target, "partner")
         return UserProgress(email=target, is_verified=user.is_verified, is_partner=True)
@@ -807,25 +763,30 @@ async def get_user_progress(user: UserRead = Depends(current_active_user)):
     is_verified_sheet = str(current_progress.get("IsVerified", "FALSE")).upper() == "TRUE"
     is_partner_sheet = str(current_progress.get("IsPartner", "FALSE")).upper() == "TRUE"
     
-    updates_made = False
+    award_partner = False
+    async with sheets_client.unit_of_work():
+        updates_made = False
     
-    # 1. Sync Verification
-    if user.is_verified and not is_verified_sheet:
-        sheets_client.update_cell("UserOnboarding", row_idx, 2, "TRUE")
-        is_verified_sheet = True
-        updates_made = True
-        
-    # 2. Sync Partner Status (Accessing dashboard = Partner)
-    if not is_partner_sheet:
-        sheets_client.update_cell("UserOnboarding", row_idx, 3, "TRUE")
-        is_partner_sheet = True
-        updates_made = True
+        # 1. Sync Verification
+        if user.is_verified and not is_verified_sheet:
+            await sheets_client.aupdate_cell("UserOnboarding", row_idx, 2, "TRUE")
+            is_verified_sheet = True
+            updates_made = True
+        
+        # 2. Sync Partner Status (Accessing dashboard = Partner)
+        if not is_partner_sheet:
+            await sheets_client.aupdate_cell("UserOnboarding", row_idx, 3, "TRUE")
+            is_partner_sheet = True
+            updates_made = True
+            award_partner = True
+
+        if updates_made:
+            await sheets_client.aupdate_cell("UserOnboarding", row_idx, 6, datetime.now().isoformat())
+
+    if award_partner:
         # Trigger reward logic
         await _trigger_onboarding_reward(target, "partner")
 
-    if updates_made:
-        sheets_client.update_cell("UserOnboarding", row_idx, 6, datetime.now().isoformat())
-
     return UserProgress(
         email=target,
         is_verified=is_verified_sheet,
@@ -839,116 +800,130 @@ class ProgressUpdate(BaseModel):
     email: str
     step: str # 'partner' or 'distributor'
 
-@router.get("/recent-milestones")
-async def get_recent_milestones():
-    """Fetches the latest 10 milestones and registrations for the live feed."""
+async def seed_live_feed():
+    """Fills the in-memory live feed and broadcast history from the sheets, in one batched read."""
+    sheets = await sheets_client.aget_many_typed(FEED_SOURCES)
+    sheets_client.live_feed.seed(sheets)
+    sheets_client.broadcasts.seed(sheets["GlobalNotifications"])
+
+@background_priority
+def _reseed_live_feed():
+    """Re-seeds the live feed, picking up events this instance did not write."""
     try:
-        # 1. Fetch latest milestones
-        milestone_records = sheets_client.get_all_records("ReferralMilestones")
-        latest_milestones = sorted(milestone_records, key=lambda x: x.get("Timestamp", ""), reverse=True)[:10]
-        
-        # 2. Fetch latest partners (for "New Partner" notifications)
-        partner_records = sheets_client.get_all_records("Partners")
-        latest_partners = sorted(partner_records, key=lambda x: x.get("DATE_JOINED", ""), reverse=True)[:10]
-
-        # 3. Fetch latest global broadcasts (rank ups)
-        broadcast_records = sheets_client.get_all_records("GlobalNotifications")
-        latest_broadcasts = sorted(broadcast_records, key=lambda x: x.get("Timestamp", ""), reverse=True)[:10]
-
-        all_impacts = []
-        
-        # Process global broadcasts
-        for b in latest_broadcasts:
-            b_type = b.get("BroadcastType", "").lower()
-            name = b.get("Username", "Someone")
-            if b_type == "sage_rank":
-                all_impacts.append({
-                    "type": "sage",
-                    "text": f"{name} just achieved the rank of Sage! 🥈",
-                    "timestamp": b.get("Timestamp")
-                })
-            elif b_type == "master_rank":
-                all_impacts.append({
-                    "type": "master",
-                    "text": f"{name} just reached Enchiridion Mastery! 🏆",
-                    "timestamp": b.get("Timestamp")
-                })
+        sheets = sheets_client.get_many_typed(FEED_SOURCES)
+        sheets_client.live_feed.seed(sheets)
+        sheets_client.broadcasts.seed(sheets["GlobalNotifications"])
+    except Exception as e:
+        print(f"ERROR: Live feed re-seed failed: {e}")
+    finally:
+        sheets_client.live_feed.release_reseed()
 
-        # Process milestones
-        for m in latest_milestones:
-            m_type = m.get("MilestoneType", "").lower()
-            name = m.get("RefereeEmail", "").split("@")[0]
-            # Try to capitalize first letter
-            name = name.capitalize() if name else "Someone"
-            
-            if m_type == "book_purchase":
-                all_impacts.append({
-                    "type": "purchase",
-                    "text": f"{name} just bought their Enchiridion guide (Book)! 📘",
-                    "timestamp": m.get("Timestamp")
-                })
-            elif m_type == "distributor":
-                all_impacts.append({
-                    "type": "distributor",
-                    "text": f"{name} just promoted to Distributor Status! 🚀",
-                    "timestamp": m.get("Timestamp")
-                })
-            elif m_type == "partner":
-                all_impacts.append({
-                    "type": "partner",
-                    "text": f"{name} just reached Partner Status! 🎉",
-                    "timestamp": m.get("Timestamp")
-                })
+@background_priority
+def _refresh_broadcasts():
+    """Reads the rows other instances added to GlobalNotifications (a tail read) into the broadcast history."""
+    try:
+        sheets_client.broadcasts.seed(sheets_client.get_typed("GlobalNotifications", FEED_SOURCES["GlobalNotifications"]))
+    except Exception as e:
+        print(f"ERROR: Broadcast refresh failed: {e}")
+    finally:
+        sheets_client.broadcasts.release_refresh()
 
-        # Process partners
-        for p in latest_partners:
-            name = p.get("FULL NAME", p.get("NAME", "Someone")).split()[0]
-            state = p.get("STATE", "Nigeria")
-            all_impacts.append({
-                "type": "registration",
-                "text": f"{name} from {state} just registered with us! ✨",
-                "timestamp": p.get("DATE_JOINED")
-            })
+async def _refresh_live_feed(background_tasks: Optional[BackgroundTasks] = None):
+    """
+    Seeds the live feed on first use; a feed due for a re-seed is served as is while a
+    background task re-reads the sheets. In between, the broadcasts are refreshed the
+    same way every BROADCAST_REFRESH_INTERVAL seconds, so another instance's rank-up
+    reaches the toasts (and, through the tail read, the feed) within about that long.
+    """
+    feed = sheets_client.live_feed
+    if feed.seeded_at is None:
+        await seed_live_feed()
+        return
+    if feed.claim_reseed():
+        task = _reseed_live_feed
+    elif sheets_client.broadcasts.claim_refresh():
+        task = _refresh_broadcasts
+    else:
+        return
+    if background_tasks is not None:
+        background_tasks.add_task(task)
+    else:
+        asyncio.get_running_loop().run_in_executor(sheets_client.background_executor, task)
 
-        # Sort and return top 10
-        all_impacts.sort(key=lambda x: x.get("timestamp", ""), reverse=True)
-        return all_impacts[:10]
+@router.get("/recent-milestones")
+async def get_recent_milestones(background_tasks: BackgroundTasks):
+    """
+    The latest 10 milestones, rank-ups and registrations for the live feed, served from
+    memory; only the first request waits on the sheets.
+    """
+    try:
+        await _refresh_live_feed(background_tasks)
     except Exception as e:
         print(f"ERROR fetching recent milestones: {e}")
         return []
+    return sheets_client.live_feed.latest(10)
 
 @router.get("/global-broadcasts")
-async def get_global_broadcasts():
-    """Fetches the latest global community alerts for real-time toasts."""
+async def get_global_broadcasts(background_tasks: BackgroundTasks):
+    """
+    The latest global community alerts for real-time toasts: at most 5, from the past 10
+    minutes (to avoid stale toasts). Served from memory; prefer /broadcast-stream.
+    """
     try:
-        # Fetch last 5 global notifications from the past 10 minutes (to avoid stale toasts)
-        records = sheets_client.get_all_records("GlobalNotifications")
-        if not records:
-            return []
-            
-        now = datetime.now()
-        threshold = now - timedelta(minutes=10)
-        
-        recent = []
-        for r in sorted(records, key=lambda x: x.get("Timestamp", ""), reverse=True):
+        await _refresh_live_feed(background_tasks)
+    except Exception as e:
+        print(f"ERROR fetching global broadcasts: {e}")
+        return []
+    return [broadcast_payload(b) for b in sheets_client.broadcasts.recent(minutes=10, limit=5)]
+
+def _sse(b) -> str:
+    return f"id: {b.timestamp}\nevent: broadcast\ndata: {json.dumps(broadcast_payload(b))}\n\n"
+
+async def _broadcast_stream(request: Request, last_event_id: Optional[str]):
+    """
+    Server-Sent Events for global broadcasts. A reconnect resumes after Last-Event-ID; a
+    new connection starts with the toasts of the past 10 minutes. Comment lines go out
+    every SSE_HEARTBEAT_INTERVAL seconds so proxies keep the connection open.
+    """
+    hub = sheets_client.broadcasts
+    queue = hub.subscribe()
+    try:
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        backlog = hub.since(last_event_id) if last_event_id else list(reversed(hub.recent(minutes=10, limit=5)))
+        sent = set(backlog)
+        for b in backlog:
+            yield _sse(b)
+        while True:
             try:
-                ts = date_parser.parse(r.get("Timestamp", ""))
-                if ts >= threshold:
-                    recent.append({
-                        "id": f"{r.get('BroadcastType')}_{r.get('Timestamp')}",
-                        "type": r.get("BroadcastType"),
-                        "username": r.get("Username"),
-                        "text": r.get("Text"),
-                        "timestamp": r.get("Timestamp")
-                    })
-                if len(recent) >= 5:
+                b = await asyncio.wait_for(queue.get(), SSE_HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
                     break
-            except:
+                # The heartbeat also keeps the history fresh for broadcasts from other instances
+                try:
+                    await _refresh_live_feed()
+                except Exception as e:
+                    print(f"ERROR: Could not load broadcast history: {e}")
+                yield ": heartbeat\n\n"
                 continue
-        return recent
+            if b not in sent:
+                yield _sse(b)
+    finally:
+        hub.unsubscribe(queue)
+
+@router.get("/broadcast-stream")
+async def stream_global_broadcasts(request: Request):
+    """Pushes Sage/Master rank-up broadcasts as they happen (text/event-stream)."""
+    try:
+        await _refresh_live_feed()
     except Exception as e:
-        print(f"ERROR fetching global broadcasts: {e}")
-        return []
+        # Stream what arrives from now on; the next heartbeat retries the seed
+        print(f"ERROR: Could not load broadcast history: {e}")
+    return StreamingResponse(
+        _broadcast_stream(request, request.headers.get("last-event-id")),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @router.post("/update-progress")
 async def update_user_progress(update: ProgressUpdate, user: UserRead = Depends(current_active_superuser)):
@@ -963,7 +938,7 @@ async def update_user_progress(update: ProgressUpdate, user: UserRead = Depends(
         raise HTTPException(status_code=400, detail="Invalid step. Use 'partner' or 'distributor'.")
 
     # 1. Find the onboarding row
-    records = sheets_client.get_all_records("UserOnboarding")
+    records = await sheets_client.aget_all_records("UserOnboarding")
     row_idx = None
     current_status = None
     for i, r in enumerate(records):
@@ -983,14 +958,16 @@ async def update_user_progress(update: ProgressUpdate, user: UserRead = Depends(
         return {"success": True, "message": f"Step {step} already completed."}
 
     # 3. Update the sheet
-    sheets_client.update_cell("UserOnboarding", row_idx, col_idx, "TRUE")
-    sheets_client.update_cell("UserOnboarding", row_idx, 6, datetime.now().isoformat())
+    async with sheets_client.unit_of_work():
+        await sheets_client.aupdate_cell("UserOnboarding", row_idx, col_idx, "TRUE")
+        await sheets_client.aupdate_cell("UserOnboarding", row_idx, 6, datetime.now().isoformat())
 
     # 4. Award Referrer
     await _trigger_onboarding_reward(target_email, step)
 
     return {"success": True, "message": f"Step {step} completed and reward processed."}
 
+@background_priority
 def _credit_purchase_background(ref_code: str, referee_email: str):
     """Internal helper to credit purchase reward using Milestone logic."""
     try:
@@ -1003,13 +980,8 @@ def _credit_purchase_background(ref_code: str, referee_email: str):
         # Actually, let's import the record_milestone_and_credit logic carefully.
         # I'll update referral.py to use the new milestone logic.
         
-        records = sheets_client.get_all_records("Partners")
-        referrer_email = None
-        for record in records:
-            ref_val = sheets_client.get_case_insensitive_val(record, "REFERRAL CODE", "ReferralCode", "referral_code")
-            if str(ref_val or "").strip().lower() == ref_code.strip().lower():
-                referrer_email = str(record.get("USERNAME", "")).lower().strip()
-                break
+        _, referrer = sheets_client.find_record("Partners", "referral_code", ref_code)
+        referrer_email = str(referrer.get("USERNAME", "")).lower().strip() if referrer else None
         
         if referrer_email:
             # Credit 5.0 for purchase Milestone
@@ -1021,56 +993,47 @@ def _credit_purchase_background(ref_code: str, referee_email: str):
             unique_key = f"{referee_email.lower().strip()}_book_purchase"
             
             # Idempotency
-            milestone_records = sheets_client.get_all_records("ReferralMilestones")
-            for r in milestone_records:
-                if str(r.get("UniqueKey", "")).lower().strip() == unique_key:
-                    return
-
-            # Find row index again for update
-            for i, record in enumerate(records):
-                 if str(record.get("USERNAME", "")).lower().strip() == referrer_email:
-                     row_idx = i + 2
-                     p_val = sheets_client.get_case_insensitive_val(record, "POINTS", "points")
-                     pts = safe_float(p_val) + 5.0
-                     sheets_client.update_range("Partners", f"E{row_idx}:F{row_idx}", [[pts, pts*100]])
-                     
-                     # Log Activity
-                     sheets_client.append_row("ActivityLog", [datetime.now().isoformat(), ref_code, "Book Purchase", 5.0, f"Referee: {referee_email}", "", "PENDING"])
-                     
-                     # Log Milestone
-                     sheets_client.append_row("ReferralMilestones", [datetime.now().isoformat(), referrer_email, referee_email, "book_purchase", 5.0, unique_key])
-
-                     # Rank-Up Detection
-                     # Since we just added a milestone, we need to check if they hit a threshold
-                     # But _get_legacy_rank_data recalculates everything, which is safe.
-                     # However, to know if they *just* ranked up, we'd need to know their count before.
-                     # We can just check if count == 6 or 16 specifically right now.
-                     
-                     import asyncio
-                     # We are in a sync background task, so we need a loop to call async rank helper
-                     try:
-                         loop = asyncio.new_event_loop()
-                         asyncio.set_event_loop(loop)
-                         rank_data = loop.run_until_complete(_get_legacy_rank_data(referrer_email))
-                         loop.close()
-                         
-                         count = rank_data.get("soulsGuided", 0)
-                         username = sheets_client.get_case_insensitive_val(record, "NAME", "FULL NAME", default=referrer_email.split("@")[0])
-                         city = record.get("STATE", record.get("CITY", "Nigeria"))
-                         
-                         if count == 6:
-                             _log_global_broadcast("sage_rank", username, city)
-                         elif count == 16:
-                             _log_global_broadcast("master_rank", username, city)
-                             # Trigger Mastery Email
-                             loop = asyncio.new_event_loop()
-                             asyncio.set_event_loop(loop)
-                             loop.run_until_complete(_send_mastery_email(referrer_email, username))
-                             loop.close()
-                     except Exception as rank_err:
-                         print(f"ERROR in rank-up detection: {rank_err}")
-
-                     break
+            if not sheets_client.claim_milestone(unique_key):
+                return
+
+            try:
+                # Find row index again for update
+                row_idx, record = sheets_client.find_record("Partners", "email", referrer_email, fresh=True)
+                if record:
+                    p_val = sheets_client.get_case_insensitive_val(record, "POINTS", "points")
+                    pts = safe_float(p_val) + 5.0
+                    sheets_client.update_range("Partners", f"E{row_idx}:F{row_idx}", [[pts, pts*100]])
+
+                    # Log Activity
+                    sheets_client.append_row("ActivityLog", [datetime.now().isoformat(), ref_code, "Book Purchase", 5.0, f"Referee: {referee_email}", "", "PENDING"])
+
+                    # Log Milestone
+                    sheets_client.append_row("ReferralMilestones", [datetime.now().isoformat(), referrer_email, referee_email, "book_purchase", 5.0, unique_key])
+
+                    # Rank-Up Detection
+                    # The legacy-rank aggregate has already counted the milestone we just
+                    # appended, so they *just* ranked up if the count is exactly 6 or 16.
+                    import asyncio
+                    try:
+                        ranks = sheets_client.get_view("ReferralMilestones", "legacy_ranks")
+                        count = ranks.count(referrer_email) if ranks is not None else 0
+                        username = sheets_client.get_case_insensitive_val(record, "NAME", "FULL NAME", default=referrer_email.split("@")[0])
+                        city = record.get("STATE", record.get("CITY", "Nigeria"))
+
+                        if count == SAGE_AT:
+                            _log_global_broadcast("sage_rank", username, city)
+                        elif count == MASTER_AT:
+                            _log_global_broadcast("master_rank", username, city)
+                            # Trigger Mastery Email
+                            loop = asyncio.new_event_loop()
+                            asyncio.set_event_loop(loop)
+                            loop.run_until_complete(_send_mastery_email(referrer_email, username))
+                            loop.close()
+                    except Exception as rank_err:
+                        print(f"ERROR in rank-up detection: {rank_err}")
+            finally:
+                sheets_client.release_milestone(unique_key)
+
     except Exception as e:
         print(f"ERROR: Failed to credit purchase milestone: {e}")
 
@@ -1080,28 +1043,26 @@ async def _credit_buyer_cashback(buyer_email: str):
         unique_key = f"{buyer_email.lower().strip()}_cashback_purchase"
         
         # Idempotency
-        milestone_records = sheets_client.get_all_records("ReferralMilestones")
-        for r in milestone_records:
-            if str(r.get("UniqueKey", "")).lower().strip() == unique_key:
-                print(f"DEBUG: Cashback already awarded to {buyer_email}")
-                return
+        if not await sheets_client.aclaim_milestone(unique_key):
+            print(f"DEBUG: Cashback already awarded to {buyer_email}")
+            return
 
-        records = sheets_client.get_all_records("Partners")
-        for i, record in enumerate(records):
-            if str(record.get("USERNAME", "")).lower().strip() == buyer_email.lower().strip():
-                row_idx = i + 2
+        try:
+            row_idx, record = await sheets_client.afind_record("Partners", "email", buyer_email, fresh=True)
+            if record:
                 p_val = sheets_client.get_case_insensitive_val(record, "POINTS", "points")
                 pts = safe_float(p_val) + 1.0
-                sheets_client.update_range("Partners", f"E{row_idx}:F{row_idx}", [[pts, pts*100]])
-                
+                await sheets_client.aupdate_range("Partners", f"E{row_idx}:F{row_idx}", [[pts, pts*100]])
+            
                 # Log Milestone
-                sheets_client.append_row("ReferralMilestones", [datetime.now().isoformat(), "SYSTEM", buyer_email, "cashback_purchase", 1.0, unique_key])
-                
+                await sheets_client.aappend_row("ReferralMilestones", [datetime.now().isoformat(), "SYSTEM", buyer_email, "cashback_purchase", 1.0, unique_key])
+            
                 # Log Activity
                 ref_code = record.get("REFERRAL CODE", "N/A")
-                sheets_client.append_row("ActivityLog", [datetime.now().isoformat(), ref_code, "Cash-Back: Enchiridion Book Purchase", 1.0, f"Buyer: {buyer_email}", "", "PENDING"])
+                await sheets_client.aappend_row("ActivityLog", [datetime.now().isoformat(), ref_code, "Cash-Back: Enchiridion Book Purchase", 1.0, f"Buyer: {buyer_email}", "", "PENDING"])
                 print(f"DEBUG: Successfully awarded 1.0 cashback to {buyer_email}")
-                break
+        finally:
+            sheets_client.release_milestone(unique_key)
     except Exception as e:
         print(f"ERROR: Failed to credit buyer cashback: {e}")
 
@@ -1207,15 +1168,7 @@ async def mark_as_paid(request: MarkAsPaidRequest, user: UserRead = Depends(curr
     
     try:
         # 1. Find the partner in the Partners sheet
-        records = sheets_client.get_all_records("Partners")
-        partner_row_idx = None
-        partner_record = None
-        
-        for i, record in enumerate(records):
-            if str(record.get("USERNAME", "")).lower().strip() == request.email.lower().strip():
-                partner_record = record
-                partner_row_idx = i + 2
-                break
+        partner_row_idx, partner_record = await sheets_client.afind_record("Partners", "email", request.email, fresh=True)
         
         if not partner_record:
             raise HTTPException(status_code=404, detail="Partner not found")
@@ -1238,18 +1191,36 @@ async def mark_as_paid(request: MarkAsPaidRequest, user: UserRead = Depends(curr
         # Col G: Lifetime -> new_lifetime
         # Col I (9th col): Status -> 'COMPLETED'
         
-        print(f"DEBUG: Atomic update for Partners E{partner_row_idx}:G{partner_row_idx} -> [0, 0, {new_lifetime}]")
-        sheets_client.update_range("Partners", f"E{partner_row_idx}:G{partner_row_idx}", [[0.0, 0.0, new_lifetime]])
-        
-        print(f"DEBUG: Updating Status in Column I and Last Payout in Column S for row {partner_row_idx}")
-        # Column I = 9, Column S = 19 (1-indexed)
-        sheets_client.update_cell("Partners", partner_row_idx, 9, "COMPLETED")
-        sheets_client.update_cell("Partners", partner_row_idx, 19, current_revenue)
-
+        # 6. Find this partner's PENDING entries in ActivityLog (through the refCode index,
+        # not a scan of the whole log); their Payout Status goes to COMPLETED in the same
+        # batched write as the Partners update, however many rows the partner has.
+        print(f"DEBUG: Updating pending statuses in ActivityLog for {request.refCode}")
+        started = time.perf_counter()
+        partner_activities = await sheets_client.afind_all_typed("ActivityLog", "referred_by", request.refCode, ACTIVITY)
+        stat_idx = None
+        if partner_activities:
+            stat_idx = column_positions(await sheets_client.aget_headers("ActivityLog"), [("PayoutStatus", "Payout Status")])[0]
+        # Column G (Payout status) is the 7th in [Timestamp, RefCode, Type, Pts, URL, ReportedStatus, Status]
+        target_col = stat_idx + 1 if stat_idx is not None else 7
+        pending_rows = [
+            row_idx for row_idx, act in partner_activities
+            if (act.payout_status if stat_idx is not None else "PENDING").upper() == "PENDING"
+        ]
+        updated_count = len(pending_rows)
 
+        async with sheets_client.unit_of_work():
+            print(f"DEBUG: Atomic update for Partners E{partner_row_idx}:G{partner_row_idx} -> [0, 0, {new_lifetime}]")
+            await sheets_client.aupdate_range("Partners", f"E{partner_row_idx}:G{partner_row_idx}", [[0.0, 0.0, new_lifetime]])
+        
+            print(f"DEBUG: Updating Status in Column I and Last Payout in Column S for row {partner_row_idx}")
+            # Column I = 9, Column S = 19 (1-indexed)
+            await sheets_client.aupdate_cell("Partners", partner_row_idx, 9, "COMPLETED")
+            await sheets_client.aupdate_cell("Partners", partner_row_idx, 19, current_revenue)
 
+            for row_idx in pending_rows:
+                await sheets_client.aupdate_cell("ActivityLog", row_idx, target_col, "COMPLETED")
         
-        # 5. Log the payout in ActivityLog
+        # 7. Log the payout in ActivityLog
         print("DEBUG: Appending payout log to ActivityLog")
         activity_row = [
             datetime.now().isoformat(),
@@ -1261,42 +1232,17 @@ async def mark_as_paid(request: MarkAsPaidRequest, user: UserRead = Depends(curr
             "", # F: REPORTED Status
             "COMPLETED" # G: Payout Status
         ]
-        sheets_client.append_row("ActivityLog", activity_row)
-        
-        # 6. Update Payout Status in ActivityLog for all PENDING entries for this refCode
-        # This is optional but keeps logs consistent
-        print(f"DEBUG: Updating pending statuses in ActivityLog for {request.refCode}")
-        activity_ws = sheets_client.get_worksheet("ActivityLog")
-        all_activities = activity_ws.get_all_values()
-        
-        updated_count = 0
-        if all_activities and len(all_activities) > 1:
-            act_headers = [h.strip().upper() for h in all_activities[0]]
-            def find_idx(targets):
-                for i, h in enumerate(act_headers):
-                    if h in [t.upper() for t in targets]: return i
-                return -1
-            
-            ref_idx = find_idx(["ReferralCode"])
-            stat_idx = find_idx(["PayoutStatus", "Payout status"])
-            
-            for i, row in enumerate(all_activities[1:]):
-                row_idx = i + 2
-                current_ref = row[ref_idx] if ref_idx != -1 and len(row) > ref_idx else ""
-                current_stat = row[stat_idx] if stat_idx != -1 and len(row) > stat_idx else "PENDING"
-                
-                if str(current_ref).strip().lower() == request.refCode.strip().lower() and \
-                   str(current_stat).upper() == "PENDING":
-                    print(f"DEBUG: Updating ActivityLog row {row_idx} to COMPLETED")
-                    # Column I (Payout status) is index 7 in [Timestamp, RefCode, Type, Pts, URL, ReportedStatus, Status]
-                    # Let's find index dynamically or use the fixed 7 since we know it
-                    target_col = stat_idx + 1 if stat_idx != -1 else 7
-                    sheets_client.update_cell("ActivityLog", row_idx, target_col, "COMPLETED")
-                    updated_count += 1
-        print(f"DEBUG: Updated {updated_count} rows in ActivityLog")
+        await sheets_client.aappend_row("ActivityLog", activity_row)
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        print(f"DEBUG: Updated {updated_count} rows in ActivityLog in {elapsed_ms}ms")
 
 
-        return {"success": True, "new_lifetime": new_lifetime}
+        return {
+            "success": True,
+            "new_lifetime": new_lifetime,
+            "activity_rows_updated": updated_count,
+            "activity_update_ms": elapsed_ms
+        }
         
     except Exception as e:
         print(f"ERROR: Failed to mark as paid: {e}")
@@ -1323,64 +1269,41 @@ async def generate_monthly_csv(
         # Display name for the file
         month_name = datetime(target_year, target_month, 1).strftime("%B")
         
-        # 2. Fetch data (Gspread robust way)
-        activity_ws = sheets_client.get_worksheet("ActivityLog")
-        all_activities = activity_ws.get_all_values()
-        partner_records = sheets_client.get_all_records("Partners")
-        
-        if not all_activities or len(all_activities) < 2:
-            print("DEBUG: ActivityLog is empty or only contains headers")
-            return Response(content="Date,Event Type,Partner Name,Points Awarded,Revenue Equivalent (Naira NGN)\n", media_type="text/csv")
-
-        # Map headers manually for robustness
-        act_headers = [h.strip().upper() for h in all_activities[0]]
-        
-        def find_act_idx(targets: list):
-            for i, h in enumerate(act_headers):
-                if h in [t.upper() for t in targets]: return i
-            return -1
-
-        ts_idx = find_act_idx(["Timestamp"])
-        ref_idx = find_act_idx(["ReferralCode", "RefCode"])
-        type_idx = find_act_idx(["ActivityType", "Type"])
-        pts_idx = find_act_idx(["Points", "Pts"])
-
-        # 3. Build Partner Name Map (RefCode -> Name)
+        # 2. Partner names (RefCode -> Name), two columns only
         name_map = {}
-        for p in partner_records:
-            ref = str(p.get("REFERRAL CODE", "")).strip().lower()
-            name = p.get("FULL NAME", p.get("C: FULL NAME", p.get("USERNAME", "Unknown")))
-            name_map[ref] = name
-            
-        # 4. Filter and process logs
+        partner_columns = ("REFERRAL CODE", ("FULL NAME", "C: FULL NAME", "USERNAME"))
+        for ref, name in await sheets_client.aget_columns("Partners", *partner_columns):
+            name_map[ref.strip().lower()] = name
+
+        # 3. Stream the log in blocks, reading just the columns the report uses
         report_rows = []
-        for row in all_activities[1:]: # Skip header
-             if ts_idx == -1 or len(row) <= ts_idx: continue
-             
-             ts_str = row[ts_idx]
-             if not ts_str: continue
-             
-             try:
-                # Use date_parser for flexibility
-                ts = date_parser.parse(ts_str)
-                if ts.month == target_month and ts.year == target_year:
-                    ref_code = str(row[ref_idx]).strip().lower() if ref_idx != -1 and len(row) > ref_idx else ""
-                    type_str = row[type_idx] if type_idx != -1 and len(row) > type_idx else "Unknown"
-                    points_str = row[pts_idx] if pts_idx != -1 and len(row) > pts_idx else "0"
-                    points = float(str(points_str).replace(",", "").strip() or 0)
-                    
-                    report_rows.append({
-                        "Date": ts.strftime("%Y-%m-%d"),
-                        "Event Type": type_str,
-                        "Partner Name": name_map.get(ref_code, f"Code: {ref_code}"),
-                        "Points Awarded": points,
-                        "Revenue Equivalent (Naira NGN)": points * 100
-                    })
-             except Exception as e:
-                print(f"DEBUG: Skipping row due to parse error: {e}")
-                continue
-                
-        # 5. Generate CSV
+        activity_columns = ("Timestamp", ("ReferralCode", "RefCode", "REFERRED_BY"), ("ActivityType", "Type"), ("Points", "Pts"))
+        async for chunk in sheets_client.aiter_chunks("ActivityLog", *activity_columns):
+            for ts_str, ref_code, type_str, points_str in chunk:
+                if not ts_str: continue
+
+                try:
+                    # Use date_parser for flexibility
+                    ts = date_parser.parse(ts_str)
+                    if ts.month == target_month and ts.year == target_year:
+                        ref_code = ref_code.strip().lower()
+                        points = float(str(points_str).replace(",", "").strip() or 0)
+
+                        report_rows.append({
+                            "Date": ts.strftime("%Y-%m-%d"),
+                            "Event Type": type_str or "Unknown",
+                            "Partner Name": name_map.get(ref_code, f"Code: {ref_code}"),
+                            "Points Awarded": points,
+                            "Revenue Equivalent (Naira NGN)": points * 100
+                        })
+                except Exception as e:
+                    print(f"DEBUG: Skipping row due to parse error: {e}")
+                    continue
+
+        if not report_rows:
+            print(f"DEBUG: No ActivityLog rows for {month_name} {target_year}")
+
+        # 4. Generate CSV
         output = io.StringIO()
         fieldnames = ["Date", "Event Type", "Partner Name", "Points Awarded", "Revenue Equivalent (Naira NGN)"]
         writer = csv.DictWriter(output, fieldnames=fieldnames)
@@ -1411,14 +1334,7 @@ async def revert_payout(request: MarkAsPaidRequest, user=Depends(current_active_
     """
     try:
         email = request.email.strip().lower()
-        records = sheets_client.get_all_records("Partners")
-        user_record = None
-        row_idx = None
-        for i, r in enumerate(records):
-            if str(r.get("USERNAME", "")).lower().strip() == email:
-                user_record = r
-                row_idx = i + 2
-                break
+        row_idx, user_record = await sheets_client.afind_record("Partners", "email", email, fresh=True)
         
         if not user_record or not row_idx:
             raise HTTPException(status_code=404, detail="User not found")
@@ -1426,8 +1342,8 @@ async def revert_payout(request: MarkAsPaidRequest, user=Depends(current_active_
         # Get values for reversal
         # We use explicit index 18 (Column S) for the last payout amount to avoid "full lifetime reversion"
         # We need to fetch the row values directly to ensure we get Column S even if header is missing
-        ws = sheets_client.get_worksheet("Partners")
-        row_values = ws.row_values(row_idx)
+        ws = await sheets_client.aget_worksheet("Partners")
+        row_values = await sheets_client.arun(ws.row_values, row_idx)
         
         revert_amount = 0.0
         if len(row_values) > 18:
@@ -1467,11 +1383,12 @@ async def revert_payout(request: MarkAsPaidRequest, user=Depends(current_active_
         restored_points = round(actual_revert_amount / 100.0, 2)
         
         # Atomic update (E:I): E=Points, F=Revenue, G=Lifetime(new), H=Referrals(keep), I=Status(PENDING)
-        sheets_client.update_range("Partners", f"E{row_idx}:I{row_idx}", 
-                                   [[restored_points, restored_revenue, new_lifetime, user_record.get("TOTAL REFERRALS", 0), "PENDING"]])
+        async with sheets_client.unit_of_work():
+            await sheets_client.aupdate_range("Partners", f"E{row_idx}:I{row_idx}", 
+                                       [[restored_points, restored_revenue, new_lifetime, user_record.get("TOTAL REFERRALS", 0), "PENDING"]])
                                    
-        # Reset Column S to 0 (1-indexed = 19)
-        sheets_client.update_cell("Partners", row_idx, 19, 0.0)
+            # Reset Column S to 0 (1-indexed = 19)
+            await sheets_client.aupdate_cell("Partners", row_idx, 19, 0.0)
 
                                    
         # Log the revert
@@ -1484,7 +1401,7 @@ async def revert_payout(request: MarkAsPaidRequest, user=Depends(current_active_
             "", # F: Reported status
             "PENDING" # G: New status
         ]
-        sheets_client.append_row("ActivityLog", activity_row)
+        await sheets_client.aappend_row("ActivityLog", activity_row)
         
         return {
             "success": True,
@@ -1498,7 +1415,7 @@ async def revert_payout(request: MarkAsPaidRequest, user=Depends(current_active_
 async def get_shipping_rates():
     """Fetch shipping rates and hub status from the 'Delivery Pricing' sheet."""
     try:
-        records = sheets_client.get_all_records("Delivery Pricing")
+        records = await sheets_client.aget_all_records("Delivery Pricing")
         # Normalize keys to match what frontend expects
         normalized = []
         for r in records:
@@ -1521,45 +1438,37 @@ async def get_shipping_rates():
 @router.get("/stats")
 async def get_stats(user: UserRead = Depends(current_active_user)):
     # 1. Fetch user record from Partners sheet
-    records = sheets_client.get_all_records("Partners")
+    # Partners, ActivityLog and ReferralMilestones are read in one batched call;
+    # the lookups below are then served from the cached snapshots' indexes.
     target_email = user.email.lower().strip()
-    partner_record = None
-    
-    for record in records:
-        record_email = str(record.get("USERNAME", record.get("Email Address", ""))).lower().strip()
-        if record_email == target_email:
-            partner_record = record
-            break
+    await sheets_client.aget_many_typed({"Partners": PARTNER, "ActivityLog": ACTIVITY, "ReferralMilestones": MILESTONE})
+    _, partner = await sheets_client.afind_typed("Partners", "email", target_email, PARTNER)
             
-    if not partner_record:
+    if not partner:
         raise HTTPException(status_code=404, detail="Stats not found")
 
-    partner_code = sheets_client.get_case_insensitive_val(partner_record, "REFERRAL CODE", "ReferralCode", default="")
+    partner_code = partner.referral_code
+    code = partner_code.lower()
     
-    # 2. Fetch Detailed Activity and Milestones
-    activity_records = sheets_client.get_all_records("ActivityLog")
-    milestone_records = sheets_client.get_all_records("ReferralMilestones")
+    # 2. Fetch Detailed Activity and Milestones: only this partner's rows, via the
+    # secondary indexes on the (now cached) sheets
+    activity_records = await sheets_client.afind_all_typed("ActivityLog", "referred_by", code, ACTIVITY)
+    milestone_records = await sheets_client.afind_all_typed("ReferralMilestones", "referrer_email", target_email, MILESTONE)
     
     # 3. Calculate Pending Points (Registration but not verified)
-    pending_count = 0
-    for act in activity_records:
-        if str(act.get("REFERRED_BY", "")).lower().strip() == partner_code.lower().strip():
-            status = str(act.get("Payout Status", "")).strip()
-            if status == "PENDING_VERIFICATION":
-                pending_count += 1
-    
-    pending_points = round(pending_count * 0.1, 2)
+    pending = [act for _, act in activity_records if act.payout_status == "PENDING_VERIFICATION"]
+    pending_points = round(len(pending) * 0.1, 2)
 
     # 4. Fetch Milestones for this partner
-    user_milestones = []
-    for m in milestone_records:
-        if str(m.get("ReferrerEmail", "")).lower().strip() == target_email:
-            user_milestones.append({
-                "referee": m.get("RefereeEmail", ""),
-                "type": m.get("MilestoneType", ""),
-                "points": safe_float(m.get("PointsAwarded", 0)),
-                "timestamp": m.get("Timestamp", "")
-            })
+    user_milestones = [
+        {
+            "referee": m.referee_email,
+            "type": m.type,
+            "points": m.points,
+            "timestamp": m.timestamp
+        }
+        for _, m in milestone_records
+    ]
 
     # 5. Calculate Network Spread (Tier-2)
     network_spread_count = sum(1 for m in user_milestones if m["type"] == "network_spread")
@@ -1574,19 +1483,17 @@ async def get_stats(user: UserRead = Depends(current_active_user)):
         referee_map[email]["milestones"].append(m["type"])
 
     # Second, add those who are pending verification (don't have 'partner' milestone yet)
-    for act in activity_records:
-        if str(act.get("REFERRED_BY", "")).lower().strip() == partner_code.lower().strip():
-            if str(act.get("Payout Status", "")) == "PENDING_VERIFICATION":
-                desc = str(act.get("DESCRIPTION", ""))
-                email = desc.split(": ")[-1].strip() if ": " in desc else None
-                if email and email not in referee_map:
-                    referee_map[email] = {"email": email, "milestones": [], "is_pending": True}
+    for act in pending:
+        desc = act.description
+        email = desc.split(": ")[-1].strip() if ": " in desc else None
+        if email and email not in referee_map:
+            referee_map[email] = {"email": email, "milestones": [], "is_pending": True}
 
     # 7. Aggregate stats
-    points = safe_float(sheets_client.get_case_insensitive_val(partner_record, "POINTS", "points", default=0.0))
-    revenue = safe_float(sheets_client.get_case_insensitive_val(partner_record, "REVENUE (\u20a6)", "REVENUE", default=0.0))
-    total_referrals = int(safe_float(sheets_client.get_case_insensitive_val(partner_record, "TOTAL REFERRALS", default=0.0)))
-    lifetime_earnings = safe_float(sheets_client.get_case_insensitive_val(partner_record, "LIFETIME EARNINGS", default=0.0))
+    points = partner.points
+    revenue = partner.revenue
+    total_referrals = partner.total_referrals
+    lifetime_earnings = partner.lifetime_earnings
 
     # 8. Legacy Rank Logic
     rank_data = await _get_legacy_rank_data(target_email)
@@ -1601,9 +1508,9 @@ async def get_stats(user: UserRead = Depends(current_active_user)):
         "milestones": user_milestones,
         "networkSpreadCount": network_spread_count,
         "refereeProgress": list(referee_map.values()),
-        "bankName": partner_record.get("BANK NAME", ""),
-        "accountName": partner_record.get("ACCOUNT NAME", ""),
-        "accountNumber": partner_record.get("ACCOUNT NUMBER", ""),
+        "bankName": partner.bank_name,
+        "accountName": partner.account_name,
+        "accountNumber": partner.account_number,
         "legacyRank": rank_data["rank"],
         "soulsGuided": rank_data["soulsGuided"],
         "masteryDate": rank_data["masteryDate"]
@@ -1613,34 +1520,33 @@ async def get_stats(user: UserRead = Depends(current_active_user)):
 async def get_enchiridion_masters():
     """Fetches all users with the 'Master' legacy rank for the gallery."""
     try:
-        milestones = sheets_client.get_all_records("ReferralMilestones")
-        partners = sheets_client.get_all_records("Partners")
-        
-        # Count book referrals per user
-        book_counts = {}
-        attainment_dates = {}
-        for m in milestones:
-            if str(m.get("MilestoneType", "")).lower().strip() == "book_purchase":
-                ref_email = str(m.get("ReferrerEmail", "")).lower().strip()
-                book_counts[ref_email] = book_counts.get(ref_email, 0) + 1
-                if book_counts[ref_email] == 16:
-                    attainment_dates[ref_email] = m.get("Timestamp")
-        
-        master_emails = [email for email, count in book_counts.items() if count >= 16]
-        
+        # One batched read of both sheets (typed rows are what the views decode anyway);
+        # the aggregate and the partner lookups below are then served from the cache
+        await sheets_client.aget_many_typed({"ReferralMilestones": MILESTONE, "Partners": PARTNER})
+        ranks = await sheets_client.aget_view("ReferralMilestones", "legacy_ranks")
+        if ranks is None:
+            return []
+
+        # Only the Masters' partner rows are needed: look them up by email, keep sheet order
+        masters = []
+        for email in ranks.masters():
+            row_idx, p = await sheets_client.afind_record("Partners", "email", email)
+            if p:
+                masters.append((row_idx, email, p))
+        masters.sort(key=lambda m: m[0])
+
         masters_gallery = []
-        for p in partners:
-            email = str(p.get("USERNAME", "")).lower().strip()
-            if email in master_emails:
-                name = p.get("FULL NAME", p.get("NAME", "Master"))
-                city = p.get("CITY", p.get("LOCATION", "Nigeria"))
-                masters_gallery.append({
-                    "username": name,
-                    "soulsGuided": book_counts[email],
-                    "masteryDate": attainment_dates.get(email),
-                    "city": city,
-                    "avatar": f"https://ui-avatars.com/api/?name={name.replace(' ', '+')}&background=D4AF37&color=fff"
-                })
+        for _, email, p in masters:
+            rank = ranks.get(email)
+            name = p.get("FULL NAME", p.get("NAME", "Master"))
+            city = p.get("CITY", p.get("LOCATION", "Nigeria"))
+            masters_gallery.append({
+                "username": name,
+                "soulsGuided": rank.souls_guided,
+                "masteryDate": rank.mastery_date,
+                "city": city,
+                "avatar": f"https://ui-avatars.com/api/?name={name.replace(' ', '+')}&background=D4AF37&color=fff"
+            })
         
         return masters_gallery
     except Exception as e:
@@ -1650,27 +1556,17 @@ async def get_enchiridion_masters():
 @router.post("/update-payout")
 async def update_payout(settings: PayoutSettings, user: UserRead = Depends(current_active_user)):
     print(f"DEBUG: Updating payout for {user.email}")
-    # Find matching row in Partners sheet by USERNAME (Column 1)
-    cell = sheets_client.find_cell("Partners", user.email, column=1)
-    if not cell:
-        # Fallback to search all records if find_cell fails due to case/formatting
-        records = sheets_client.get_all_records("Partners")
-        row_idx = None
-        for i, r in enumerate(records):
-            if str(r.get("USERNAME", "")).lower().strip() == user.email.lower().strip():
-                row_idx = i + 2 # 1-indexed + header
-                break
-        
-        if not row_idx:
-            raise HTTPException(status_code=404, detail="User record not found in Partners sheet")
-    else:
-        row_idx = cell.row
+    # Find matching row in Partners sheet by USERNAME (Column 1), case-insensitively
+    row_idx = await sheets_client.afind_row("Partners", "email", user.email)
+    if not row_idx:
+        raise HTTPException(status_code=404, detail="User record not found in Partners sheet")
 
     try:
         # Update Columns: J: BANK NAME (10), K: ACCOUNT NAME (11), L: ACCOUNT NUMBER (12)
-        sheets_client.update_cell("Partners", row_idx, 10, settings.bankName)
-        sheets_client.update_cell("Partners", row_idx, 11, settings.accountName)
-        sheets_client.update_cell("Partners", row_idx, 12, settings.accountNumber)
+        async with sheets_client.unit_of_work():
+            await sheets_client.aupdate_cell("Partners", row_idx, 10, settings.bankName)
+            await sheets_client.aupdate_cell("Partners", row_idx, 11, settings.accountName)
+            await sheets_client.aupdate_cell("Partners", row_idx, 12, settings.accountNumber)
 
         print(f"DEBUG: Successfully updated payout details for {user.email} at row {row_idx}")
         return {"success": True}
@@ -1678,103 +1574,52 @@ async def update_payout(settings: PayoutSettings, user: UserRead = Depends(curre
         print(f"DEBUG: Failed to update payout details: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to save payout details: {e}")
 
+@background_priority
+def _reconcile_leaderboard():
+    """Rebuilds the in-memory leaderboard from a fresh read of Partners."""
+    try:
+        sheets_client.get_view("Partners", "leaderboard")
+    except Exception as e:
+        print(f"ERROR: Leaderboard reconciliation failed: {e}")
+    finally:
+        sheets_client.leaderboard.release_reconcile()
+
+async def _current_leaderboard(background_tasks: BackgroundTasks):
+    """
+    The in-memory leaderboard; only its first build waits on the sheet. A board that is
+    due for reconciliation is served as is while a background task re-reads Partners.
+    """
+    board = sheets_client.leaderboard
+    if board.built_at is None:
+        print("DEBUG: Building leaderboard from Partners")
+        await sheets_client.aget_view("Partners", "leaderboard")
+    elif board.claim_reconcile():
+        background_tasks.add_task(_reconcile_leaderboard)
+    return board
+
 @router.get("/leaderboard")
-async def get_leaderboard():
-    """Returns a sorted list of top referral partners with privacy-filtered names."""
+async def get_leaderboard(background_tasks: BackgroundTasks):
+    """Returns the top 50 referral partners with privacy-filtered names."""
     try:
-        print("DEBUG: Leaderboard endpoint called")
-        records = sheets_client.get_all_records("Partners")
-        print(f"DEBUG: Fetched {len(records)} records for leaderboard")
+        board = await _current_leaderboard(background_tasks)
     except Exception as e:
         print(f"ERROR: Failed to fetch records: {e}")
         return []
-    
-    def safe_float(val):
-        if val is None:
-            return 0.0
-        # Convert to string and strip spaces, currency symbols, and commas
-        s_val = str(val).strip().replace("₦", "").replace(",", "").replace("$", "")
-        if s_val == "":
-            return 0.0
-        try:
-            return float(s_val)
-        except (ValueError, TypeError):
-            return 0.0
+    return board.top(50)
 
-    leaderboard_data = []
-    for i, record in enumerate(records):
-        try:
-            if i == 0:
-                print(f"DEBUG: First record keys: {list(record.keys())}")
-            
-            # Flexible matching for common fields
-            name_val = sheets_client.get_case_insensitive_val(record, "FULL NAME", "Name", "NAME", "C: FULL NAME")
-            
-            name = str(name_val).strip() if name_val else "Anonymous Partner"
-            
-            points_val = sheets_client.get_case_insensitive_val(record, "POINTS", default=0.0)
-            revenue_val = sheets_client.get_case_insensitive_val(record, "REVENUE (₦)", "REVENUE", default=0.0)
-            
-            points = safe_float(points_val)
-            revenue = safe_float(revenue_val)
-            
-            email = str(sheets_client.get_case_insensitive_val(record, "USERNAME", "Email", default="")).lower().strip()
-            
-            # Ensure they tally based on 1 pt = 100 naira conversion
-            if points > 0 and revenue == 0:
-                revenue = points * 100
-            elif revenue > 0 and points == 0:
-                points = revenue / 100
-
-            lifetime_earnings = safe_float(sheets_client.get_case_insensitive_val(record, "LIFETIME_EARNINGS", "LIFETIME EARNINGS", "Lifetime Earnings", default=0.0))
-
-            # Privacy Filter: "B. McLoughlin" instead of "Brendan McLoughlin"
-            filtered_name = name
-            if name and name != "Anonymous Partner":
-                parts = name.split()
-                if len(parts) > 1:
-                    filtered_name = f"{parts[0][0]}. {' '.join(parts[1:])}"
-
-            leaderboard_data.append({
-                "name": filtered_name,
-                "points": points,
-                "revenue": revenue,
-                "lifetimeEarnings": lifetime_earnings,
-                "email": email
-            })
-        except Exception as e:
-            print(f"DEBUG: Error processing record {i}: {e}")
-            import traceback
-            traceback.print_exc()
-            continue
-
-    # Sort by points descending
-    leaderboard_data.sort(key=lambda x: x["points"], reverse=True)
-    print(f"DEBUG: Processed {len(leaderboard_data)} valid records for leaderboard")
-
-    # Assign rank and impact badges
-    final_leaderboard = []
-    for i, entry in enumerate(leaderboard_data):
-        rank = i + 1
-        
-        # Impact Badge Logic
-        impact = "Rising Star"
-        if rank == 1: impact = "Elite Partner"
-        elif rank <= 3: impact = "Platinum Partner"
-        elif rank <= 10: impact = "Gold Partner"
-        elif rank <= 25: impact = "Silver Partner"
-        
-        final_leaderboard.append({
-            "rank": rank,
-            "name": entry["name"],
-            "points": entry["points"],
-            "revenue": entry["revenue"],
-            "lifetimeEarnings": entry["lifetimeEarnings"],
-            "impact": impact,
-            "email": entry["email"]
-        })
-
-    return final_leaderboard[:50] # Return top 50
+@router.get("/rank")
+async def get_rank(background_tasks: BackgroundTasks, neighbours: int = 2, user: UserRead = Depends(current_active_user)):
+    """Returns the signed-in partner's leaderboard rank, percentile and the partners around them."""
+    neighbours = max(0, min(neighbours, 10))
+    try:
+        board = await _current_leaderboard(background_tasks)
+    except Exception as e:
+        print(f"ERROR: Failed to load leaderboard for rank lookup: {e}")
+        raise HTTPException(status_code=503, detail="Leaderboard unavailable")
+    rank = board.rank_of(user.email, neighbours)
+    if rank is None:
+        raise HTTPException(status_code=404, detail="Partner not on the leaderboard")
+    return rank
 
 class MilestoneRequest(BaseModel):
     refCode: str
@@ -1792,16 +1637,7 @@ async def apply_milestone(request: MilestoneRequest, user: UserRead = Depends(cu
         bonus_type = "Power Partner Achievement" if tier == 50 else "Elite Ambassador Achievement"
         
         # 1. Find user in Partners sheet
-        records = sheets_client.get_all_records("Partners")
-        partner_row_idx = None
-        partner_record = None
-        for i, record in enumerate(records):
-            # Match using case-insensitive email/username
-            record_email = str(record.get("USERNAME", record.get("Email Address", ""))).lower().strip()
-            if record_email == user.email.lower().strip():
-                partner_record = record
-                partner_row_idx = i + 2
-                break
+        partner_row_idx, partner_record = await sheets_client.afind_record("Partners", "email", user.email, fresh=True)
         
         if not partner_record:
             raise HTTPException(status_code=404, detail="Partner not found in records")
@@ -1822,9 +1658,9 @@ async def apply_milestone(request: MilestoneRequest, user: UserRead = Depends(cu
         # 3. Check Audit Logs for Idempotency (Prevent double-crediting)
         activity_type = "ELITE STATUS UNLOCKED" if tier == 100 else bonus_type
         try:
-            audit_ws = sheets_client.sheet.worksheet("Admin Audit")
+            audit_ws = await sheets_client.aget_worksheet("Admin Audit")
             # Use get_all_records which handles headers/formatting
-            audit_records = sheets_client.get_all_records("Admin Audit")
+            audit_records = await sheets_client.aget_all_records("Admin Audit")
             duplicate = False
             for audit in audit_records:
                 if str(audit.get("Details", "")).find(f"{user.email}") != -1 and \
@@ -1841,23 +1677,24 @@ async def apply_milestone(request: MilestoneRequest, user: UserRead = Depends(cu
 
         # 4. Update Balance
         current_points = safe_float(partner_record.get("POINTS", 0.0))
-        current_revenue = safe_float(get_case_insensitive(partner_record, "REVENUE (₦)", "Revenue", default=0.0))
+        current_revenue = safe_float(sheets_client.get_case_insensitive_val(partner_record, "REVENUE (₦)", "Revenue", default=0.0))
         
         new_points = round(current_points + (bonus_amount / 100.0), 2)
         new_revenue = round(current_revenue + bonus_amount, 2)
         
         # Update sheet (Col E, F) and Status (Col I)
-        sheets_client.update_range("Partners", f"E{partner_row_idx}:F{partner_row_idx}", [[new_points, new_revenue]])
+        async with sheets_client.unit_of_work():
+            await sheets_client.aupdate_range("Partners", f"E{partner_row_idx}:F{partner_row_idx}", [[new_points, new_revenue]])
         
-        # Try to find 'Payout Status' column
-        sheets_client.update_cell("Partners", partner_row_idx, 9, "PENDING") # Column I is usually Status
+            # Try to find 'Payout Status' column
+            await sheets_client.aupdate_cell("Partners", partner_row_idx, 9, "PENDING") # Column I is usually Status
 
-        if tier == 50:
-            # Update Milestone 1 status logic (Column V / Index 22)
-            sheets_client.update_cell("Partners", partner_row_idx, 22, "CLAIMED")
-        elif tier == 100:
-            # Update Milestone 2 status logic (Column W / Index 23)
-            sheets_client.update_cell("Partners", partner_row_idx, 23, "CLAIMED")
+            if tier == 50:
+                # Update Milestone 1 status logic (Column V / Index 22)
+                await sheets_client.aupdate_cell("Partners", partner_row_idx, 22, "CLAIMED")
+            elif tier == 100:
+                # Update Milestone 2 status logic (Column W / Index 23)
+                await sheets_client.aupdate_cell("Partners", partner_row_idx, 23, "CLAIMED")
 
         # 5. Log in Admin Audit
         from datetime import datetime
@@ -1874,7 +1711,7 @@ async def apply_milestone(request: MilestoneRequest, user: UserRead = Depends(cu
             "SUCCESS",
             f"Tier {tier} Milestone fulfilled."
         ]
-        sheets_client.append_row("Admin Audit", log_row)
+        await sheets_client.aappend_row("Admin Audit", log_row)
 
         return {"success": True, "bonus": bonus_amount, "new_total": new_revenue}
 
@@ -1904,9 +1741,9 @@ async def process_distributor_lead(
     row = [timestamp, lead.name, lead.phone, lead.whatsapp, lead.location, effective_ref_code or ""]
     
     # Ensure worksheet has headers if it's new or misaligned
-    sheets_client.get_or_create_worksheet("Distributor Leads", ["Timestamp", "Name", "Phone Number", "Whatsapp Number", "Location", "RefCode"])
+    await sheets_client.aget_or_create_worksheet("Distributor Leads", ["Timestamp", "Name", "Phone Number", "Whatsapp Number", "Location", "RefCode"])
     
-    background_tasks.add_task(sheets_client.append_row, "Distributor Leads", row)
+    background_tasks.add_task(background_priority(sheets_client.append_row), "Distributor Leads", row)
     
     # NEW: Sync status and awards in background
     if effective_ref_code:
@@ -1914,6 +1751,7 @@ async def process_distributor_lead(
         
     return {"success": True}
 
+@background_priority
 async def _sync_distributor_status(ref_code: str, name: str):
     """
     Finds the user email for a ref code and marks 'IsDistributor' as TRUE.
@@ -1922,22 +1760,17 @@ async def _sync_distributor_status(ref_code: str, name: str):
     print(f"DEBUG: Starting distributor status sync for refCode: {ref_code}")
     try:
         # 1. Resolve Email from RefCode via Partners sheet
-        records = sheets_client.get_all_records("Partners")
-        target_email = None
-        for r in records:
-            r_code = sheets_client.get_case_insensitive_val(r, "REFERRAL CODE", "ReferralCode", "referral_code")
-            if str(r_code or "").strip().lower() == ref_code.strip().lower():
-                target_email = str(r.get("USERNAME", "")).lower().strip()
-                break
+        _, partner = await sheets_client.afind_record("Partners", "referral_code", ref_code)
+        target_email = str(partner.get("USERNAME", "")).lower().strip() if partner else None
         
         if not target_email:
-            print(f"WARNING: Could not resolve email for refCode {ref_code} during distributor sync. Records checked: {len(records)}")
+            print(f"WARNING: Could not resolve email for refCode {ref_code} during distributor sync.")
             return
 
         print(f"DEBUG: Resolved email {target_email} for refCode {ref_code}. Checking UserOnboarding...")
 
         # 2. Update UserOnboarding
-        o_records = sheets_client.get_all_records("UserOnboarding")
+        o_records = await sheets_client.aget_all_records("UserOnboarding")
         row_idx = None
         for i, r in enumerate(o_records):
             if str(r.get("Email", "")).lower().strip() == target_email:
@@ -1951,11 +1784,12 @@ async def _sync_distributor_status(ref_code: str, name: str):
         
         if row_idx:
             print(f"DEBUG: Updating UserOnboarding row {row_idx} column 4 for {target_email}...")
-            sheets_client.update_cell("UserOnboarding", row_idx, 4, "TRUE")
-            sheets_client.update_cell("UserOnboarding", row_idx, 6, datetime.now().isoformat())
+            async with sheets_client.unit_of_work():
+                await sheets_client.aupdate_cell("UserOnboarding", row_idx, 4, "TRUE")
+                await sheets_client.aupdate_cell("UserOnboarding", row_idx, 6, datetime.now().isoformat())
             
             # Ensure ReferralMilestones sheet exists
-            sheets_client.get_or_create_worksheet("ReferralMilestones", ["Timestamp", "ReferrerEmail", "RefereeEmail", "MilestoneType", "PointsAwarded", "UniqueKey"])
+            await sheets_client.aget_or_create_worksheet("ReferralMilestones", ["Timestamp", "ReferrerEmail", "RefereeEmail", "MilestoneType", "PointsAwarded", "UniqueKey"])
             
             # 3. Award Referrer
             print(f"DEBUG: Triggering onboarding reward for {target_email} (distributor)...")
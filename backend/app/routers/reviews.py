@@ -11,7 +11,7 @@ router = APIRouter()
 @router.get("/", response_model=List[Review])
 async def get_reviews(admin: bool = Query(False)):
     try:
-        records = sheets_client.get_all_records("Reviews")
+        records = await sheets_client.aget_all_records("Reviews")
         reviews = []
         for record in records:
             try:
@@ -73,7 +73,7 @@ async def submit_review(review: ReviewCreate):
         created_at,
         ""
     ]
-    sheets_client.append_row("Reviews", row)
+    await sheets_client.aappend_row("Reviews", row)
     return {"message": "Review submitted successfully and is pending approval.", "id": new_id}
 
 @router.put("/{review_id}")
@@ -86,12 +86,12 @@ async def moderate_review(
     # Find review by ID and update status
     # This is a bit complex with gspread without direct row lookup by ID
     # For MVP, we'll use find_cell
-    cell = sheets_client.find_cell("Reviews", review_id, 1) # Column 1 is id
+    cell = await sheets_client.afind_cell("Reviews", review_id, 1) # Column 1 is id
     if not cell:
         raise HTTPException(status_code=404, detail="Review not found")
     
-    sheets_client.update_cell("Reviews", cell.row, 7, status) # Column 7 is Status
+    await sheets_client.aupdate_cell("Reviews", cell.row, 7, status) # Column 7 is Status
     if status == "approved":
-        sheets_client.update_cell("Reviews", cell.row, 9, datetime.now().isoformat()) # Column 9 is ApprovedAt
+        await sheets_client.aupdate_cell("Reviews", cell.row, 9, datetime.now().isoformat()) # Column 9 is ApprovedAt
         
     return {"message": f"Review {status} successfully"}
@@ -0,0 +1,172 @@
+import collections
+from datetime import datetime
+from typing import Callable, List, Optional, Sequence, Union
+
+from dateutil import parser as date_parser
+
+# A projected column: a header name, or alternative names where the first present one wins
+Column = Union[str, Sequence[str]]
+
+# Header aliases used to key the default Partners indexes
+PARTNER_EMAIL_KEYS = ("USERNAME", "Email", "Email Address", "emailaddress")
+PARTNER_CODE_KEYS = ("REFERRAL CODE", "ReferralCode", "referral_code", "REFERRAL_CODE")
+
+
+def column_positions(headers: List[str], columns: Sequence[Column]) -> List[Optional[int]]:
+    """0-based position of each column in the header row (None when it is missing)."""
+    normalized = [str(h).strip().lower() for h in headers]
+    positions = []
+    for column in columns:
+        aliases = (column,) if isinstance(column, str) else column
+        matches = (normalized.index(a.strip().lower()) for a in aliases if a.strip().lower() in normalized)
+        positions.append(next(matches, None))
+    return positions
+
+
+def safe_float(v):
+    """Robust conversion of sheet values (strings/None/numbers) to float."""
+    if v is None:
+        return 0.0
+    if isinstance(v, (int, float)):
+        return float(v)
+
+    # Clean string: remove currency symbols, commas, and whitespace
+    clean_v = str(v).replace("NGN", "").replace("₦", "").replace(",", "").replace("$", "").replace("N", "").strip()
+
+    if not clean_v:
+        return 0.0
+    try:
+        return float(clean_v)
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def text(value) -> str:
+    return str(value).strip()
+
+
+def lower_text(value) -> str:
+    return str(value).strip().lower()
+
+
+def flag(value) -> bool:
+    return str(value).strip().upper() == "TRUE"
+
+
+def whole_number(value) -> int:
+    return int(safe_float(value))
+
+
+def timestamp(value) -> Optional[datetime]:
+    """ISO timestamps (what we write) parse fast; anything else goes through dateutil."""
+    value = str(value).strip()
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        pass
+    try:
+        return date_parser.parse(value)
+    except (ValueError, OverflowError):
+        return None
+
+
+class Field:
+    """One attribute of a typed row: the headers it may be stored under and how to parse it."""
+
+    __slots__ = ("name", "aliases", "parse", "missing")
+
+    def __init__(self, name: str, *aliases: str, parse: Callable = text):
+        self.name = name
+        self.aliases = aliases or (name,)
+        self.parse = parse
+        # Value for a cell past the end of the row or a column the sheet does not have
+        self.missing = parse("")
+
+
+class Schema:
+    """
+    Typed rows for one worksheet. Header aliases are resolved to column positions once
+    per header row (see compile), and each row decodes into a namedtuple with parsed
+    values, so hot loops read p.points instead of searching a dict per field.
+    """
+
+    def __init__(self, name: str, *fields: Field):
+        self.name = name
+        self.fields = fields
+        self.row_type = collections.namedtuple(name, [f.name for f in fields])
+
+    def compile(self, headers: List[str]) -> "CompiledSchema":
+        return CompiledSchema(self, headers)
+
+    def __repr__(self):
+        return f"Schema({self.name})"
+
+
+class CompiledSchema:
+    """A schema bound to one header row: decodes raw rows by position."""
+
+    __slots__ = ("schema", "positions", "_plan", "_make")
+
+    def __init__(self, schema: Schema, headers: List[str]):
+        self.schema = schema
+        self.positions = column_positions(headers, [f.aliases for f in schema.fields])
+        self._plan = [(p, f.parse, f.missing) for p, f in zip(self.positions, schema.fields)]
+        self._make = schema.row_type._make
+
+    def decode(self, row: List):
+        n = len(row)
+        return self._make([parse(row[p]) if p is not None and p < n else missing for p, parse, missing in self._plan])
+
+
+PARTNER = Schema(
+    "Partner",
+    Field("email", *PARTNER_EMAIL_KEYS, parse=lower_text),
+    Field("name", "FULL NAME", "Name", "NAME", "C: FULL NAME"),
+    Field("referral_code", *PARTNER_CODE_KEYS),
+    Field("points", "POINTS", "Pts", parse=safe_float),
+    Field("revenue", "REVENUE (₦)", "REVENUE", "Revenue", parse=safe_float),
+    Field("lifetime_earnings", "LIFETIME_EARNINGS", "LIFETIME EARNINGS", parse=safe_float),
+    Field("total_referrals", "TOTAL REFERRALS", "TOTAL_REFERRALS", parse=whole_number),
+    Field("payout_status", "PAYOUT STATUS"),
+    Field("bank_name", "BANK NAME", parse=str),
+    Field("account_name", "ACCOUNT NAME", parse=str),
+    Field("account_number", "ACCOUNT NUMBER", parse=str),
+    Field("referred_by", "REFERRED_BY"),
+    Field("last_ip", "LAST_IP", parse=str),
+    Field("is_superuser", "is_superuser", parse=flag),
+    Field("is_verified", "is_verified", parse=flag),
+    Field("state", "STATE"),
+    Field("date_joined", "DATE_JOINED"),
+)
+
+ACTIVITY = Schema(
+    "Activity",
+    Field("timestamp", "Timestamp"),
+    Field("referred_by", "REFERRED_BY", "ReferralCode", "RefCode", parse=lower_text),
+    Field("type", "Type", "ActivityType"),
+    Field("points", "Points", "Pts", parse=safe_float),
+    Field("description", "DESCRIPTION", parse=str),
+    Field("payout_status", "Payout Status", "PayoutStatus"),
+)
+
+MILESTONE = Schema(
+    "Milestone",
+    Field("timestamp", "Timestamp"),
+    Field("at", "Timestamp", parse=timestamp),
+    Field("referrer_email", "ReferrerEmail", parse=lower_text),
+    Field("referee_email", "RefereeEmail"),
+    Field("type", "MilestoneType", parse=lower_text),
+    Field("points", "PointsAwarded", parse=safe_float),
+    Field("unique_key", "UniqueKey"),
+)
+
+BROADCAST = Schema(
+    "Broadcast",
+    Field("timestamp", "Timestamp"),
+    Field("type", "BroadcastType", parse=lower_text),
+    Field("username", "Username"),
+    Field("city", "City"),
+    Field("text", "Text", parse=str),
+)
@@ -1,18 +1,504 @@
 import gspread
 from google.oauth2.service_account import Credentials
 from google.oauth2 import service_account
-from typing import List, Optional
+from gspread.utils import a1_to_rowcol, absolute_range_name, fill_gaps, rowcol_to_a1
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
 import os
 import json
+import asyncio
+import atexit
+import bisect
+import collections
+import contextlib
+import contextvars
+import functools
+import threading
+import time
 from dotenv import load_dotenv
 
+try:
+    from .quota import MAX_RETRIES, PRIORITY_BACKGROUND, QuotaScheduler, call_priority, current_priority, is_rate_limited
+    from .storage import SQLITE_PATH, STORAGE_BACKEND, SpreadsheetHandle, SQLiteSpreadsheet, as_cell_text
+    from .tracing import call_labels, observe_call, observe_quota_wait
+    from .schema import ACTIVITY, MILESTONE, PARTNER_CODE_KEYS, PARTNER_EMAIL_KEYS, Column, Schema, column_positions, safe_float
+    from .leaderboard import Leaderboard
+    from .milestones import MILESTONE_KEYS_PATH, LegacyRanks, MilestoneKeys, MilestoneKeysView
+    from .feed import BROADCAST_REFRESH_INTERVAL, FEED_SOURCES, BroadcastHub, LiveFeed
+except ImportError:
+    # Imported as a top-level module by the diagnostic scripts in backend/: the modules
+    # this one builds on are loaded from the app package, where they import each other
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from app.quota import MAX_RETRIES, PRIORITY_BACKGROUND, QuotaScheduler, call_priority, current_priority, is_rate_limited
+    from app.storage import SQLITE_PATH, STORAGE_BACKEND, SpreadsheetHandle, SQLiteSpreadsheet, as_cell_text
+    from app.tracing import call_labels, observe_call, observe_quota_wait
+    from app.schema import ACTIVITY, MILESTONE, PARTNER_CODE_KEYS, PARTNER_EMAIL_KEYS, Column, Schema, column_positions, safe_float
+    from app.leaderboard import Leaderboard
+    from app.milestones import MILESTONE_KEYS_PATH, LegacyRanks, MilestoneKeys, MilestoneKeysView
+    from app.feed import BROADCAST_REFRESH_INTERVAL, FEED_SOURCES, BroadcastHub, LiveFeed
+
 # Load .env from the backend directory (parent of this 'app' folder)
 env_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env")
 load_dotenv(env_path)
 
+# Read-through cache TTLs (seconds). SHEETS_CACHE_TTL sets the default and
+# SHEETS_CACHE_TTLS overrides individual worksheets, e.g. "Partners=15,Reviews=120".
+# A TTL of 0 disables caching for that worksheet.
+DEFAULT_CACHE_TTL = float(os.getenv("SHEETS_CACHE_TTL", "30"))
+CACHE_TTLS = {
+    "Delivery Pricing": 300.0,
+    "Reviews": 60.0,
+    # Append-only, so expiring it costs a tail read; see feed.BROADCAST_REFRESH_INTERVAL
+    "GlobalNotifications": BROADCAST_REFRESH_INTERVAL,
+}
+
+
+# Write-behind appends: rows for these worksheets are buffered and sent in one
+# append_rows call once SHEETS_APPEND_BATCH_SIZE rows are queued or
+# SHEETS_APPEND_FLUSH_INTERVAL seconds have passed. Set SHEETS_WRITE_BEHIND to an
+# empty string to append synchronously. Off by default on Vercel, where background
+# timers do not survive the end of a request. ReferralMilestones and Admin Audit are
+# not buffered by default: their rows are the idempotency record of points already
+# written to Partners (apply_milestone checks Admin Audit for a bonus already paid),
+# and losing one in a crash would let the same points be credited twice.
+_DEFAULT_WRITE_BEHIND = "" if os.getenv("VERCEL") else "ActivityLog,GlobalNotifications"
+WRITE_BEHIND_SHEETS = {
+    name.strip() for name in os.getenv("SHEETS_WRITE_BEHIND", _DEFAULT_WRITE_BEHIND).split(",") if name.strip()
+}
+APPEND_BATCH_SIZE = int(os.getenv("SHEETS_APPEND_BATCH_SIZE", "25"))
+APPEND_FLUSH_INTERVAL = float(os.getenv("SHEETS_APPEND_FLUSH_INTERVAL", "2"))
+
+# Append-only worksheets: once cached, a refresh downloads only the rows added since the
+# last read instead of the whole sheet. A full reload still happens when the header or the
+# row count no longer matches, and at least every SHEETS_FULL_RELOAD_INTERVAL seconds so
+# edits made in place by other instances (e.g. an ActivityLog status) are picked up.
+APPEND_ONLY_SHEETS = {
+    name.strip()
+    for name in os.getenv("SHEETS_APPEND_ONLY", "ActivityLog,ReferralMilestones,GlobalNotifications,Admin Audit").split(",")
+    if name.strip()
+}
+FULL_RELOAD_INTERVAL = float(os.getenv("SHEETS_FULL_RELOAD_INTERVAL", "600"))
+
+# Rows per ranged read when streaming a worksheet with iter_chunks
+CHUNK_ROWS = int(os.getenv("SHEETS_CHUNK_ROWS", "10000"))
+
+# Size of the thread pool behind the async (a*) methods. Bounds how many Sheets API
+# calls run at once; everything else waits in the pool's queue, not on the event loop.
+SHEETS_IO_WORKERS = int(os.getenv("SHEETS_IO_WORKERS", "16"))
+# Separate, smaller pool for calls made at background priority (credit tasks, audit logs)
+SHEETS_BACKGROUND_IO_WORKERS = int(os.getenv("SHEETS_BACKGROUND_IO_WORKERS", "4"))
+
+
+def _parse_cache_ttls(raw: Optional[str]) -> Dict[str, float]:
+    """Parses 'Sheet=seconds,Other Sheet=seconds' into a dict, skipping bad entries."""
+    ttls = {}
+    for item in (raw or "").split(","):
+        name, sep, seconds = item.partition("=")
+        if not sep or not name.strip():
+            continue
+        try:
+            ttls[name.strip()] = float(seconds)
+        except ValueError:
+            print(f"WARNING: Ignoring invalid cache TTL '{item}'")
+    return ttls
+
+
+def _trim_row(row: List) -> List[str]:
+    """A row as the API returns it: cells as text, trailing empty cells dropped."""
+    cells = [str(cell) for cell in row]
+    while cells and cells[-1] == "":
+        cells.pop()
+    return cells
+
+
+def _clean_headers(headers: List[str]) -> List[str]:
+    """Strips headers and renames empty/duplicate ones so every column gets a unique key."""
+    cleaned_headers = []
+    seen = {}
+    for i, h in enumerate(headers):
+        h = str(h).strip()
+        if not h:
+            h = f"EMPTY_{i}"
+        if h in seen:
+            seen[h] += 1
+            h = f"{h}_{seen[h]}"
+        else:
+            seen[h] = 0
+        cleaned_headers.append(h)
+    return cleaned_headers
+
+
+def resolve_header(headers: List[str], *aliases: str) -> Optional[str]:
+    """Returns the first header matching any alias (case/whitespace-insensitive)."""
+    normalized = {str(h).strip().lower(): h for h in reversed(headers)}
+    for alias in aliases:
+        header = normalized.get(str(alias).strip().lower())
+        if header is not None:
+            return header
+    return None
+
+
+def _project(headers: List[str], rows: List[List], columns: Sequence[Column]) -> List[Tuple]:
+    positions = column_positions(headers, columns)
+    return [tuple(row[p] if p is not None and p < len(row) else "" for p in positions) for row in rows]
+
+
+def _column_letter(col: int) -> str:
+    return rowcol_to_a1(1, col).rstrip("0123456789")
+
+
+class RowIndex:
+    """
+    Maps a normalized key (email, referral code, ...) to the first sheet row holding it.
+    Keys come from the first matching header alias, or from key_func for computed keys.
+    """
+
+    def __init__(self, *aliases: str, key_func=None):
+        self.aliases = aliases
+        self.key_func = key_func
+        self._header = None
+        self._rows: Dict[str, int] = {}
+        self._row_keys: Dict[int, str] = {}
+
+    def _key(self, record: dict) -> str:
+        if self.key_func:
+            value = self.key_func(record)
+        else:
+            value = record.get(self._header, "") if self._header else ""
+        return str(value or "").strip().lower()
+
+    def build(self, headers: List[str], records: List[dict]):
+        self._header = resolve_header(headers, *self.aliases) if self.aliases else None
+        self._rows = {}
+        self._row_keys = {}
+        for i, record in enumerate(records):
+            self._add(i + 2, record)
+
+    def _add(self, row: int, record: dict):
+        key = self._key(record)
+        self._row_keys[row] = key
+        if key and key not in self._rows:
+            self._rows[key] = row
+
+    def on_append(self, row: int, record: dict):
+        self._add(row, record)
+
+    def on_update(self, row: int, record: dict):
+        old_key = self._row_keys.get(row)
+        new_key = self._key(record)
+        if old_key == new_key:
+            return
+        self._row_keys[row] = new_key
+        if old_key and self._rows.get(old_key) == row:
+            # Another row may share the old key; rescan for it (key edits are rare)
+            del self._rows[old_key]
+            for other_row, key in sorted(self._row_keys.items()):
+                if key == old_key:
+                    self._rows[old_key] = other_row
+                    break
+        if new_key and (new_key not in self._rows or self._rows[new_key] > row):
+            self._rows[new_key] = row
+
+    def get(self, value) -> Optional[int]:
+        """Returns the 1-indexed sheet row for a key, or None."""
+        return self._rows.get(str(value or "").strip().lower())
+
+
+class MultiRowIndex:
+    """
+    Secondary index: maps a normalized key (a partner's referral code, an email) to every
+    sheet row holding it, in sheet order. Built from typed rows (see app.schema), so a
+    partner's rows are found without scanning the whole worksheet.
+    """
+
+    def __init__(self, schema: Schema, field: str):
+        self.schema = schema
+        self.field = field
+        self._rows: Dict[str, List[int]] = {}
+        self._row_keys: Dict[int, str] = {}
+
+    def _key(self, typed_row) -> str:
+        return str(getattr(typed_row, self.field) or "").strip().lower()
+
+    def build(self, headers: List[str], rows: List):
+        self._rows = {}
+        self._row_keys = {}
+        for row, typed_row in enumerate(rows, 2):
+            self._add(row, typed_row)
+
+    def _add(self, row: int, typed_row):
+        key = self._key(typed_row)
+        self._row_keys[row] = key
+        if key:
+            rows = self._rows.setdefault(key, [])
+            if rows and rows[-1] > row:
+                bisect.insort(rows, row)
+            else:
+                rows.append(row)
+
+    def on_append(self, row: int, typed_row):
+        self._add(row, typed_row)
+
+    def on_update(self, row: int, typed_row):
+        old_key = self._row_keys.get(row)
+        if old_key == self._key(typed_row):
+            return
+        if old_key:
+            rows = self._rows[old_key]
+            rows.remove(row)
+            if not rows:
+                del self._rows[old_key]
+        self._add(row, typed_row)
+
+    def get(self, value) -> List[int]:
+        """The 1-indexed sheet rows for a key, in sheet order (empty if none)."""
+        return list(self._rows.get(str(value or "").strip().lower(), ()))
+
+
+class _SheetSnapshot:
+    """Cached copy of one worksheet's values, patched in place by our own writes."""
+
+    def __init__(self, values: List[List], fetched_at: float):
+        self.values = [list(row) for row in values]
+        self.fetched_at = fetched_at
+        # When the whole sheet was last downloaded, and how many of our rows came from the
+        # sheet itself (rows after that were patched in by our own appends)
+        self.loaded_at = fetched_at
+        self.synced_rows = len(self.values)
+        self._headers = None
+        self._records = None
+        # Schema -> (compiled schema, decoded rows), see typed()
+        self._typed = {}
+        self.views = {}
+
+    def view(self, name: str, factory):
+        """
+        Returns a derived structure (index, aggregate) built once for this snapshot.
+        A view with a `schema` attribute is fed typed rows instead of record dicts.
+        """
+        view = self.views.get(name)
+        if view is None:
+            view = factory()
+            schema = getattr(view, "schema", None)
+            view.build(self.headers, self.typed(schema) if schema is not None else self.records())
+            self.views[name] = view
+        return view
+
+    def _notify(self, method: str, row: int):
+        for view in self.views.values():
+            schema = getattr(view, "schema", None)
+            rows = self.typed(schema) if schema is not None else self.records()
+            getattr(view, method)(row, rows[row - 2])
+
+    def record_at(self, row: int) -> Optional[dict]:
+        records = self.records()
+        if 2 <= row < len(records) + 2:
+            return records[row - 2]
+        return None
+
+    @property
+    def headers(self) -> List[str]:
+        if self._headers is None:
+            self._headers = _clean_headers(self.values[0]) if self.values else []
+        return self._headers
+
+    def _retype(self, row: int):
+        """Re-decodes one data row (1-indexed sheet row) in every typed view."""
+        for compiled, rows in self._typed.values():
+            while len(rows) < row - 1:
+                rows.append(compiled.decode(self.values[len(rows) + 1]))
+            rows[row - 2] = compiled.decode(self.values[row - 1])
+
+    def _to_record(self, row: List) -> dict:
+        return {header: (row[i] if i < len(row) else "") for i, header in enumerate(self.headers)}
+
+    def records(self) -> List[dict]:
+        if self._records is None:
+            self._records = [self._to_record(row) for row in self.values[1:]]
+        return self._records
+
+    def typed(self, schema: Schema) -> List:
+        """The data rows decoded with a schema, built once and kept in step with our writes."""
+        entry = self._typed.get(schema)
+        if entry is None:
+            compiled = schema.compile(self.values[0] if self.values else [])
+            entry = self._typed[schema] = (compiled, [compiled.decode(row) for row in self.values[1:]])
+        return entry[1]
+
+    def set_cell(self, row: int, col: int, value):
+        """Writes a value at a 1-indexed (row, col), growing the grid if needed."""
+        if row == 1:
+            # Header edits change the record keys; rebuild lazily
+            self._headers = None
+            self._records = None
+            self._typed = {}
+            self.views = {}
+        while len(self.values) < row:
+            self.values.append([])
+        cells = self.values[row - 1]
+        while len(cells) < col:
+            cells.append("")
+        cells[col - 1] = as_cell_text(value)
+        if row == 1:
+            return
+        self._retype(row)
+        if self._records is not None:
+            record = self._records[row - 2] if row - 2 < len(self._records) else None
+            if record is None:
+                self._records = None
+                self.views = {}
+                return
+            if col - 1 < len(self.headers):
+                record[self.headers[col - 1]] = cells[col - 1]
+        if col - 1 < len(self.headers):
+            self._notify("on_update", row)
+
+    def append(self, row_values: List, row: Optional[int] = None) -> int:
+        """
+        Adds a row at the end (or at the row the API reported it was written to).
+        Returns the 1-indexed row it was placed at.
+        """
+        row = row or len(self.values) + 1
+        if row <= max(len(self.values), 1):
+            # Landed on an existing row (or the header): patch cell by cell
+            for offset, value in enumerate(row_values):
+                self.set_cell(row, offset + 1, value)
+            return row
+        while len(self.values) < row - 1:
+            self.values.append([])
+            if self._records is not None:
+                self._records.append(self._to_record([]))
+        cells = [as_cell_text(value) for value in row_values]
+        self.values.append(cells)
+        self._retype(row)
+        if self._records is not None:
+            self._records.append(self._to_record(cells))
+        self._notify("on_append", row)
+        return row
+
+
+class _Flight:
+    """One in-progress worksheet download that concurrent readers wait on instead of repeating."""
 
-class GoogleSheetsClient:
     def __init__(self):
+        self.done = threading.Event()
+        self.snapshot: Optional[_SheetSnapshot] = None
+        self.error: Optional[Exception] = None
+
+    def resolve(self, snapshot: Optional[_SheetSnapshot] = None, error: Optional[Exception] = None):
+        self.snapshot = snapshot
+        self.error = error
+        self.done.set()
+
+    def wait(self) -> Optional[_SheetSnapshot]:
+        self.done.wait()
+        if self.error:
+            raise self.error
+        return self.snapshot
+
+
+_active_unit_of_work = contextvars.ContextVar("sheets_unit_of_work", default=None)
+
+
+class SheetsUnitOfWork:
+    """
+    Collects cell and range edits made through the client and sends them in a single
+    values batch_update on commit. Edits are patched into the cache immediately so
+    reads inside the unit see them; a failed or abandoned unit invalidates those sheets.
+    """
+
+    def __init__(self, client: "GoogleSheetsClient"):
+        self.client = client
+        self.closed = False
+        self._edits: Dict[tuple, List[List]] = {}
+        self._token = None
+
+    def add(self, worksheet_name: str, range_name: str, values: List[List]):
+        key = (worksheet_name, range_name)
+        # Re-writing the exact same range keeps only the latest values, in the latest position
+        self._edits.pop(key, None)
+        self._edits[key] = values
+
+    @property
+    def worksheets(self):
+        return {name for name, _ in self._edits}
+
+    def edits_for(self, worksheet_name: str):
+        return [(range_name, values) for (name, range_name), values in self._edits.items() if name == worksheet_name]
+
+    def commit(self) -> int:
+        """Sends all collected edits in one call. Returns the number of ranges written."""
+        self.closed = True
+        if not self._edits:
+            return 0
+        data = [
+            {"range": absolute_range_name(name, range_name), "values": values}
+            for (name, range_name), values in self._edits.items()
+        ]
+        try:
+            # USER_ENTERED, the same way update_cell interprets values
+            self.client._api("write", self.client.sheet.values_batch_update, {"valueInputOption": "USER_ENTERED", "data": data})
+            print(f"Successfully committed {len(data)} batched edits to {', '.join(sorted(self.worksheets))}")
+        except Exception as e:
+            print(f"ERROR: Failed to commit batched sheet edits: {e}")
+            self.rollback()
+            raise e
+        return len(data)
+
+    def rollback(self):
+        """Drops uncommitted edits and the cached snapshots they were patched into."""
+        self.closed = True
+        for name in self.worksheets:
+            self.client.invalidate(name)
+        self._edits = {}
+
+    def __enter__(self):
+        self._token = _active_unit_of_work.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _active_unit_of_work.reset(self._token)
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+    async def __aenter__(self):
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        # Same as __exit__, but the batch_update runs on the Sheets I/O pool
+        _active_unit_of_work.reset(self._token)
+        if exc_type is None:
+            await self.client.arun(self.commit)
+        else:
+            self.rollback()
+        return False
+
+
+class _JoinedUnitOfWork:
+    """Context for a nested unit_of_work() call: edits go to the enclosing unit."""
+
+    def __init__(self, outer: SheetsUnitOfWork):
+        self.outer = outer
+
+    def __enter__(self):
+        return self.outer
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    async def __aenter__(self):
+        return self.outer
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+class GoogleSheetsClient:
+    def __init__(self, spreadsheet: Optional[SpreadsheetHandle] = None):
         self.scopes = [
             "https://www.googleapis.com/auth/spreadsheets",
             "https://www.googleapis.com/auth/drive"
@@ -21,6 +507,61 @@ class GoogleSheetsClient:
         self._client = None
         self._sheet = None
         self._initialized = False
+        self._worksheets = {}
+        self._cache: Dict[str, _SheetSnapshot] = {}
+        self._cache_lock = threading.RLock()
+        self.cache_ttls = {**CACHE_TTLS, **_parse_cache_ttls(os.getenv("SHEETS_CACHE_TTLS"))}
+        self._view_factories: Dict[str, Dict] = {}
+        # worksheet -> names of views built as soon as a snapshot is downloaded
+        self._eager_views: Dict[str, set] = {}
+        self.write_behind_sheets = set(WRITE_BEHIND_SHEETS)
+        self.append_only_sheets = set(APPEND_ONLY_SHEETS)
+        self.full_reload_interval = FULL_RELOAD_INTERVAL
+        self.chunk_rows = CHUNK_ROWS
+        # worksheet -> last header row seen, so projected reads can find their columns
+        self._header_rows: Dict[str, List[str]] = {}
+        # worksheet -> callbacks told about every row appended through this client
+        self._append_listeners: Dict[str, List] = {}
+        self.append_batch_size = APPEND_BATCH_SIZE
+        self.append_flush_interval = APPEND_FLUSH_INTERVAL
+        # worksheet -> [[row_values, row number it was patched into the cache at], ...]
+        self._append_buffers: Dict[str, List[List]] = {}
+        self._append_lock = threading.Lock()
+        self._flush_locks: Dict[str, threading.RLock] = {}
+        self._flush_timer = None
+        self.io_workers = SHEETS_IO_WORKERS
+        self.background_io_workers = SHEETS_BACKGROUND_IO_WORKERS
+        self._executor = None
+        self._background_executor = None
+        # worksheet -> download in progress; guarded by _cache_lock
+        self._inflight: Dict[str, _Flight] = {}
+        # Counters: "fetches" (worksheets downloaded), "tail_fetches" (append-only worksheets
+        # refreshed by reading only their new rows) and "deduplicated_fetches" (reads that
+        # joined a download already in flight instead of starting one)
+        self.metrics = collections.Counter()
+        self.quota = QuotaScheduler()
+        self.max_retries = MAX_RETRIES
+        if spreadsheet is not None:
+            # An already-open spreadsheet (SQLite, a test fake) instead of the Google one
+            self._sheet = spreadsheet
+            self._initialized = True
+        self.register_view("Partners", "email", lambda: RowIndex(*PARTNER_EMAIL_KEYS))
+        self.register_view("Partners", "referral_code", lambda: RowIndex(*PARTNER_CODE_KEYS))
+        # Outlives the snapshots: each one rebuilds it, writes in between patch it
+        self.leaderboard = Leaderboard()
+        self.register_view("Partners", "leaderboard", lambda: self.leaderboard, eager=True)
+        self.register_view("ActivityLog", "referred_by", lambda: MultiRowIndex(ACTIVITY, "referred_by"))
+        self.register_view("ReferralMilestones", "referrer_email", lambda: MultiRowIndex(MILESTONE, "referrer_email"))
+        self.register_view("ReferralMilestones", "referee_email", lambda: MultiRowIndex(MILESTONE, "referee_email"))
+        self.register_view("ReferralMilestones", "legacy_ranks", LegacyRanks)
+        self.milestone_keys = MilestoneKeys(MILESTONE_KEYS_PATH)
+        self.add_append_listener("ReferralMilestones", functools.partial(self.milestone_keys.on_append, "ReferralMilestones"))
+        self.register_view("ReferralMilestones", "milestone_keys", lambda: MilestoneKeysView(self.milestone_keys), eager=True)
+        self.live_feed = LiveFeed()
+        for worksheet_name in FEED_SOURCES:
+            self.add_append_listener(worksheet_name, functools.partial(self.live_feed.on_append, worksheet_name))
+        self.broadcasts = BroadcastHub()
+        self.add_append_listener("GlobalNotifications", functools.partial(self.broadcasts.on_append, "GlobalNotifications"))
 
     def _build_credentials(self):
         """
@@ -59,7 +600,7 @@ class GoogleSheetsClient:
             try:
                 self._client = gspread.authorize(creds)
                 print(f"DEBUG: Opening spreadsheet {self.spreadsheet_id}...")
-                self._sheet = self._client.open_by_key(self.spreadsheet_id)
+                self._sheet = self._api("read", self._client.open_by_key, self.spreadsheet_id)
                 self._initialized = True
                 print("DEBUG: Google Sheets Client initialized successfully.")
             except Exception as e:
@@ -81,12 +622,64 @@ class GoogleSheetsClient:
         self._ensure_initialized()
         return self._sheet
 
+    def use_spreadsheet(self, spreadsheet: Optional[SpreadsheetHandle]):
+        """
+        Points the client at another spreadsheet (a fake in tests and benchmarks).
+        Cached snapshots, worksheet handles and still-buffered rows of the old one are dropped.
+        """
+        with self._cache_lock:
+            with self._append_lock:
+                self._append_buffers.clear()
+            self._sheet = spreadsheet
+            self._initialized = spreadsheet is not None
+            self._worksheets = {}
+            self._cache.clear()
+            self._header_rows.clear()
+            self.live_feed.clear()
+            self.broadcasts.clear()
+            self.milestone_keys.clear()
+            self.leaderboard.clear()
+
+    def _api(self, kind: str, func, *args, **kwargs):
+        """
+        Sends one Sheets API call ("read" or "write") once the quota scheduler lets it
+        through, retrying with backoff when Google answers 429. Every attempt is timed and
+        attributed to the current request trace.
+        """
+        operation, worksheet = call_labels(func, args, kwargs)
+        attempt = 0
+        while True:
+            waited = time.perf_counter()
+            self.quota.acquire(kind)
+            started = time.perf_counter()
+            observe_quota_wait(kind, started - waited)
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                limited = is_rate_limited(e)
+                observe_call(operation, worksheet, time.perf_counter() - started, "rate_limited" if limited else "error")
+                if not limited or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                pause = self.quota.rate_limited(kind, e)
+                print(f"WARNING: Sheets {kind} quota exceeded, retrying in {pause:.1f}s (attempt {attempt}/{self.max_retries})")
+                continue
+            observe_call(operation, worksheet, time.perf_counter() - started)
+            self.quota.succeeded(kind)
+            return result
+
     def get_worksheet(self, name: str):
         if not self.sheet:
             print(f"ERROR: Google Sheets not initialized. Cannot access worksheet '{name}'.")
             return None
+        # Each gspread lookup is a metadata round trip, so keep the handles
+        ws = self._worksheets.get(name)
+        if ws:
+            return ws
         try:
-            return self.sheet.worksheet(name)
+            ws = self._api("read", self.sheet.worksheet, name)
+            self._worksheets[name] = ws
+            return ws
         except Exception as e:
             print(f"ERROR: Could not find worksheet '{name}' in sheet {self.spreadsheet_id}: {e}")
             return None
@@ -102,71 +695,776 @@ class GoogleSheetsClient:
             
         try:
             print(f"DEBUG: Creating missing worksheet '{name}'...")
-            ws = self.sheet.add_worksheet(title=name, rows="1000", cols="20")
+            ws = self._api("write", self.sheet.add_worksheet, title=name, rows="1000", cols="20")
             if headers:
-                ws.append_row(headers, table_range="A1")
+                self._api("write", ws.append_row, headers, table_range="A1")
+            self._worksheets[name] = ws
+            self.invalidate(name)
             return ws
         except Exception as e:
             print(f"ERROR: Failed to create worksheet '{name}': {e}")
             return None
 
 
+    def cache_ttl(self, worksheet_name: str) -> float:
+        return self.cache_ttls.get(worksheet_name, DEFAULT_CACHE_TTL)
+
+    def set_cache_ttl(self, worksheet_name: str, seconds: float):
+        """Overrides the cache TTL for one worksheet (0 disables caching for it)."""
+        self.cache_ttls[worksheet_name] = seconds
+        if seconds <= 0:
+            self.invalidate(worksheet_name)
+
+    def invalidate(self, worksheet_name: Optional[str] = None):
+        """Drops the cached snapshot for one worksheet, or all of them."""
+        with self._cache_lock:
+            if worksheet_name is None:
+                dropped = list(self._cache.values())
+                self._cache.clear()
+            else:
+                dropped = [self._cache.pop(worksheet_name, None)]
+            # Views that outlive their snapshot (the leaderboard) learn they may be off
+            for snapshot in filter(None, dropped):
+                for view in snapshot.views.values():
+                    if hasattr(view, "on_invalidate"):
+                        view.on_invalidate()
+
+    def _cached_snapshot(self, worksheet_name: str) -> Optional[_SheetSnapshot]:
+        snapshot = self._cache.get(worksheet_name)
+        if snapshot and time.monotonic() - snapshot.fetched_at < self.cache_ttl(worksheet_name):
+            return snapshot
+        return None
+
+    def _get_snapshot(self, worksheet_name: str) -> Optional[_SheetSnapshot]:
+        """
+        Returns a fresh-enough snapshot of the worksheet, downloading it on a miss.
+        Concurrent misses for the same worksheet share a single download.
+        """
+        with self._cache_lock:
+            snapshot = self._cached_snapshot(worksheet_name)
+            if snapshot:
+                return snapshot
+            flight = self._inflight.get(worksheet_name)
+            if flight is None:
+                flight = self._inflight[worksheet_name] = _Flight()
+                leader = True
+            else:
+                self.metrics["deduplicated_fetches"] += 1
+                leader = False
+        if not leader:
+            return flight.wait()
+
+        snapshot = error = None
+        try:
+            snapshot = self._fetch_snapshot(worksheet_name)
+            return snapshot
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            with self._cache_lock:
+                self._inflight.pop(worksheet_name, None)
+            flight.resolve(snapshot, error)
+
+    def _fetch_snapshot(self, worksheet_name: str) -> Optional[_SheetSnapshot]:
+        ws = self.get_worksheet(worksheet_name)
+        if not ws:
+            return None
+        if worksheet_name not in self.write_behind_sheets:
+            return self._read_snapshot(worksheet_name, ws)
+
+        # Hold the flush lock so no buffered row lands in the sheet while we read it;
+        # rows still queued afterwards are overlaid onto the fresh snapshot.
+        with self._flush_lock(worksheet_name):
+            try:
+                self._flush_worksheet(worksheet_name)
+            except Exception as e:
+                print(f"WARNING: Could not flush {worksheet_name} before reading it: {e}")
+            return self._read_snapshot(worksheet_name, ws)
+
+    def _read_snapshot(self, worksheet_name: str, ws) -> _SheetSnapshot:
+        stale = self._tail_candidate(worksheet_name)
+        if stale:
+            try:
+                response = self._api("read", self.sheet.values_batch_get, self._tail_ranges(worksheet_name, stale))
+                if self._extend_snapshot(worksheet_name, stale, response.get("valueRanges", [])):
+                    return stale
+            except Exception as e:
+                print(f"WARNING: Tail read of {worksheet_name} failed, reloading it: {e}")
+        print(f"DEBUG: Fetching all records from {worksheet_name}...")
+        with self._cache_lock:
+            self.metrics["fetches"] += 1
+        return self._store_snapshot(worksheet_name, self._api("read", ws.get_all_values))
+
+    def _tail_candidate(self, worksheet_name: str) -> Optional[_SheetSnapshot]:
+        """The expired snapshot of an append-only worksheet, if it can be refreshed by its tail."""
+        if worksheet_name not in self.append_only_sheets:
+            return None
+        with self._cache_lock:
+            snapshot = self._cache.get(worksheet_name)
+            if not snapshot or not snapshot.synced_rows or not any(snapshot.values[0]):
+                return None
+            if time.monotonic() - snapshot.loaded_at >= self.full_reload_interval:
+                return None
+            unit = self._active_unit_of_work()
+            if unit and unit.edits_for(worksheet_name):
+                return None
+            return snapshot
+
+    @staticmethod
+    def _tail_ranges(worksheet_name: str, snapshot: _SheetSnapshot) -> List[str]:
+        """
+        The header row plus everything from the last row we know the sheet has, e.g.
+        ['Log'!1:1, 'Log'!A12:G]. Re-reading that row shows whether rows were removed.
+        """
+        last_column = _column_letter(len(_trim_row(snapshot.values[0])))
+        return [
+            absolute_range_name(worksheet_name, "1:1"),
+            absolute_range_name(worksheet_name, f"A{snapshot.synced_rows}:{last_column}"),
+        ]
+
+    def _extend_snapshot(self, worksheet_name: str, snapshot: _SheetSnapshot, value_ranges: List[dict]) -> bool:
+        """
+        Applies a tail read to the cached snapshot. Returns False (and leaves the snapshot
+        alone) when the sheet no longer lines up with it and needs a full reload.
+        """
+        if len(value_ranges) != 2:
+            return False
+        header = _trim_row(value_ranges[0].get("values", [[]])[0] if value_ranges[0].get("values") else [])
+        tail = [list(row) for row in value_ranges[1].get("values", [])]
+        with self._cache_lock:
+            if self._cache.get(worksheet_name) is not snapshot:
+                return False
+            start = snapshot.synced_rows
+            if header != _trim_row(snapshot.values[0]):
+                print(f"DEBUG: Header of {worksheet_name} changed, reloading it")
+                return False
+            # The last row we read must still be there, unchanged, and every row we
+            # appended since must have landed; anything else means rows moved.
+            if not tail or _trim_row(tail[0]) != _trim_row(snapshot.values[start - 1]):
+                print(f"DEBUG: {worksheet_name} was edited in place, reloading it")
+                return False
+            if start + len(tail) - 1 < len(snapshot.values):
+                print(f"DEBUG: {worksheet_name} has fewer rows than cached, reloading it")
+                return False
+
+            self.metrics["tail_fetches"] += 1
+            # Rows appended by other instances (or straight into the sheet)
+            found = []
+            for row, cells in enumerate(tail[1:], start + 1):
+                if row > len(snapshot.values):
+                    snapshot.append(cells, row)
+                    found.append(cells)
+                    continue
+                # One of our own appends: take the sheet's rendering of it
+                self._patch_row(snapshot, row, cells)
+            snapshot.synced_rows = start + len(tail) - 1
+            snapshot.fetched_at = time.monotonic()
+        added = snapshot.synced_rows - start
+        print(f"DEBUG: Read {added} new rows from {worksheet_name}")
+        for cells in found:
+            self._notify_append(worksheet_name, cells)
+        return True
+
+    def _store_snapshot(self, worksheet_name: str, values: List[List]) -> _SheetSnapshot:
+        snapshot = _SheetSnapshot(values, time.monotonic())
+        with self._cache_lock:
+            with self._append_lock:
+                for entry in self._append_buffers.get(worksheet_name, []):
+                    entry[1] = snapshot.append(entry[0])
+            unit = self._active_unit_of_work()
+            if unit:
+                for range_name, values in unit.edits_for(worksheet_name):
+                    self._patch_range(snapshot, range_name, values)
+            if self.cache_ttl(worksheet_name) > 0:
+                self._cache[worksheet_name] = snapshot
+            if snapshot.values:
+                self._header_rows[worksheet_name] = list(snapshot.values[0])
+            for view_name in self._eager_views.get(worksheet_name, ()):
+                try:
+                    snapshot.view(view_name, self._view_factories[worksheet_name][view_name])
+                except Exception as e:
+                    print(f"WARNING: Could not build view {view_name} on {worksheet_name}: {e}")
+        return snapshot
+
+    @staticmethod
+    def _patch_row(snapshot: _SheetSnapshot, row: int, cells: List):
+        """Overwrites one cached row with the sheet's values, notifying views of changed cells."""
+        cached = snapshot.values[row - 1]
+        for col in range(max(len(cells), len(cached))):
+            value = cells[col] if col < len(cells) else ""
+            if (cached[col] if col < len(cached) else "") != value:
+                snapshot.set_cell(row, col + 1, value)
+
+    def _patch_cache(self, worksheet_name: str, patch):
+        """Applies a write to the cached snapshot, or drops it if the patch fails."""
+        with self._cache_lock:
+            snapshot = self._cache.get(worksheet_name)
+            if not snapshot:
+                return
+            try:
+                patch(snapshot)
+            except Exception as e:
+                print(f"WARNING: Could not patch cached {worksheet_name}, invalidating: {e}")
+                self.invalidate(worksheet_name)
+
+    @staticmethod
+    def _appended_row_number(response) -> Optional[int]:
+        """Extracts the row number from an append response's updatedRange (e.g. 'Log'!A12:G12)."""
+        try:
+            updated_range = response["updates"]["updatedRange"]
+            start = updated_range.rsplit("!", 1)[-1].split(":")[0]
+            return a1_to_rowcol(start)[0]
+        except Exception:
+            return None
+
+    def _flush_lock(self, worksheet_name: str) -> threading.RLock:
+        with self._append_lock:
+            return self._flush_locks.setdefault(worksheet_name, threading.RLock())
+
+    def _enqueue_append(self, worksheet_name: str, row: List):
+        """Buffers a row for a write-behind worksheet and patches it into the cache right away."""
+        entry = [list(row), None]
+        with self._cache_lock:
+            snapshot = self._cache.get(worksheet_name)
+            if snapshot:
+                entry[1] = snapshot.append(row)
+            with self._append_lock:
+                buffer = self._append_buffers.setdefault(worksheet_name, [])
+                buffer.append(entry)
+                full = len(buffer) >= self.append_batch_size
+                if not full:
+                    self._schedule_flush()
+        if full:
+            try:
+                self._flush_worksheet(worksheet_name)
+            except Exception as e:
+                # Rows stay queued; the timer retries them
+                print(f"ERROR: Failed to flush buffered rows to {worksheet_name}: {e}")
+                with self._append_lock:
+                    self._schedule_flush()
+
+    def _schedule_flush(self):
+        # Caller holds self._append_lock
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.append_flush_interval, self._flush_from_timer)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _flush_from_timer(self):
+        with self._append_lock:
+            self._flush_timer = None
+        try:
+            with call_priority(PRIORITY_BACKGROUND):
+                self.flush()
+        except Exception as e:
+            print(f"ERROR: Background flush of buffered rows failed: {e}")
+        with self._append_lock:
+            if any(self._append_buffers.values()):
+                self._schedule_flush()
+
+    def _flush_worksheet(self, worksheet_name: str) -> int:
+        """Sends all buffered rows for one worksheet in a single append_rows call."""
+        with self._flush_lock(worksheet_name):
+            with self._append_lock:
+                batch = self._append_buffers.pop(worksheet_name, [])
+            if not batch:
+                return 0
+            ws = self.get_worksheet(worksheet_name)
+            try:
+                if not ws:
+                    raise Exception(f"Worksheet '{worksheet_name}' unavailable")
+                response = self._api("write", ws.append_rows, [row for row, _ in batch], table_range="A1")
+            except Exception:
+                with self._append_lock:
+                    self._append_buffers[worksheet_name] = batch + self._append_buffers.get(worksheet_name, [])
+                raise
+            print(f"Successfully appended {len(batch)} buffered rows to {worksheet_name}")
+            # Someone else appended in the meantime: our cached row positions are off
+            expected_row = batch[0][1]
+            if expected_row is None or self._appended_row_number(response) != expected_row:
+                self.invalidate(worksheet_name)
+            return len(batch)
+
+    def flush(self, worksheet_name: Optional[str] = None) -> int:
+        """
+        Synchronously writes buffered rows (for one worksheet, or all of them).
+        Returns the number of rows written; raises if any worksheet failed to flush.
+        """
+        with self._append_lock:
+            names = [worksheet_name] if worksheet_name else list(self._append_buffers)
+        written = 0
+        first_error = None
+        for name in names:
+            try:
+                written += self._flush_worksheet(name)
+            except Exception as e:
+                print(f"ERROR: Failed to flush buffered rows to {name}: {e}")
+                first_error = first_error or e
+        if first_error:
+            raise first_error
+        return written
+
     def append_row(self, worksheet_name: str, row: List):
         ws = self.get_worksheet(worksheet_name)
-        if ws:
+        if ws and worksheet_name in self.write_behind_sheets:
+            self._enqueue_append(worksheet_name, row)
+            self._notify_append(worksheet_name, row)
+        elif ws:
             try:
                 # Force appending starting from column A to prevent accidental shifts
-                ws.append_row(row, table_range="A1")
+                response = self._api("write", ws.append_row, row, table_range="A1")
                 print(f"Successfully appended row to {worksheet_name} starting at Col A")
             except Exception as e:
                 print(f"ERROR: Failed to append row to {worksheet_name}: {e}")
+                self.invalidate(worksheet_name)
                 raise e # Re-raise to let the caller know it failed
+            row_number = self._appended_row_number(response)
+            self._patch_cache(worksheet_name, lambda snap: snap.append(row, row_number))
+            self._notify_append(worksheet_name, row)
+
+    def add_append_listener(self, worksheet_name: str, callback):
+        """
+        Calls callback(headers, row) for every row appended to the worksheet through this
+        client, cached or not, and for rows others appended that a tail read brings in.
+        headers is the last header row seen (None if never read).
+        """
+        self._append_listeners.setdefault(worksheet_name, []).append(callback)
+
+    def _notify_append(self, worksheet_name: str, row: List):
+        for callback in self._append_listeners.get(worksheet_name, ()):
+            try:
+                callback(self._header_rows.get(worksheet_name), list(row))
+            except Exception as e:
+                print(f"WARNING: Append listener on {worksheet_name} failed: {e}")
+
+    def register_view(self, worksheet_name: str, view_name: str, factory, eager: bool = False):
+        """
+        Registers a derived structure for a worksheet. factory() must return an object with
+        build(headers, records), on_append(row, record) and on_update(row, record).
+        Eager views are built on every downloaded snapshot instead of on first use.
+        """
+        self._view_factories.setdefault(worksheet_name, {})[view_name] = factory
+        if eager:
+            self._eager_views.setdefault(worksheet_name, set()).add(view_name)
+        with self._cache_lock:
+            snapshot = self._cache.get(worksheet_name)
+            if snapshot:
+                snapshot.views.pop(view_name, None)
+
+    def get_view(self, worksheet_name: str, view_name: str):
+        """Returns the named view built over the current snapshot of the worksheet."""
+        factory = self._view_factories[worksheet_name][view_name]
+        snapshot = self._get_snapshot(worksheet_name)
+        if not snapshot:
+            return None
+        with self._cache_lock:
+            return snapshot.view(view_name, factory)
+
+    def find_record(self, worksheet_name: str, index_name: str, value, fresh: bool = False):
+        """
+        O(1) lookup through a RowIndex view.
+        Returns (row_idx, record) with a 1-indexed sheet row, or (None, None) if not found.
+
+        With fresh=True the row itself is re-read from the sheet (one ranged read) unless
+        the snapshot was downloaded by this call. Use it for read-modify-writes of balances:
+        a cached POINTS up to a TTL old would overwrite another instance's credit.
+        """
+        try:
+            snapshot, row_idx = self._locate(worksheet_name, index_name, value, fresh)
+            if row_idx is None:
+                return None, None
+            with self._cache_lock:
+                return row_idx, snapshot.record_at(row_idx)
+        except Exception as e:
+            print(f"ERROR: Index lookup {index_name} on {worksheet_name} failed: {e}")
+            return None, None
+
+    def _locate(self, worksheet_name: str, index_name: str, value, fresh: bool = False):
+        """The snapshot and the row the index maps value to (None when not found), see find_record."""
+        factory = self._view_factories[worksheet_name][index_name]
+        started = time.monotonic()
+        snapshot = self._get_snapshot(worksheet_name)
+        if not snapshot:
+            return None, None
+        with self._cache_lock:
+            row_idx = snapshot.view(index_name, factory).get(value)
+        if not fresh or row_idx is None or snapshot.fetched_at >= started:
+            return snapshot, row_idx
+
+        cells = self._read_row(worksheet_name, row_idx)
+        with self._cache_lock:
+            if row_idx <= len(snapshot.values):
+                self._patch_row(snapshot, row_idx, cells)
+                # Keep our own not-yet-committed edits on top of what the sheet holds
+                unit = self._active_unit_of_work()
+                for range_name, values in unit.edits_for(worksheet_name) if unit else ():
+                    self._patch_range(snapshot, range_name, values)
+                if snapshot.view(index_name, factory).get(value) == row_idx:
+                    return snapshot, row_idx
+        # The row no longer holds the key (rows moved): reload the sheet and look again
+        print(f"DEBUG: Row {row_idx} of {worksheet_name} moved, reloading it")
+        self.invalidate(worksheet_name)
+        return self._locate(worksheet_name, index_name, value)
+
+    def _read_row(self, worksheet_name: str, row: int) -> List[str]:
+        """One sheet row straight from the API, bypassing the cache."""
+        ranges = [absolute_range_name(worksheet_name, f"{row}:{row}")]
+        value_ranges = self._api("read", self.sheet.values_batch_get, ranges).get("valueRanges", [])
+        if len(value_ranges) != 1:
+            raise ValueError(f"expected 1 range, got {len(value_ranges)}")
+        return list((value_ranges[0].get("values") or [[]])[0])
+
+    def find_row(self, worksheet_name: str, index_name: str, value) -> Optional[int]:
+        """Like find_record, but returns only the 1-indexed sheet row."""
+        return self.find_record(worksheet_name, index_name, value)[0]
+
+    def get_all_values(self, worksheet_name: str) -> List[List]:
+        """Returns the raw grid (header row included) through the read-through cache."""
+        try:
+            snapshot = self._get_snapshot(worksheet_name)
+        except Exception as e:
+            print(f"ERROR: Failed to get values from {worksheet_name}: {e}")
+            return []
+        return [list(row) for row in snapshot.values] if snapshot else []
 
     def get_all_records(self, worksheet_name: str):
-        print(f"DEBUG: Fetching all records from {worksheet_name}...")
-        ws = self.get_worksheet(worksheet_name)
-        if ws:
+        """
+        Returns one dict per data row, keyed by cleaned headers.
+        Served from the read-through cache; treat the returned dicts as read-only.
+        """
+        try:
+            # Use get_all_values and filter headers manually to avoid gspread error with duplicate/empty headers
+            snapshot = self._get_snapshot(worksheet_name)
+            if not snapshot or not snapshot.values:
+                return []
+            return list(snapshot.records())
+        except Exception as e:
+            print(f"ERROR: Failed to get records from {worksheet_name}: {e}")
+            return []
+
+    def get_typed(self, worksheet_name: str, schema: Schema) -> List:
+        """
+        Like get_all_records, but one typed row (see app.schema) per data row. Decoded once
+        per snapshot; treat the returned list as read-only.
+        """
+        try:
+            snapshot = self._get_snapshot(worksheet_name)
+            if not snapshot or not snapshot.values:
+                return []
+            with self._cache_lock:
+                return list(snapshot.typed(schema))
+        except Exception as e:
+            print(f"ERROR: Failed to get rows from {worksheet_name}: {e}")
+            return []
+
+    def get_many_typed(self, schemas: Dict[str, Schema]) -> Dict[str, List]:
+        """get_typed for several worksheets (name -> schema), read in one batch like get_many_records."""
+        snapshots = self._get_many_snapshots(list(schemas))
+        result = {}
+        with self._cache_lock:
+            for name, schema in schemas.items():
+                snapshot = snapshots.get(name)
+                result[name] = list(snapshot.typed(schema)) if snapshot and snapshot.values else []
+        return result
+
+    def find_typed(self, worksheet_name: str, index_name: str, value, schema: Schema, fresh: bool = False):
+        """Like find_record, but returns (row_idx, typed row)."""
+        try:
+            snapshot, row_idx = self._locate(worksheet_name, index_name, value, fresh)
+            if snapshot is None:
+                return None, None
+            with self._cache_lock:
+                rows = snapshot.typed(schema)
+                if row_idx is None or not 2 <= row_idx < len(rows) + 2:
+                    return None, None
+                return row_idx, rows[row_idx - 2]
+        except Exception as e:
+            print(f"ERROR: Index lookup {index_name} on {worksheet_name} failed: {e}")
+            return None, None
+
+    def find_all_typed(self, worksheet_name: str, index_name: str, value, schema: Schema) -> List[Tuple[int, object]]:
+        """
+        Lookup through a MultiRowIndex view: (row_idx, typed row) for every row with the
+        key, in sheet order. Costs the number of matches, not the size of the worksheet.
+        """
+        try:
+            factory = self._view_factories[worksheet_name][index_name]
+            snapshot = self._get_snapshot(worksheet_name)
+            if not snapshot:
+                return []
+            with self._cache_lock:
+                row_idxs = snapshot.view(index_name, factory).get(value)
+                rows = snapshot.typed(schema)
+                return [(row_idx, rows[row_idx - 2]) for row_idx in row_idxs if 2 <= row_idx < len(rows) + 2]
+        except Exception as e:
+            print(f"ERROR: Index lookup {index_name} on {worksheet_name} failed: {e}")
+            return []
+
+    def get_headers(self, worksheet_name: str) -> List[str]:
+        """The worksheet's header row, as stored, through the read-through cache."""
+        snapshot = self._get_snapshot(worksheet_name)
+        return list(snapshot.values[0]) if snapshot and snapshot.values else []
+
+    def claim_milestone(self, unique_key: str) -> bool:
+        """
+        Atomically reserves a ReferralMilestones UniqueKey: True if it was not recorded
+        (nor claimed) yet. Call release_milestone once the milestone row is appended or
+        the credit is abandoned. The first call loads the keys (see MilestoneKeys); later
+        ones first refresh an expired ReferralMilestones snapshot (a tail read), so keys
+        other instances recorded are at most a cache TTL old.
+        """
+        keys = self.milestone_keys
+        if not keys.loaded:
+            keys.load(self._milestone_key_cells)
+        elif not self._milestone_keys_current():
+            self._get_snapshot("ReferralMilestones")
+        return keys.claim(unique_key)
+
+    def _milestone_keys_current(self) -> bool:
+        """Whether a claim needs no read: keys loaded and no expired ReferralMilestones snapshot to catch up on."""
+        with self._cache_lock:
+            return self.milestone_keys.loaded and (
+                "ReferralMilestones" not in self._cache or self._cached_snapshot("ReferralMilestones") is not None
+            )
+
+    def _milestone_key_cells(self, start: int) -> List[Tuple]:
+        """
+        UniqueKey cells of ReferralMilestones rows start.., for MilestoneKeys.load. A failed
+        read raises: an empty set would let every milestone be credited again.
+        """
+        if not self.sheet:
+            raise Exception("Worksheet 'ReferralMilestones' unavailable: Google Sheets not initialized")
+        if start > 2:
+            # Only the rows added since the keys on file were saved
+            return self._get_columns("ReferralMilestones", ["UniqueKey"], start)
+        # Everything: one full read, which the other milestone paths then share through the cache
+        snapshot = self._get_snapshot("ReferralMilestones")
+        if snapshot is None:
+            # The worksheet lookup failed (or the sheet is missing): no way to tell what was credited
+            raise Exception("Worksheet 'ReferralMilestones' unavailable")
+        return _project(snapshot.values[0], snapshot.values[1:], ["UniqueKey"]) if snapshot.values else []
+
+    def release_milestone(self, unique_key: str):
+        self.milestone_keys.release(unique_key)
+
+    def get_many_records(self, worksheet_names: List[str]) -> Dict[str, List[dict]]:
+        """
+        Like get_all_records for several worksheets at once. Cached sheets are served
+        from memory and every miss is downloaded in a single values:batchGet call.
+        """
+        snapshots = self._get_many_snapshots(worksheet_names)
+        result = {}
+        for name in worksheet_names:
+            snapshot = snapshots.get(name)
+            result[name] = list(snapshot.records()) if snapshot and snapshot.values else []
+        return result
+
+    def _get_many_snapshots(self, worksheet_names: List[str]) -> Dict[str, _SheetSnapshot]:
+        snapshots = {}
+        missing = []
+        following = {}
+        with self._cache_lock:
+            for name in dict.fromkeys(worksheet_names):
+                snapshot = self._cached_snapshot(name)
+                if snapshot:
+                    snapshots[name] = snapshot
+                elif name in self._inflight:
+                    # Someone is already downloading it; wait for theirs
+                    following[name] = self._inflight[name]
+                    self.metrics["deduplicated_fetches"] += 1
+                else:
+                    missing.append(name)
+            flights = {name: self._inflight.setdefault(name, _Flight()) for name in missing}
+
+        retry = []
+        if missing:
+            fetched, error = {}, None
             try:
-                # Use get_all_values and filter headers manually to avoid gspread error with duplicate/empty headers
-                all_values = ws.get_all_values()
-                if not all_values:
-                    return []
-                
-                headers = all_values[0]
-                # Clean headers: handle duplicates and empty strings
-                cleaned_headers = []
-                seen = {}
-                for i, h in enumerate(headers):
-                    h = h.strip()
-                    if not h:
-                        h = f"EMPTY_{i}"
-                    if h in seen:
-                        seen[h] += 1
-                        h = f"{h}_{seen[h]}"
+                fetched = self._fetch_snapshots(missing)
+                snapshots.update(fetched)
+            except Exception as e:
+                print(f"WARNING: Batched read of {', '.join(missing)} failed, reading one by one: {e}")
+                error = e
+                retry.extend(missing)
+            finally:
+                with self._cache_lock:
+                    for name in missing:
+                        self._inflight.pop(name, None)
+                for name, flight in flights.items():
+                    flight.resolve(fetched.get(name), error)
+        for name, flight in following.items():
+            try:
+                snapshots[name] = flight.wait()
+            except Exception:
+                retry.append(name)
+        for name in retry:
+            try:
+                snapshots[name] = self._get_snapshot(name)
+            except Exception as e:
+                print(f"ERROR: Failed to get records from {name}: {e}")
+        return snapshots
+
+    def _fetch_snapshots(self, worksheet_names: List[str]) -> Dict[str, _SheetSnapshot]:
+        """Downloads several worksheets with one batchGet and caches their snapshots."""
+        print(f"DEBUG: Fetching all records from {', '.join(worksheet_names)} in one batch...")
+        with contextlib.ExitStack() as stack:
+            # Same rule as _get_snapshot: no buffered row may land while we read.
+            # Locks are taken in sorted order so concurrent batches cannot deadlock.
+            for name in sorted(n for n in worksheet_names if n in self.write_behind_sheets):
+                stack.enter_context(self._flush_lock(name))
+                try:
+                    self._flush_worksheet(name)
+                except Exception as e:
+                    print(f"WARNING: Could not flush {name} before reading it: {e}")
+
+            # Append-only sheets we still hold are refreshed by their tail in the same call
+            stale = {name: self._tail_candidate(name) for name in worksheet_names}
+            ranges = []
+            for name in worksheet_names:
+                ranges.extend(self._tail_ranges(name, stale[name]) if stale[name] else [absolute_range_name(name)])
+            with self._cache_lock:
+                self.metrics["fetches"] += sum(1 for name in worksheet_names if not stale[name])
+            response = self._api("read", self.sheet.values_batch_get, ranges)
+            value_ranges = response.get("valueRanges", [])
+            if len(value_ranges) != len(ranges):
+                raise ValueError(f"expected {len(ranges)} ranges, got {len(value_ranges)}")
+
+            snapshots, reload = {}, []
+            for name in worksheet_names:
+                if stale[name]:
+                    tail_ranges, value_ranges = value_ranges[:2], value_ranges[2:]
+                    if self._extend_snapshot(name, stale[name], tail_ranges):
+                        snapshots[name] = stale[name]
                     else:
-                        seen[h] = 0
-                    cleaned_headers.append(h)
-                
-                records = []
-                for row in all_values[1:]:
-                    record = {}
-                    for i, header in enumerate(cleaned_headers):
-                        if i < len(row):
-                            record[header] = row[i]
-                        else:
-                            record[header] = ""
-                    records.append(record)
-                return records
-            except Exception as e:
-                print(f"ERROR: Failed to get records from {worksheet_name}: {e}")
+                        reload.append(name)
+                    continue
+                value_range, value_ranges = value_ranges[0], value_ranges[1:]
+                snapshots[name] = self._store_snapshot(name, fill_gaps(value_range["values"]) if value_range.get("values") else [])
+            if reload:
+                print(f"DEBUG: Fetching all records from {', '.join(reload)} in one batch...")
+                with self._cache_lock:
+                    self.metrics["fetches"] += len(reload)
+                response = self._api("read", self.sheet.values_batch_get, [absolute_range_name(name) for name in reload])
+                value_ranges = response.get("valueRanges", [])
+                if len(value_ranges) != len(reload):
+                    raise ValueError(f"expected {len(reload)} ranges, got {len(value_ranges)}")
+                for name, value_range in zip(reload, value_ranges):
+                    snapshots[name] = self._store_snapshot(name, fill_gaps(value_range["values"]) if value_range.get("values") else [])
+            return snapshots
+
+    def get_columns(self, worksheet_name: str, *columns: Column, start: int = 2) -> List[Tuple]:
+        """
+        Only the named columns, as one tuple of cell text per data row from sheet row
+        start on:
+
+            for code, name in sheets_client.get_columns("Partners", "REFERRAL CODE", ("NAME", "FULL NAME")):
+
+        A column given as a tuple of names resolves to the first one the header has;
+        missing columns read as "". Served from the cached snapshot when it is fresh,
+        otherwise only those columns are downloaded (and nothing is cached).
+        """
+        try:
+            return self._get_columns(worksheet_name, columns, start)
+        except Exception as e:
+            print(f"ERROR: Failed to get columns from {worksheet_name}: {e}")
+            return []
+
+    def _get_columns(self, worksheet_name: str, columns: Sequence[Column], start: int = 2) -> List[Tuple]:
+        """get_columns, raising on a failed read instead of returning no rows."""
+        snapshot = self._projection_snapshot(worksheet_name)
+        if snapshot:
+            return _project(snapshot.values[0], snapshot.values[max(start, 2) - 1:], columns) if snapshot.values else []
+        return self._read_columns(worksheet_name, columns, max(start, 2))
+
+    def iter_chunks(self, worksheet_name: str, *columns: Column, chunk_size: Optional[int] = None) -> Iterator[List[Tuple]]:
+        """
+        Like get_columns, but yields the rows in blocks of chunk_size (SHEETS_CHUNK_ROWS)
+        with one ranged read per block, so a large sheet is never held in memory at once.
+        Reading stops at the first block that comes back short, so include a column that is
+        filled on every row (a timestamp, an email).
+        """
+        chunk_size = chunk_size or self.chunk_rows
+        snapshot = self._projection_snapshot(worksheet_name)
+        if snapshot:
+            headers, rows = (snapshot.values[0], snapshot.values[1:]) if snapshot.values else ([], [])
+            for start in range(0, len(rows), chunk_size):
+                yield _project(headers, rows[start:start + chunk_size], columns)
+            return
+        start = 2
+        while True:
+            block = self._read_columns(worksheet_name, columns, start, start + chunk_size - 1)
+            if block:
+                yield block
+            if len(block) < chunk_size:
+                return
+            start += chunk_size
+
+    def _projection_snapshot(self, worksheet_name: str) -> Optional[_SheetSnapshot]:
+        """
+        The snapshot to project from, or None when a ranged read of the sheet is accurate:
+        nothing of ours is still buffered or sitting in an uncommitted unit of work.
+        """
+        with self._cache_lock:
+            snapshot = self._cached_snapshot(worksheet_name)
+        if snapshot:
+            return snapshot
+        unit = self._active_unit_of_work()
+        local_edits = bool(unit and unit.edits_for(worksheet_name))
+        if worksheet_name in self.write_behind_sheets:
+            try:
+                self.flush(worksheet_name)
+            except Exception as e:
+                print(f"WARNING: Could not flush {worksheet_name} before reading it: {e}")
+                local_edits = True
+        return self._get_snapshot(worksheet_name) if local_edits else None
+
+    def _read_columns(self, worksheet_name: str, columns: Sequence[Column], start: int, end: Optional[int] = None) -> List[Tuple]:
+        """
+        Downloads the given columns for sheet rows start..end (to the last row if end is None)
+        in one batchGet. The header row rides along to check the columns have not moved;
+        if they have (or the header is not known yet), a second call reads the right ones.
+        """
+        header = self._header_rows.get(worksheet_name)
+        ranges = [absolute_range_name(worksheet_name, "1:1")]
+        if header is not None:
+            ranges += self._column_ranges(worksheet_name, column_positions(header, columns), start, end)
+        value_ranges = self._api("read", self.sheet.values_batch_get, ranges).get("valueRanges", [])
+        if len(value_ranges) != len(ranges):
+            raise ValueError(f"expected {len(ranges)} ranges, got {len(value_ranges)}")
+
+        current = (value_ranges[0].get("values") or [[]])[0]
+        if header is None or _trim_row(current) != _trim_row(header):
+            header = self._header_rows[worksheet_name] = list(current)
+            ranges = self._column_ranges(worksheet_name, column_positions(header, columns), start, end)
+            if not ranges:
                 return []
-        return []
+            value_ranges = [None] + self._api("read", self.sheet.values_batch_get, ranges).get("valueRanges", [])
+            if len(value_ranges) != len(ranges) + 1:
+                raise ValueError(f"expected {len(ranges)} ranges, got {len(value_ranges) - 1}")
+
+        cells = iter([[row[0] if row else "" for row in vr.get("values", [])] for vr in value_ranges[1:]])
+        projected = [None if p is None else next(cells) for p in column_positions(header, columns)]
+        count = max((len(c) for c in projected if c is not None), default=0)
+        return [
+            tuple(c[i] if c is not None and i < len(c) else "" for c in projected)
+            for i in range(count)
+        ]
+
+    @staticmethod
+    def _column_ranges(worksheet_name: str, positions: List[Optional[int]], start: int, end: Optional[int]) -> List[str]:
+        ranges = []
+        for p in positions:
+            if p is not None:
+                letter = _column_letter(p + 1)
+                ranges.append(absolute_range_name(worksheet_name, f"{letter}{start}:{letter}{end or ''}"))
+        return ranges
 
     def find_cell(self, worksheet_name: str, value: str, column: int):
         ws = self.get_worksheet(worksheet_name)
         if ws:
             try:
-                cell = ws.find(value, in_column=column)
+                cell = self._api("read", ws.find, value, in_column=column)
                 return cell
             except gspread.exceptions.CellNotFound:
                 return None
@@ -175,33 +1473,79 @@ class GoogleSheetsClient:
                 return None
         return None
 
+    def unit_of_work(self):
+        """
+        Groups the update_cell/update_range calls made inside the block into one batch_update:
+
+            with sheets_client.unit_of_work():
+                sheets_client.update_cell("Partners", row, 10, bank_name)
+                sheets_client.update_cell("Partners", row, 11, account_name)
+
+        Nested blocks join the outermost unit. Appends are not part of the unit.
+        """
+        active = self._active_unit_of_work()
+        if active:
+            return _JoinedUnitOfWork(active)
+        return SheetsUnitOfWork(self)
+
+    def _active_unit_of_work(self) -> Optional[SheetsUnitOfWork]:
+        unit = _active_unit_of_work.get()
+        if unit and not unit.closed and unit.client is self:
+            return unit
+        return None
+
     def update_cell(self, worksheet_name: str, row: int, col: int, value):
+        unit = self._active_unit_of_work()
+        if unit:
+            if self.get_worksheet(worksheet_name):
+                unit.add(worksheet_name, rowcol_to_a1(row, col), [[value]])
+                self._patch_cache(worksheet_name, lambda snap: snap.set_cell(row, col, value))
+            return
         ws = self.get_worksheet(worksheet_name)
         if ws:
             try:
-                ws.update_cell(row, col, value)
+                self._api("write", ws.update_cell, row, col, value)
             except Exception as e:
                 print(f"ERROR: Failed to update cell in {worksheet_name}: {e}")
+                self.invalidate(worksheet_name)
                 raise e
+            self._patch_cache(worksheet_name, lambda snap: snap.set_cell(row, col, value))
 
     def update_range(self, worksheet_name: str, range_name: str, values: List[List]):
         """Updates a range of cells, e.g., 'E2:F2' with [[points, revenue]]."""
+        unit = self._active_unit_of_work()
+        if unit:
+            if self.get_worksheet(worksheet_name):
+                unit.add(worksheet_name, range_name, values)
+                self._patch_cache(worksheet_name, lambda snap: self._patch_range(snap, range_name, values))
+            return
         ws = self.get_worksheet(worksheet_name)
         if ws:
             try:
                 # In gspread 6.x, 'values' is the first positional argument
-                ws.update(values, range_name)
+                self._api("write", ws.update, values, range_name)
                 print(f"Successfully updated range {range_name} in {worksheet_name}")
             except Exception as e:
                 print(f"ERROR: Failed to update range {range_name} in {worksheet_name}: {e}")
+                self.invalidate(worksheet_name)
                 raise e
+            self._patch_cache(worksheet_name, lambda snap: self._patch_range(snap, range_name, values))
+
+    @staticmethod
+    def _patch_range(snapshot: _SheetSnapshot, range_name: str, values: List[List]):
+        start_row, start_col = a1_to_rowcol(range_name.split(":")[0])
+        for r, row_values in enumerate(values):
+            for c, value in enumerate(row_values):
+                snapshot.set_cell(start_row + r, start_col + c, value)
 
     def log_audit(self, action: str, message: str, status: str = "SUCCESS"):
         """Logs an action to the 'Admin Audit' sheet."""
         try:
             from datetime import datetime
             row = [datetime.now().isoformat(), action, message, status]
-            self.append_row("Admin Audit", row)
+            # Audit rows never hold up user-facing calls
+            with call_priority(PRIORITY_BACKGROUND):
+                self.append_row("Admin Audit", row)
         except Exception as e:
             print(f"FAILED TO LOG AUDIT: {e}")
 
@@ -215,21 +1559,182 @@ class GoogleSheetsClient:
                 return normalized_record[norm_key]
         return default
 
-def safe_float(v):
-    """Robust conversion of sheet values (strings/None/numbers) to float."""
-    if v is None:
-        return 0.0
-    if isinstance(v, (int, float)):
-        return float(v)
-    
-    # Clean string: remove currency symbols, commas, and whitespace
-    clean_v = str(v).replace("NGN", "").replace("\u20a6", "").replace(",", "").replace("$", "").replace("N", "").strip()
-
-    if not clean_v:
-        return 0.0
-    try:
-        return float(clean_v)
-    except (ValueError, TypeError):
-        return 0.0
+    # --- Async façade -------------------------------------------------------------
+    # Route handlers and user-manager hooks use these instead of the blocking methods.
+    # Reads already in the cache and edits inside an open unit of work involve no I/O,
+    # so they are answered inline; everything else runs on the bounded I/O pool.
 
-sheets_client = GoogleSheetsClient()
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._cache_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="sheets-io")
+        return self._executor
+
+    @property
+    def background_executor(self) -> ThreadPoolExecutor:
+        # Background calls may sit waiting for quota; keep them off the interactive pool
+        if self._background_executor is None:
+            with self._cache_lock:
+                if self._background_executor is None:
+                    self._background_executor = ThreadPoolExecutor(
+                        max_workers=self.background_io_workers, thread_name_prefix="sheets-io-bg"
+                    )
+        return self._background_executor
+
+    async def arun(self, func, *args, **kwargs):
+        """
+        Runs a blocking call on the Sheets I/O pool without holding up the event loop.
+        The caller's context goes with it, so an open unit of work still collects the edits.
+        """
+        call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Not running on asyncio (e.g. the trio-parametrized tests): use anyio's worker threads
+            import anyio
+            return await anyio.to_thread.run_sync(call)
+        executor = self.background_executor if current_priority() == PRIORITY_BACKGROUND else self.executor
+        return await loop.run_in_executor(executor, call)
+
+    def is_cached(self, *worksheet_names: str) -> bool:
+        """Whether reading these worksheets would be served from memory right now."""
+        with self._cache_lock:
+            return all(self._cached_snapshot(name) for name in worksheet_names)
+
+    async def aget_worksheet(self, name: str):
+        if name in self._worksheets:
+            return self._worksheets[name]
+        return await self.arun(self.get_worksheet, name)
+
+    async def aget_or_create_worksheet(self, name: str, headers: List[str] = None):
+        if name in self._worksheets:
+            return self._worksheets[name]
+        return await self.arun(self.get_or_create_worksheet, name, headers)
+
+    async def aget_all_values(self, worksheet_name: str) -> List[List]:
+        if self.is_cached(worksheet_name):
+            return self.get_all_values(worksheet_name)
+        return await self.arun(self.get_all_values, worksheet_name)
+
+    async def aget_all_records(self, worksheet_name: str):
+        if self.is_cached(worksheet_name):
+            return self.get_all_records(worksheet_name)
+        return await self.arun(self.get_all_records, worksheet_name)
+
+    async def aget_many_records(self, worksheet_names: List[str]) -> Dict[str, List[dict]]:
+        if self.is_cached(*worksheet_names):
+            return self.get_many_records(worksheet_names)
+        return await self.arun(self.get_many_records, worksheet_names)
+
+    async def aget_typed(self, worksheet_name: str, schema: Schema) -> List:
+        if self.is_cached(worksheet_name):
+            return self.get_typed(worksheet_name, schema)
+        return await self.arun(self.get_typed, worksheet_name, schema)
+
+    async def aget_many_typed(self, schemas: Dict[str, Schema]) -> Dict[str, List]:
+        if self.is_cached(*schemas):
+            return self.get_many_typed(schemas)
+        return await self.arun(self.get_many_typed, schemas)
+
+    async def aget_columns(self, worksheet_name: str, *columns: Column, start: int = 2) -> List[Tuple]:
+        return await self.arun(self.get_columns, worksheet_name, *columns, start=start)
+
+    async def aiter_chunks(self, worksheet_name: str, *columns: Column, chunk_size: Optional[int] = None):
+        """Async version of iter_chunks: each block is read on the I/O pool."""
+        chunks = self.iter_chunks(worksheet_name, *columns, chunk_size=chunk_size)
+        while True:
+            chunk = await self.arun(next, chunks, None)
+            if chunk is None:
+                return
+            yield chunk
+
+    async def afind_record(self, worksheet_name: str, index_name: str, value, fresh: bool = False):
+        if self.is_cached(worksheet_name) and not fresh:
+            return self.find_record(worksheet_name, index_name, value)
+        return await self.arun(self.find_record, worksheet_name, index_name, value, fresh)
+
+    async def aget_view(self, worksheet_name: str, view_name: str):
+        if self.is_cached(worksheet_name):
+            return self.get_view(worksheet_name, view_name)
+        return await self.arun(self.get_view, worksheet_name, view_name)
+
+    async def afind_typed(self, worksheet_name: str, index_name: str, value, schema: Schema, fresh: bool = False):
+        if self.is_cached(worksheet_name) and not fresh:
+            return self.find_typed(worksheet_name, index_name, value, schema)
+        return await self.arun(self.find_typed, worksheet_name, index_name, value, schema, fresh)
+
+    async def afind_all_typed(self, worksheet_name: str, index_name: str, value, schema: Schema) -> List[Tuple[int, object]]:
+        if self.is_cached(worksheet_name):
+            return self.find_all_typed(worksheet_name, index_name, value, schema)
+        return await self.arun(self.find_all_typed, worksheet_name, index_name, value, schema)
+
+    async def aget_headers(self, worksheet_name: str) -> List[str]:
+        if self.is_cached(worksheet_name):
+            return self.get_headers(worksheet_name)
+        return await self.arun(self.get_headers, worksheet_name)
+
+    async def aclaim_milestone(self, unique_key: str) -> bool:
+        if self._milestone_keys_current():
+            return self.milestone_keys.claim(unique_key)
+        return await self.arun(self.claim_milestone, unique_key)
+
+    async def afind_row(self, worksheet_name: str, index_name: str, value) -> Optional[int]:
+        return (await self.afind_record(worksheet_name, index_name, value))[0]
+
+    async def afind_cell(self, worksheet_name: str, value: str, column: int):
+        return await self.arun(self.find_cell, worksheet_name, value, column)
+
+    async def aappend_row(self, worksheet_name: str, row: List):
+        return await self.arun(self.append_row, worksheet_name, row)
+
+    async def aupdate_cell(self, worksheet_name: str, row: int, col: int, value):
+        if self._active_unit_of_work() and worksheet_name in self._worksheets:
+            return self.update_cell(worksheet_name, row, col, value)
+        return await self.arun(self.update_cell, worksheet_name, row, col, value)
+
+    async def aupdate_range(self, worksheet_name: str, range_name: str, values: List[List]):
+        if self._active_unit_of_work() and worksheet_name in self._worksheets:
+            return self.update_range(worksheet_name, range_name, values)
+        return await self.arun(self.update_range, worksheet_name, range_name, values)
+
+    async def alog_audit(self, action: str, message: str, status: str = "SUCCESS"):
+        return await self.arun(self.log_audit, action, message, status)
+
+    async def aflush(self, worksheet_name: Optional[str] = None) -> int:
+        return await self.arun(self.flush, worksheet_name)
+
+
+class SQLiteSheetsClient(GoogleSheetsClient):
+    """
+    The same client over a local SQLite copy of the spreadsheet (STORAGE_BACKEND=sqlite).
+    Writes take milliseconds, so there are no API quotas to respect and nothing to batch.
+    """
+
+    def __init__(self, path: str = SQLITE_PATH):
+        super().__init__(spreadsheet=SQLiteSpreadsheet(path))
+        self.spreadsheet_id = self._sheet.id
+        self.quota = QuotaScheduler(reads_per_minute=0, writes_per_minute=0)
+        self.write_behind_sheets = set()
+
+
+def create_client(backend: str = STORAGE_BACKEND) -> GoogleSheetsClient:
+    """Builds the storage client selected by STORAGE_BACKEND ("sheets" or "sqlite")."""
+    if backend == "sqlite":
+        print(f"DEBUG: Using local SQLite storage at {SQLITE_PATH}")
+        return SQLiteSheetsClient(SQLITE_PATH)
+    if backend != "sheets":
+        print(f"WARNING: Unknown STORAGE_BACKEND '{backend}', falling back to Google Sheets")
+    return GoogleSheetsClient()
+
+
+sheets_client = create_client()
+
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        sheets_client.flush()
+    except Exception as e:
+        print(f"ERROR: Buffered rows could not be written on exit: {e}")
@@ -0,0 +1,333 @@
+import abc
+import json
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Protocol, Tuple
+
+from gspread.cell import Cell
+from gspread.exceptions import WorksheetNotFound
+from gspread.utils import a1_range_to_grid_range, absolute_range_name, rowcol_to_a1
+
+# Which store GoogleSheetsClient talks to: "sheets" (Google Sheets, the default) or
+# "sqlite" (a local file with the same worksheet/column layout, see SQLiteSpreadsheet).
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "sheets").strip().lower()
+SQLITE_PATH = os.getenv(
+    "SQLITE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "enchiridion.db"),
+)
+
+
+class WorksheetHandle(Protocol):
+    """The part of gspread's Worksheet that GoogleSheetsClient and the routers call."""
+
+    title: str
+
+    def get_all_values(self) -> List[List[str]]: ...
+
+    def row_values(self, row: int) -> List[str]: ...
+
+    def append_row(self, values: List, table_range: Optional[str] = None, **kwargs) -> dict: ...
+
+    def append_rows(self, values: List[List], table_range: Optional[str] = None, **kwargs) -> dict: ...
+
+    def update(self, values=None, range_name=None, **kwargs): ...
+
+    def update_cell(self, row: int, col: int, value): ...
+
+    def find(self, query, in_row: Optional[int] = None, in_column: Optional[int] = None): ...
+
+
+class SpreadsheetHandle(Protocol):
+    """
+    The part of gspread's Spreadsheet that GoogleSheetsClient calls: the storage backend
+    seam. gspread's Spreadsheet, SQLiteSpreadsheet and the test fake all implement it.
+    """
+
+    def worksheet(self, title: str) -> WorksheetHandle: ...
+
+    def add_worksheet(self, title: str, rows: int, cols: int, **kwargs) -> WorksheetHandle: ...
+
+    def values_batch_get(self, ranges: List[str], params: Optional[dict] = None) -> dict: ...
+
+    def values_batch_update(self, body: dict) -> dict: ...
+
+
+def as_cell_text(value) -> str:
+    """Approximates how the sheet will display a written value (USER_ENTERED)."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def split_range(range_name: str) -> Tuple[str, Optional[str]]:
+    """Splits "'Sheet Name'!A1:B2" into ("Sheet Name", "A1:B2"); a bare sheet name has no range."""
+    match = re.match(r"^'((?:[^']|'')*)'(?:!(.*))?$", range_name)
+    if match:
+        return match.group(1).replace("''", "'"), match.group(2)
+    if "!" in range_name:
+        title, _, cells = range_name.partition("!")
+        return title, cells
+    return range_name, None
+
+
+def _trim(row: List[str]) -> List[str]:
+    end = len(row)
+    while end and row[end - 1] == "":
+        end -= 1
+    return row[:end]
+
+
+class GridWorksheet(abc.ABC):
+    """
+    A worksheet kept as rows of display strings, answering the gspread calls we make.
+    Subclasses store the rows: _read_rows, _write_rows and _last_row.
+    """
+
+    def __init__(self, spreadsheet: "GridSpreadsheet", title: str, sheet_id: int):
+        self.spreadsheet = spreadsheet
+        self.title = title
+        self.id = sheet_id
+
+    # --- storage primitives ---------------------------------------------------
+
+    @abc.abstractmethod
+    def _read_rows(self, start: int = 1, end: Optional[int] = None) -> Dict[int, List[str]]:
+        """Returns {row number: cells} for the stored rows in [start, end]."""
+
+    @abc.abstractmethod
+    def _write_rows(self, rows: Dict[int, List[str]]):
+        """Stores the given rows, replacing what is there."""
+
+    @abc.abstractmethod
+    def _last_row(self) -> int:
+        """The number of the last stored row (0 when empty)."""
+
+    # --- gspread surface ------------------------------------------------------
+
+    def get_all_values(self) -> List[List[str]]:
+        return self.get_values()
+
+    def get_values(self, range_name: Optional[str] = None) -> List[List[str]]:
+        """Values of the range (whole sheet by default), padded into a rectangle like gspread does."""
+        rows = self.range_values(range_name)
+        width = max((len(row) for row in rows), default=0)
+        return [row + [""] * (width - len(row)) for row in rows]
+
+    def range_values(self, range_name: Optional[str] = None) -> List[List[str]]:
+        """Values of the range the way the API returns them: trailing empty cells and rows trimmed."""
+        start_row, end_row, start_col, end_col = self._bounds(range_name)
+        stored = self._read_rows(start_row, end_row)
+        last = max(stored, default=start_row - 1)
+        values = []
+        for row in range(start_row, last + 1):
+            cells = stored.get(row, [])
+            values.append(_trim(cells[start_col - 1:end_col]))
+        while values and not values[-1]:
+            values.pop()
+        return values
+
+    def row_values(self, row: int) -> List[str]:
+        return _trim(self._read_rows(row, row).get(row, []))
+
+    def append_row(self, values: List, table_range: Optional[str] = None, **kwargs) -> dict:
+        return self.append_rows([values], table_range=table_range)
+
+    def append_rows(self, values: List[List], table_range: Optional[str] = None, **kwargs) -> dict:
+        start = self._last_row() + 1
+        rows = {start + i: [as_cell_text(v) for v in row] for i, row in enumerate(values)}
+        self._write_rows(rows)
+        width = max((len(row) for row in values), default=1) or 1
+        end = start + len(values) - 1
+        return {
+            "updates": {
+                "updatedRange": absolute_range_name(self.title, f"A{start}:{rowcol_to_a1(end, width)}"),
+                "updatedRows": len(values),
+            },
+        }
+
+    def update(self, values=None, range_name=None, **kwargs):
+        # gspread 6 takes (values, range_name) but still accepts the old (range_name, values)
+        if isinstance(values, str):
+            values, range_name = range_name, values
+        if values and not isinstance(values[0], list):
+            values = [values]
+        self.write_values(range_name or "A1", values)
+        return {"updatedRange": absolute_range_name(self.title, range_name or "A1")}
+
+    def update_cell(self, row: int, col: int, value):
+        self.write_values(rowcol_to_a1(row, col), [[value]])
+
+    def find(self, query, in_row: Optional[int] = None, in_column: Optional[int] = None, case_sensitive: bool = True):
+        query = str(query)
+        wanted = query if case_sensitive else query.lower()
+        for row, cells in sorted(self._read_rows(in_row or 1, in_row).items()):
+            for col, value in enumerate(cells, start=1):
+                if in_column and col != in_column:
+                    continue
+                if (value if case_sensitive else value.lower()) == wanted:
+                    return Cell(row, col, value)
+        return None
+
+    # --- helpers ----------------------------------------------------------------
+
+    def write_values(self, range_name: str, values: List[List]):
+        start_row, _, start_col, _ = self._bounds(range_name)
+        current = self._read_rows(start_row, start_row + len(values) - 1)
+        changed = {}
+        for r, row_values in enumerate(values):
+            row = start_row + r
+            cells = list(current.get(row, []))
+            for c, value in enumerate(row_values):
+                col = start_col + c
+                while len(cells) < col:
+                    cells.append("")
+                cells[col - 1] = as_cell_text(value)
+            changed[row] = cells
+        self._write_rows(changed)
+
+    @staticmethod
+    def _bounds(range_name: Optional[str]) -> Tuple[int, Optional[int], int, Optional[int]]:
+        """1-indexed (start_row, end_row, start_col, end_col); None means unbounded."""
+        if not range_name:
+            return 1, None, 1, None
+        grid = a1_range_to_grid_range(range_name)
+        return (
+            grid.get("startRowIndex", 0) + 1,
+            grid.get("endRowIndex"),
+            grid.get("startColumnIndex", 0) + 1,
+            grid.get("endColumnIndex"),
+        )
+
+
+class GridSpreadsheet(abc.ABC):
+    """The spreadsheet-level calls (worksheet lookup, batchGet, batchUpdate) over GridWorksheets."""
+
+    @abc.abstractmethod
+    def worksheets(self) -> List[GridWorksheet]:
+        """Every worksheet, in sheet order."""
+
+    def worksheet(self, title: str) -> GridWorksheet:
+        for ws in self.worksheets():
+            if ws.title == title:
+                return ws
+        raise WorksheetNotFound(title)
+
+    @abc.abstractmethod
+    def add_worksheet(self, title: str, rows: int = 1000, cols: int = 26, **kwargs) -> GridWorksheet:
+        """Creates an empty worksheet and returns it."""
+
+    def values_batch_get(self, ranges: List[str], params: Optional[dict] = None) -> dict:
+        value_ranges = []
+        for range_name in ranges:
+            title, cells = split_range(range_name)
+            ws = self.worksheet(title)
+            value_ranges.append({
+                "range": absolute_range_name(title, cells) if cells else absolute_range_name(title),
+                "majorDimension": "ROWS",
+                "values": ws.range_values(cells),
+            })
+        return {"valueRanges": value_ranges}
+
+    def values_batch_update(self, body: dict) -> dict:
+        for item in body.get("data", []):
+            title, cells = split_range(item["range"])
+            self.worksheet(title).write_values(cells or "A1", item.get("values", []))
+        return {"totalUpdatedCells": sum(len(row) for item in body.get("data", []) for row in item.get("values", []))}
+
+
+class SQLiteWorksheet(GridWorksheet):
+    spreadsheet: "SQLiteSpreadsheet"
+
+    def _read_rows(self, start: int = 1, end: Optional[int] = None) -> Dict[int, List[str]]:
+        query = "SELECT row, cells FROM sheet_rows WHERE sheet_id = ? AND row >= ?"
+        args = [self.id, start]
+        if end is not None:
+            query += " AND row <= ?"
+            args.append(end)
+        with self.spreadsheet.lock:
+            result = self.spreadsheet.db.execute(query, args).fetchall()
+        return {row: json.loads(cells) for row, cells in result}
+
+    def _write_rows(self, rows: Dict[int, List[str]]):
+        with self.spreadsheet.lock, self.spreadsheet.db:
+            self.spreadsheet.db.executemany(
+                "INSERT OR REPLACE INTO sheet_rows (sheet_id, row, cells) VALUES (?, ?, ?)",
+                [(self.id, row, json.dumps(cells)) for row, cells in rows.items()],
+            )
+
+    def _last_row(self) -> int:
+        with self.spreadsheet.lock:
+            (last,) = self.spreadsheet.db.execute(
+                "SELECT COALESCE(MAX(row), 0) FROM sheet_rows WHERE sheet_id = ?", (self.id,)
+            ).fetchone()
+        return last
+
+
+class SQLiteSpreadsheet(GridSpreadsheet):
+    """
+    A local stand-in for the Google spreadsheet: one row per sheet row, cells stored as a
+    JSON array of the displayed values, so worksheets and columns keep the Sheets layout.
+    """
+
+    def __init__(self, path: str = SQLITE_PATH):
+        self.path = path
+        self.lock = threading.RLock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        with self.db:
+            if path != ":memory:":
+                self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS worksheets (sheet_id INTEGER PRIMARY KEY, title TEXT UNIQUE NOT NULL)"
+            )
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS sheet_rows ("
+                " sheet_id INTEGER NOT NULL, row INTEGER NOT NULL, cells TEXT NOT NULL,"
+                " PRIMARY KEY (sheet_id, row)) WITHOUT ROWID"
+            )
+
+    @property
+    def id(self) -> str:
+        return f"sqlite:{self.path}"
+
+    def worksheets(self) -> List[SQLiteWorksheet]:
+        with self.lock:
+            rows = self.db.execute("SELECT sheet_id, title FROM worksheets ORDER BY sheet_id").fetchall()
+        return [SQLiteWorksheet(self, title, sheet_id) for sheet_id, title in rows]
+
+    def worksheet(self, title: str) -> SQLiteWorksheet:
+        with self.lock:
+            row = self.db.execute("SELECT sheet_id FROM worksheets WHERE title = ?", (title,)).fetchone()
+        if not row:
+            raise WorksheetNotFound(title)
+        return SQLiteWorksheet(self, title, row[0])
+
+    def add_worksheet(self, title: str, rows: int = 1000, cols: int = 26, **kwargs) -> SQLiteWorksheet:
+        with self.lock, self.db:
+            cursor = self.db.execute("INSERT INTO worksheets (title) VALUES (?)", (title,))
+        return SQLiteWorksheet(self, title, cursor.lastrowid)
+
+    def import_from(self, source, titles: Optional[List[str]] = None) -> int:
+        """
+        Copies worksheets (all, or the given titles) from another spreadsheet, e.g. the live
+        gspread one, replacing any local copy. Returns the number of rows copied.
+        """
+        copied = 0
+        for ws in source.worksheets():
+            if titles and ws.title not in titles:
+                continue
+            values = ws.get_all_values()
+            try:
+                local = self.worksheet(ws.title)
+            except WorksheetNotFound:
+                local = self.add_worksheet(ws.title)
+            with self.lock, self.db:
+                self.db.execute("DELETE FROM sheet_rows WHERE sheet_id = ?", (local.id,))
+            local._write_rows({i + 1: list(row) for i, row in enumerate(values)})
+            copied += len(values)
+        return copied
@@ -0,0 +1,238 @@
+import bisect
+import contextlib
+import contextvars
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .storage import split_range
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...]):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1.0):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def value(self, *label_values: str) -> float:
+        with self._lock:
+            return self._values.get(label_values, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, label_values)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...], buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, *label_values: str):
+        slot = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.setdefault(label_values, [[0] * (len(self.buckets) + 1), 0.0])
+            series[0][slot] += 1
+            series[1] += seconds
+
+    def count(self, *label_values: str) -> int:
+        with self._lock:
+            series = self._series.get(label_values)
+            return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, (counts, total) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else _number(bound)
+                    lines.append(f"{self.name}_bucket{_labels(self.labels + ('le',), label_values + (le,))} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.labels, label_values)} {_number(total)}")
+                lines.append(f"{self.name}_count{_labels(self.labels, label_values)} {cumulative}")
+        return lines
+
+
+def _labels(names, values) -> str:
+    if not names:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, escaped)) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class MetricsRegistry:
+    """Counters and histograms rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, help_text, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help_text, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collect):
+        """Registers a function returning extra exposition lines, read at scrape time."""
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            lines.extend(collect())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+sheets_call_seconds = registry.histogram(
+    "sheets_api_call_duration_seconds", "Duration of Sheets API calls.", ("operation", "worksheet"),
+)
+sheets_calls_total = registry.counter(
+    "sheets_api_calls_total", "Sheets API calls by outcome (ok, error, rate_limited).", ("operation", "worksheet", "outcome"),
+)
+sheets_quota_wait_seconds = registry.counter(
+    "sheets_quota_wait_seconds_total", "Time spent waiting for Sheets quota before calls.", ("kind",),
+)
+request_seconds = registry.histogram(
+    "http_request_duration_seconds", "Duration of HTTP requests.", ("method", "route", "status"),
+)
+request_sheets_calls = registry.histogram(
+    "http_request_sheets_api_calls", "Sheets API calls made while handling a request.", ("method", "route"),
+    buckets=(0, 1, 2, 3, 4, 6, 8, 12, 16, 32),
+)
+
+
+class RequestTrace:
+    """The Sheets calls made on behalf of one request, in call order."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        # (operation, worksheet, seconds)
+        self.calls: List[Tuple[str, str, float]] = []
+        self.quota_wait = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, operation: str, worksheet: str, seconds: float):
+        with self._lock:
+            self.calls.append((operation, worksheet, seconds))
+
+    def record_wait(self, seconds: float):
+        with self._lock:
+            self.quota_wait += seconds
+
+    def server_timing(self) -> str:
+        """Server-Timing header value: totals first, then one entry per (operation, worksheet)."""
+        with self._lock:
+            calls = list(self.calls)
+            quota_wait = self.quota_wait
+        grouped: Dict[Tuple[str, str], List[float]] = {}
+        for operation, worksheet, seconds in calls:
+            grouped.setdefault((operation, worksheet), []).append(seconds)
+        entries = [
+            f'app;dur={_ms(time.perf_counter() - self.started)}',
+            f'sheets;dur={_ms(sum(s for _, _, s in calls))};desc="{len(calls)} calls"',
+        ]
+        if quota_wait:
+            entries.append(f"sheets-quota-wait;dur={_ms(quota_wait)}")
+        for (operation, worksheet), durations in grouped.items():
+            name = _token(f"sheets-{operation}-{worksheet}" if worksheet else f"sheets-{operation}")
+            desc = f"{operation} {worksheet}".strip()
+            entries.append(f'{name};dur={_ms(sum(durations))};desc="{desc} x{len(durations)}"')
+        return ", ".join(entries)
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.1f}"
+
+
+def _token(name: str) -> str:
+    # Server-Timing metric names are HTTP tokens
+    return re.sub(r"[^A-Za-z0-9!#$%&'*+.^_`|~-]", "_", name)
+
+
+_current_trace = contextvars.ContextVar("sheets_request_trace", default=None)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+
+@contextlib.contextmanager
+def request_trace():
+    """Attributes the Sheets calls made inside the block (and the threads it hands work to) to one trace."""
+    trace = RequestTrace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+def call_labels(func, args, kwargs) -> Tuple[str, str]:
+    """(operation, worksheet) for a gspread call, e.g. ("get_all_values", "Partners")."""
+    operation = getattr(func, "__name__", "call")
+    target = getattr(func, "__self__", None)
+    # Worksheets know their spreadsheet; a spreadsheet's title is the workbook's, not a worksheet's
+    title = getattr(target, "title", None) if hasattr(target, "spreadsheet") else None
+    if isinstance(title, str):
+        return operation, title
+    first = args[0] if args else None
+    if isinstance(first, str):
+        return operation, first
+    if "title" in kwargs:
+        return operation, str(kwargs["title"])
+    if isinstance(first, dict):
+        # values_batch_update body
+        first = [d.get("range", "") for d in first.get("data", [])]
+    if isinstance(first, (list, tuple)):
+        names = sorted({split_range(r)[0] for r in first if isinstance(r, str)})
+        return operation, ",".join(names)
+    return operation, ""
+
+
+def observe_call(operation: str, worksheet: str, seconds: float, outcome: str = "ok"):
+    sheets_call_seconds.observe(seconds, operation, worksheet)
+    sheets_calls_total.inc(operation, worksheet, outcome)
+    trace = current_trace()
+    if trace is not None:
+        trace.record(operation, worksheet, seconds)
+
+
+def observe_quota_wait(kind: str, seconds: float):
+    if seconds <= 0:
+        return
+    sheets_quota_wait_seconds.inc(kind, amount=seconds)
+    trace = current_trace()
+    if trace is not None:
+        trace.record_wait(seconds)
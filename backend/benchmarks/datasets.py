@@ -0,0 +1,118 @@
+"""
+Synthetic workbooks in the production worksheet/column layouts, for benchmarks.
+
+Data is deterministic for a given (rows, seed). Referrals follow a heavy-tailed
+distribution, so every size has a few partners past the Sage (6) and Master (16)
+book-purchase thresholds.
+"""
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from app.fake_sheets import SHEET_HEADERS
+
+START = datetime(2025, 1, 1)
+STATES = ["Lagos", "Abuja", "Rivers", "Oyo", "Kano", "Enugu", "Kaduna", "Edo"]
+ACTIVITY_TYPES = ["Browsing", "Social Share", "Registration", "Book Purchase", "Distributor Setup", "Payout"]
+MILESTONE_TYPES = ["partner", "network_spread", "distributor", "book_purchase"]
+BROADCAST_TYPES = ["sage_rank", "master_rank"]
+
+# Rows per worksheet relative to the Partners row count
+SCALE = {
+    "Partners": 1.0,
+    "ActivityLog": 1.0,
+    "ReferralMilestones": 0.5,
+    "UserOnboarding": 1.0,
+    "GlobalNotifications": 0.01,
+}
+
+
+def partner_email(i: int) -> str:
+    return f"partner{i}@example.com"
+
+
+def partner_code(i: int) -> str:
+    return f"P{i:07d}"
+
+
+def _timestamp(rng: random.Random, days: int = 400) -> str:
+    return (START + timedelta(seconds=rng.randrange(days * 86400))).isoformat()
+
+
+def _referrer(rng: random.Random, partners: int) -> int:
+    # Pareto-distributed index: a small head of partners gets most of the referrals
+    return min(partners - 1, int(rng.paretovariate(1.1)) - 1)
+
+
+def partners(count: int, rng: random.Random, password_hash: str = "x") -> List[List]:
+    width = len(SHEET_HEADERS["Partners"])
+    rows = []
+    for i in range(count):
+        points = round(rng.expovariate(0.5), 1)
+        row = [""] * width
+        row[:9] = [
+            partner_email(i), password_hash, f"Partner {i} Surname{i % 97}", partner_code(i),
+            points, round(points * 100, 2), round(rng.expovariate(0.01), 2), rng.randrange(120), "PENDING",
+        ]
+        row[9:12] = ["Bank", f"Partner {i}", f"{rng.randrange(10 ** 10):010d}"]
+        row[12] = partner_code(_referrer(rng, i)) if i else ""
+        row[14] = _timestamp(rng)
+        row[15:19] = ["TRUE" if i == 0 else "FALSE", "TRUE", "TRUE", 0.0]
+        row[23:25] = [rng.choice(STATES), "Nigeria"]
+        rows.append(row)
+    return rows
+
+
+def activity_log(count: int, partner_count: int, rng: random.Random) -> List[List]:
+    rows = []
+    for _ in range(count):
+        kind = rng.choice(ACTIVITY_TYPES)
+        status = rng.choice(["PENDING", "PENDING", "COMPLETED", "PENDING_VERIFICATION"])
+        rows.append([
+            _timestamp(rng), partner_code(_referrer(rng, partner_count)), kind, 5.0 if kind == "Book Purchase" else 0.1,
+            f"Referee: {partner_email(rng.randrange(partner_count))}", "", status,
+        ])
+    return rows
+
+
+def referral_milestones(count: int, partner_count: int, rng: random.Random) -> List[List]:
+    rows = []
+    for i in range(count):
+        kind = rng.choice(MILESTONE_TYPES)
+        referee = partner_email(rng.randrange(partner_count))
+        rows.append([
+            _timestamp(rng), partner_email(_referrer(rng, partner_count)), referee, kind,
+            5.0 if kind == "book_purchase" else 0.1, f"{referee}_{kind}_{i}",
+        ])
+    return rows
+
+
+def user_onboarding(count: int, rng: random.Random) -> List[List]:
+    flag = lambda p: "TRUE" if rng.random() < p else "FALSE"
+    return [[partner_email(i), flag(0.8), flag(0.6), flag(0.1), flag(0.2), _timestamp(rng)] for i in range(count)]
+
+
+def global_notifications(count: int, partner_count: int, rng: random.Random) -> List[List]:
+    rows = []
+    for _ in range(count):
+        kind = rng.choice(BROADCAST_TYPES)
+        rows.append([_timestamp(rng), kind, f"Partner {rng.randrange(partner_count)}", rng.choice(STATES), f"{kind} alert"])
+    return rows
+
+
+def synthetic_workbook(rows: int, seed: int = 0, password_hash: str = "x") -> Dict[str, List[List]]:
+    """Every production worksheet, with `rows` partners and the other sheets scaled per SCALE."""
+    rng = random.Random(seed)
+    sizes = {title: max(1, int(rows * factor)) for title, factor in SCALE.items()}
+    n = sizes["Partners"]
+    data = {
+        "Partners": partners(n, rng, password_hash),
+        "ActivityLog": activity_log(sizes["ActivityLog"], n, rng),
+        "ReferralMilestones": referral_milestones(sizes["ReferralMilestones"], n, rng),
+        "UserOnboarding": user_onboarding(sizes["UserOnboarding"], rng),
+        "GlobalNotifications": global_notifications(sizes["GlobalNotifications"], n, rng),
+    }
+    workbook = {title: [list(headers)] for title, headers in SHEET_HEADERS.items()}
+    for title, values in data.items():
+        workbook[title].extend(values)
+    return workbook
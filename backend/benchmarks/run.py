@@ -0,0 +1,188 @@
+"""
+Endpoint benchmarks against synthetic data.
+
+Drives the ASGI app in-process with sheets_client pointed at an in-memory FakeSpreadsheet
+filled by benchmarks.datasets, and prints one JSON document with latency percentiles,
+peak traced memory and Sheets API call counts per (size, endpoint):
+
+    cd backend
+    python -m benchmarks.run --sizes 1000,10000,100000 --repeat 20 --output bench.json
+
+Latencies are reported for cold requests (caches dropped first, as on a fresh serverless
+instance) and warm ones (served from the read-through cache). --latency adds a fixed delay
+to every fake API call to approximate the network round trip. 1M rows needs several GB
+of RAM.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from fastapi_users.password import PasswordHelper
+from httpx import ASGITransport, AsyncClient
+
+from app.auth import user_cache
+from app.fake_sheets import FakeSpreadsheet
+from app.main import app
+from app.quota import QuotaScheduler
+from app.sheets import sheets_client
+
+from .datasets import partner_email, synthetic_workbook
+
+PASSWORD = "benchmark-password"
+
+# name -> (path, signed-in partner index or None); partner 0 is the superuser
+ENDPOINTS = {
+    "leaderboard": ("/referral/leaderboard", None),
+    "stats": ("/referral/stats", 0),
+    "monthly-csv": ("/referral/report/monthly/csv?month=6&year=2025", 0),
+    "masters": ("/referral/masters", None),
+}
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+
+    def pick(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    stats = {
+        "p50_ms": pick(50), "p90_ms": pick(90), "p99_ms": pick(99),
+        "mean_ms": sum(ordered) / len(ordered), "min_ms": ordered[0], "max_ms": ordered[-1],
+    }
+    return {key: round(value, 3) for key, value in stats.items()}
+
+
+def reset_caches(fake: FakeSpreadsheet):
+    sheets_client.use_spreadsheet(fake)
+    user_cache.clear()
+
+
+async def timed_get(client: AsyncClient, path: str, headers: dict) -> float:
+    started = time.perf_counter()
+    response = await client.get(path, headers=headers)
+    elapsed = (time.perf_counter() - started) * 1000
+    if response.status_code >= 400:
+        raise RuntimeError(f"GET {path} answered {response.status_code}: {response.text[:200]}")
+    return elapsed
+
+
+async def bench_endpoint(client, fake, path, headers, repeat):
+    cold, warm = [], []
+    for _ in range(repeat):
+        reset_caches(fake)
+        cold.append(await timed_get(client, path, headers))
+    for _ in range(repeat):
+        warm.append(await timed_get(client, path, headers))
+
+    # One more cold request for call counts and traced memory (tracemalloc skews timings)
+    reset_caches(fake)
+    fake.reset_calls()
+    tracemalloc.start()
+    try:
+        await timed_get(client, path, headers)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "cold": percentiles(cold),
+        "warm": percentiles(warm),
+        "peak_memory_bytes": peak,
+        "api_calls": {
+            "reads": fake.call_count(kind="read"),
+            "writes": fake.call_count(kind="write"),
+            "by_operation": {f"{op}:{title or ''}": n for (op, title), n in sorted(fake.calls.items(), key=str)},
+        },
+    }
+
+
+async def bench_size(rows, endpoints, repeat, latency, seed):
+    workbook = synthetic_workbook(rows, seed=seed, password_hash=PasswordHelper().hash(PASSWORD))
+    fake = FakeSpreadsheet(workbook, latency=latency)
+    reset_caches(fake)
+    results = {}
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        tokens = {}
+        for name in endpoints:
+            path, signed_in = ENDPOINTS[name]
+            headers = {}
+            if signed_in is not None:
+                if signed_in not in tokens:
+                    login = await client.post(
+                        "/auth/jwt/login", data={"username": partner_email(signed_in), "password": PASSWORD}
+                    )
+                    tokens[signed_in] = login.json()["access_token"]
+                headers["Authorization"] = f"Bearer {tokens[signed_in]}"
+            results[name] = await bench_endpoint(client, fake, path, headers, repeat)
+    return {"rows": {title: len(values) - 1 for title, values in workbook.items() if len(values) > 1}, "endpoints": results}
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def run(sizes, endpoints=None, repeat=10, latency=0.0, seed=0, quiet=True):
+    """Runs the suite and returns the report as a dict."""
+    endpoints = endpoints or list(ENDPOINTS)
+    previous = (sheets_client._sheet, sheets_client.quota, set(sheets_client.write_behind_sheets))
+    sheets_client.quota = QuotaScheduler(reads_per_minute=0, writes_per_minute=0)
+    sheets_client.write_behind_sheets = set()
+    report = {
+        "created": datetime.now().isoformat(),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "repeat": repeat,
+        "latency_s": latency,
+        "sizes": {},
+    }
+    # The handlers log every request; keep that out of the report
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull if quiet else sys.stdout):
+        try:
+            for rows in sizes:
+                report["sizes"][str(rows)] = asyncio.run(bench_size(rows, endpoints, repeat, latency, seed))
+        finally:
+            sheets_client.use_spreadsheet(previous[0])
+            sheets_client.quota, sheets_client.write_behind_sheets = previous[1], previous[2]
+            user_cache.clear()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated Partners row counts")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="comma-separated subset of: " + ", ".join(ENDPOINTS))
+    parser.add_argument("--repeat", type=int, default=10, help="cold and warm requests per endpoint")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every fake API call")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+
+    report = json.dumps(run(sizes, endpoints, args.repeat, args.latency, args.seed), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
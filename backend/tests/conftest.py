@@ -0,0 +1,134 @@
+import asyncio
+import contextlib
+
+import pytest
+from fastapi_users.password import PasswordHelper
+
+from app import auth
+from app.auth import user_cache
+from app.fake_sheets import SHEET_HEADERS, FakeSpreadsheet, empty_workbook
+from app.quota import QuotaScheduler
+from app.sheets import sheets_client
+
+PASSWORD = "correct-horse-battery"
+HASHED_PASSWORD = PasswordHelper().hash(PASSWORD)
+
+
+def partner(email, name, code, points=0.0, referred_by="", superuser=False, verified=True, referrals=0, last_payout=0.0):
+    row = [""] * len(SHEET_HEADERS["Partners"])
+    row[:9] = [email, HASHED_PASSWORD, name, code, points, points * 100, 0.0, referrals, "PENDING"]
+    row[12] = referred_by
+    row[14] = "2026-01-05T10:00:00"
+    row[15:19] = ["TRUE" if superuser else "FALSE", "TRUE", "TRUE" if verified else "FALSE", last_payout]
+    row[23] = "Lagos"
+    return row
+
+
+def workbook():
+    """The production layout with an admin, two partners and a few rows in each log sheet."""
+    sheets = {title: [list(headers)] for title, headers in SHEET_HEADERS.items()}
+    sheets["Partners"] += [
+        partner("admin@example.com", "Admin User", "ADMIN0", superuser=True),
+        partner("ada@example.com", "Ada Obi", "ADA1", points=3.0, referrals=60, last_payout=150.0),
+        partner("bola@example.com", "Bola Ade", "BOLA2", referred_by="ADA1", verified=False),
+    ]
+    sheets["ActivityLog"] += [
+        ["2026-01-06T10:00:00", "ADA1", "Registration", 0.1, "Referee: bola@example.com", "", "PENDING"],
+        ["2026-01-07T10:00:00", "ADA1", "Social Share", 0.0, "Shared via x", "", "PENDING"],
+    ]
+    sheets["ReferralMilestones"] += [
+        ["2026-01-08T10:00:00", "ada@example.com", "chi@example.com", "book_purchase", 5.0, "chi@example.com_book_purchase"],
+    ]
+    sheets["GlobalNotifications"] += [["2026-01-08T10:00:00", "sage_rank", "Ada Obi", "Lagos", "Community Alert"]]
+    sheets["UserOnboarding"] += [
+        ["ada@example.com", "TRUE", "TRUE", "FALSE", "FALSE", "2026-01-05T10:00:00"],
+        ["bola@example.com", "FALSE", "FALSE", "FALSE", "FALSE", "2026-01-06T10:00:00"],
+    ]
+    sheets["Reviews"] += [["r1", "Jane Doe", "Doctor", "", 5, "Great", "pending", "2026-01-05T10:00:00", ""]]
+    sheets["Delivery Pricing"] += [["Lagos", 1500, "TRUE"]]
+    return sheets
+
+
+def seed_workbook(fake: FakeSpreadsheet, sheets=None) -> FakeSpreadsheet:
+    """Fills the fake with workbook(), or with the given (usually extended) copy of it."""
+    for title, values in (workbook() if sheets is None else sheets).items():
+        fake.seed(title, values)
+    return fake
+
+
+async def login(client, email: str, password: str = PASSWORD) -> dict:
+    """The Authorization header of a user logged in through /auth/jwt/login."""
+    response = await client.post("/auth/jwt/login", data={"username": email, "password": password})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+@pytest.fixture
+def anyio_backend():
+    # The app is asyncio-only: auth hooks use asyncio.create_task, streams call_soon_threadsafe
+    return "asyncio"
+
+
+@pytest.fixture
+def fake_sheets():
+    """Points the app's sheets_client at an in-memory spreadsheet with the production layout."""
+    fake = FakeSpreadsheet(empty_workbook())
+    previous_sheet, previous_quota = sheets_client._sheet, sheets_client.quota
+    sheets_client.use_spreadsheet(fake)
+    sheets_client.quota = QuotaScheduler(reads_per_minute=0, writes_per_minute=0)
+    user_cache.clear()
+    yield fake
+    sheets_client.use_spreadsheet(previous_sheet)
+    sheets_client.quota = previous_quota
+    user_cache.clear()
+
+
+@pytest.fixture
+def seeded_sheets(fake_sheets):
+    """fake_sheets with workbook() in it."""
+    return seed_workbook(fake_sheets)
+
+
+class CallBudget:
+    """
+    Counts the Sheets calls made while handling one request and fails the test when they
+    exceed the budget:
+
+        async with sheets_budget(reads=1, writes=0):
+            response = await client.get("/referral/stats", headers=headers)
+
+    Every request starts from cold caches. Background tasks, tasks the request spawned
+    (emails, milestone credits) and its buffered appends are counted as part of it.
+    """
+
+    def __init__(self, fake: FakeSpreadsheet):
+        self.fake = fake
+        self.reads = 0
+        self.writes = 0
+        self.calls = {}
+
+    @contextlib.asynccontextmanager
+    async def __call__(self, reads: int, writes: int):
+        await sheets_client.aflush()
+        sheets_client.use_spreadsheet(self.fake)
+        user_cache.clear()
+        self.fake.reset_calls()
+        before = asyncio.all_tasks()
+        yield self
+        spawned = asyncio.all_tasks() - before - {asyncio.current_task()}
+        await asyncio.gather(*spawned, return_exceptions=True)
+        await sheets_client.aflush()
+
+        self.reads = self.fake.call_count(kind="read")
+        self.writes = self.fake.call_count(kind="write")
+        self.calls = {f"{op}({title or ''})": n for (op, title), n in sorted(self.fake.calls.items(), key=str)}
+        assert self.reads <= reads and self.writes <= writes, (
+            f"{self.reads} reads / {self.writes} writes over the budget of {reads} / {writes}: {self.calls}"
+        )
+
+
+@pytest.fixture
+def sheets_budget(fake_sheets, monkeypatch):
+    """Per-request Sheets call budgets; every append is sent on its own, as on Vercel."""
+    monkeypatch.setattr(sheets_client, "write_behind_sheets", set())
+    monkeypatch.setattr(auth.conf, "SUPPRESS_SEND", 1)
+    return CallBudget(fake_sheets)
@@ -0,0 +1,39 @@
+import uuid
+from datetime import datetime
+
+from app.auth import UserCache
+from app.models import User
+
+
+def make_user(email="ada@example.com", **overrides):
+    fields = dict(
+        id=uuid.uuid4(), email=email, hashed_password="x", is_active=True, is_superuser=False,
+        is_verified=True, name="Ada", referral_code="ADA1", date_joined=datetime(2026, 1, 1),
+    )
+    fields.update(overrides)
+    return User.model_validate(fields)
+
+
+def test_user_cache_hits_by_id_and_email():
+    cache = UserCache(ttl=60)
+    user = make_user()
+    cache.put(user)
+
+    assert cache.get_by_id(user.id).email == "ada@example.com"
+    assert cache.get_by_email(" ADA@example.com ").id == user.id
+    # Callers get copies, not the cached object
+    cache.get_by_id(user.id).name = "Changed"
+    assert cache.get_by_id(user.id).name == "Ada"
+
+
+def test_user_cache_invalidation_and_ttl():
+    cache = UserCache(ttl=60)
+    user = make_user()
+    cache.put(user)
+    cache.invalidate(email="ada@example.com")
+    assert cache.get_by_id(user.id) is None
+    assert cache.get_by_email("ada@example.com") is None
+
+    cache = UserCache(ttl=0)
+    cache.put(user)
+    assert cache.get_by_id(user.id) is None
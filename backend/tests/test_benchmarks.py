@@ -0,0 +1,21 @@
+from app.fake_sheets import SHEET_HEADERS
+from benchmarks.datasets import synthetic_workbook
+from benchmarks.run import ENDPOINTS, run
+
+
+def test_synthetic_workbook_uses_production_layout():
+    workbook = synthetic_workbook(200, seed=1)
+    assert workbook == synthetic_workbook(200, seed=1)
+    assert len(workbook["Partners"]) == 201 and len(workbook["ReferralMilestones"]) == 101
+    for title, values in workbook.items():
+        assert values[0] == SHEET_HEADERS[title]
+        assert all(len(row) == len(SHEET_HEADERS[title]) for row in values)
+
+
+def test_benchmark_report_covers_every_endpoint():
+    report = run([50], repeat=1)
+    endpoints = report["sizes"]["50"]["endpoints"]
+    assert set(endpoints) == set(ENDPOINTS)
+    for result in endpoints.values():
+        assert result["cold"]["p50_ms"] > 0 and result["peak_memory_bytes"] > 0
+        assert result["api_calls"]["reads"] >= 1 and result["api_calls"]["writes"] == 0
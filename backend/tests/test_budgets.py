@@ -0,0 +1,169 @@
+"""
+Sheets API call budgets per route, measured against the in-memory fake from cold caches.
+A change that adds another full sheet read to a route fails here; lower a budget when a
+route gets cheaper.
+"""
+import asyncio
+import contextlib
+import hashlib
+import hmac
+import json
+import os
+import uuid
+
+import pytest
+from fastapi_users.jwt import generate_jwt
+from fastapi_users.password import PasswordHelper
+from httpx import ASGITransport, AsyncClient
+
+from app.auth import SECRET, UserManager
+from app.main import app
+from tests.conftest import HASHED_PASSWORD, PASSWORD, login
+
+def user_id(email):
+    # Partners has no id column, so ids are derived from the email (see auth._partner_user_id)
+    return str(uuid.UUID(hashlib.md5(email.encode()).hexdigest()))
+
+
+def verify_token(email):
+    data = {"sub": user_id(email), "email": email, "aud": UserManager.verification_token_audience}
+    return generate_jwt(data, SECRET, 3600)
+
+
+def reset_token(email):
+    data = {
+        "sub": user_id(email),
+        "password_fgpt": PasswordHelper().hash(HASHED_PASSWORD),
+        "aud": UserManager.reset_password_token_audience,
+    }
+    return generate_jwt(data, SECRET, 3600)
+
+
+def paystack_request():
+    body = json.dumps({
+        "event": "charge.success",
+        "data": {"status": "success", "customer": {"email": "bola@example.com"}, "metadata": {"product": "book"}},
+    }).encode()
+    signature = hmac.new(os.getenv("PAYSTACK_SECRET_KEY", "").encode(), body, hashlib.sha512).hexdigest()
+    return {"content": body, "headers": {"x-paystack-signature": signature}}
+
+
+PAYMENT = {"event": "charge.success", "data": {"status": "success", "customer": {"email": "bola@example.com"}, "metadata": {"product": "book"}}}
+TRACK = {"refCode": "ADA1", "ip": "10.0.0.9", "userAgent": "pytest"}
+LEAD = {"email": "lead@example.com", "refCode": "ADA1"}
+DISTRIBUTOR = {"name": "Dan Dist", "phone": "08012345678", "whatsapp": "08012345678", "location": "Lagos", "refCode": "ADA1"}
+
+# (method, path, request kwargs, signed-in user, max reads, max writes)
+ROUTES = {
+    # routers/referral.py
+    "referrer-name": ("GET", "/referral/referrer-name", {"params": {"refCode": "ADA1"}}, None, 2, 0),
+    "log-activity": ("POST", "/referral/log-activity", {"json": {
+        "type": "Browsing", "refCode": "ADA1", "points": 0, "timestamp": "2026-01-09T10:00:00", "details": {}}}, None, 1, 1),
+    "capture-lead": ("POST", "/referral/capture-lead", {"json": LEAD}, None, 2, 1),
+    "subscribe-newsletter": ("POST", "/referral/subscribe-newsletter", {"json": LEAD}, None, 2, 1),
+    "distributor-lead": ("POST", "/referral/distributor-lead", {"json": DISTRIBUTOR}, None, 8, 4),
+    "record-share": ("POST", "/referral/record-share", {"json": TRACK}, None, 4, 3),
+    "record-visit": ("POST", "/referral/record-visit", {"json": TRACK}, None, 4, 3),
+    "audit-verify": ("GET", "/referral/audit/verify", {}, "admin@example.com", 3, 0),
+    "mock-register": ("POST", "/referral/debug/mock-register",
+                      {"params": {"email": "new@example.com", "refCode": "ADA1"}}, None, 3, 2),
+    "sync-all": ("GET", "/referral/debug/sync-all", {}, "admin@example.com", 2, 0),
+    "credit-purchase": ("POST", "/referral/credit-purchase", {"json": {"refCode": "ADA1", "email": "bola@example.com"}}, None, 6, 3),
+    "complete-purchase": ("POST", "/referral/complete-purchase", {"json": {"email": "bola@example.com"}}, None, 9, 7),
+    "paystack-webhook": ("POST", "/referral/paystack/webhook", paystack_request(), None, 9, 7),
+    "payment-success": ("POST", "/referral/webhook/payment-success", {"json": PAYMENT}, None, 9, 7),
+    "progress": ("GET", "/referral/progress", {}, "bola@example.com", 8, 4),
+    "recent-milestones": ("GET", "/referral/recent-milestones", {}, None, 1, 0),
+    "global-broadcasts": ("GET", "/referral/global-broadcasts", {}, None, 2, 0),
+    "update-progress": ("POST", "/referral/update-progress", {"json": {"email": "bola@example.com", "step": "distributor"}},
+                        "admin@example.com", 8, 4),
+    "mark-as-paid": ("POST", "/referral/mark-as-paid", {"json": {"email": "ada@example.com", "refCode": "ADA1"}},
+                     "admin@example.com", 5, 2),
+    "monthly-csv": ("GET", "/referral/report/monthly/csv", {"params": {"month": 1, "year": 2026}}, "admin@example.com", 4, 0),
+    "audit-revert": ("POST", "/referral/audit/revert", {"json": {"email": "ada@example.com", "refCode": "ADA1"}},
+                     "admin@example.com", 5, 2),
+    "shipping-rates": ("GET", "/referral/shipping-rates", {}, None, 2, 0),
+    "stats": ("GET", "/referral/stats", {}, "ada@example.com", 3, 0),
+    "masters": ("GET", "/referral/masters", {}, None, 1, 0),
+    "update-payout": ("POST", "/referral/update-payout", {"json": {
+        "refCode": "ADA1", "accountName": "Ada Obi", "accountNumber": "0123456789", "bankName": "Bank"}}, "ada@example.com", 2, 1),
+    "leaderboard": ("GET", "/referral/leaderboard", {}, None, 2, 0),
+    "rank": ("GET", "/referral/rank", {}, "bola@example.com", 2, 0),
+    "apply-milestone": ("POST", "/referral/apply-milestone", {"json": {"refCode": "ADA1", "tier": 50}}, "ada@example.com", 5, 2),
+    # routers/reviews.py
+    "reviews-list": ("GET", "/reviews/", {}, None, 2, 0),
+    "reviews-submit": ("POST", "/reviews/", {"json": {"name": "Jo", "jobTitle": "Nurse", "rating": 4, "text": "Useful"}}, None, 1, 1),
+    "reviews-moderate": ("PUT", "/reviews/r1", {"params": {"status": "approved"}}, "admin@example.com", 4, 2),
+    # fastapi_users auth routes
+    "login": ("POST", "/auth/jwt/login", {"data": {"username": "ada@example.com", "password": PASSWORD}}, None, 2, 0),
+    "logout": ("POST", "/auth/jwt/logout", {}, "ada@example.com", 2, 0),
+    "register": ("POST", "/auth/register", {"json": {
+        "email": "new@example.com", "password": PASSWORD, "name": "New User", "referral_code": "NEW9"}}, None, 4, 3),
+    "forgot-password": ("POST", "/auth/forgot-password", {"json": {"email": "ada@example.com"}}, None, 2, 0),
+    "reset-password": ("POST", "/auth/reset-password", {"json": {
+        "token": reset_token("ada@example.com"), "password": "another-battery"}}, None, 2, 1),
+    "request-verify-token": ("POST", "/auth/request-verify-token", {"json": {"email": "bola@example.com"}}, None, 2, 0),
+    "verify": ("POST", "/auth/verify", {"json": {"token": verify_token("bola@example.com")}}, None, 8, 5),
+    "users-me": ("GET", "/users/me", {}, "ada@example.com", 2, 0),
+    "users-me-update": ("PATCH", "/users/me", {"json": {"password": "another-battery"}}, "ada@example.com", 2, 1),
+    "users-get": ("GET", f"/users/{user_id('ada@example.com')}", {}, "admin@example.com", 2, 0),
+    "users-update": ("PATCH", f"/users/{user_id('ada@example.com')}", {"json": {"is_verified": True}}, "admin@example.com", 2, 1),
+    "users-delete": ("DELETE", f"/users/{user_id('bola@example.com')}", {}, "admin@example.com", 2, 0),
+}
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("route", ROUTES)
+async def test_route_stays_within_sheets_budget(route, seeded_sheets, sheets_budget):
+    method, path, kwargs, user, reads, writes = ROUTES[route]
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        headers = dict(kwargs.get("headers", {}))
+        if user:
+            headers.update(await login(client, user))
+
+        async with sheets_budget(reads=reads, writes=writes):
+            response = await client.request(method, path, **{**kwargs, "headers": headers})
+
+    assert response.status_code < 400, response.text
+
+
+@pytest.mark.anyio
+async def test_broadcast_stream_makes_no_sheets_calls(seeded_sheets, monkeypatch):
+    # Sends frames forever, so it is driven at the ASGI level instead of through ROUTES
+    from app.routers import referral
+
+    monkeypatch.setattr(referral, "SSE_HEARTBEAT_INTERVAL", 0.05)
+    # The app's startup seeds the feed; after that the hub serves the stream from memory
+    await referral.seed_live_feed()
+    seeded_sheets.reset_calls()
+
+    frames, received = [], asyncio.Event()
+
+    async def receive():
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            frames.append(message["body"].decode())
+            if len(frames) == 3:
+                received.set()
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": "/referral/broadcast-stream", "raw_path": b"/referral/broadcast-stream", "root_path": "",
+        "query_string": b"", "headers": [(b"host", b"test"), (b"last-event-id", b"2026-01-01T00:00:00")],
+        "client": ("127.0.0.1", 5000), "server": ("test", 80),
+    }
+    stream = asyncio.create_task(app(scope, receive, send))
+    try:
+        await asyncio.wait_for(received.wait(), 5)
+    finally:
+        stream.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await stream
+
+    assert frames[0].startswith("retry:")
+    assert '"username": "Ada Obi"' in frames[1]
+    assert frames[2] == ": heartbeat\n\n"
+    assert seeded_sheets.call_count(kind="read") == 0 and seeded_sheets.call_count(kind="write") == 0
@@ -0,0 +1,41 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.fake_sheets import FakeAPIError, FakeSpreadsheet
+from app.main import app
+from app.sheets import GoogleSheetsClient
+from tests.test_sheets import PARTNERS
+
+
+def test_fake_counts_calls_and_injects_failures():
+    fake = FakeSpreadsheet({"Partners": PARTNERS}, latency=lambda op, title: 0.0)
+    client = GoogleSheetsClient(spreadsheet=fake)
+
+    assert client.get_all_records("Partners")[1]["REFERRAL CODE"] == "BOLA2"
+    client.update_cell("Partners", 3, 5, 2.0)
+    client.append_row("Partners", ["c@example.com", "x", "Chi", "CHI3", 0.0, 0.0])
+    assert fake.values("Partners")[2][4] == "2"
+    assert fake.values("Partners")[3][0] == "c@example.com"
+    assert fake.call_count("get_all_values", "Partners") == 1
+    assert fake.call_count("worksheet") == 1
+    # append_row is one call even though the fake implements it with append_rows
+    assert fake.call_count("append_rows") == 0
+
+    fake.fail_next("update_cell", worksheet="Partners", error=FakeAPIError(503))
+    with pytest.raises(FakeAPIError):
+        client.update_cell("Partners", 2, 3, "Nope")
+    assert fake.values("Partners")[1][2] == "Ada Obi"
+
+
+@pytest.mark.anyio
+async def test_submit_review_lands_in_fake_sheet(fake_sheets):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.post("/reviews/", json={
+            "name": "Test Reviewer", "jobTitle": "Tester", "organization": "Test Org",
+            "rating": 5, "text": "Great book!"
+        })
+    assert response.status_code == 201
+    rows = fake_sheets.values("Reviews")
+    assert rows[1][1] == "Test Reviewer" and rows[1][6] == "pending"
+    assert fake_sheets.call_count("append_row", "Reviews") == 1
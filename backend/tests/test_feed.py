@@ -0,0 +1,128 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.fake_sheets import FakeSpreadsheet, empty_workbook
+from app.feed import FEED_SOURCES, FeedEvent, LiveFeed
+from app.main import app
+from app.routers.referral import _log_global_broadcast
+from app.sheets import GoogleSheetsClient, sheets_client
+from tests.conftest import seed_workbook, workbook
+
+
+def test_feed_is_bounded_and_time_ordered():
+    feed = LiveFeed(size=3)
+    for ts in ["2026-01-02", "2026-01-04", "2026-01-03", "2026-01-05", "2026-01-01"]:
+        feed.add(FeedEvent(ts, "purchase", ts))
+    assert [e["timestamp"] for e in feed.latest()] == ["2026-01-05", "2026-01-04", "2026-01-03"]
+    assert [e["timestamp"] for e in feed.latest(1)] == ["2026-01-05"]
+
+
+def test_feed_follows_appends_after_seeding():
+    sheets = empty_workbook()
+    sheets["ReferralMilestones"].append(["2026-01-08T10:00:00", "ada@example.com", "chi@example.com", "book_purchase", 5.0, "k1"])
+    sheets["GlobalNotifications"].append(["2026-01-09T10:00:00", "audit", "x", "", ""])
+    client = GoogleSheetsClient(spreadsheet=FakeSpreadsheet(sheets))
+    client.write_behind_sheets = set()
+    feed = client.live_feed
+
+    # Rows written before the seed are picked up by it, not counted twice
+    client.append_row("GlobalNotifications", ["2026-01-10T10:00:00", "sage_rank", "Ada Obi", "Lagos", "..."])
+    feed.seed(client.get_many_typed(FEED_SOURCES))
+    client.append_row("ReferralMilestones", ["2026-01-11T10:00:00", "ada@example.com", "dayo@example.com", "partner", 0.1, "k2"])
+    assert [(e["type"], e["text"]) for e in feed.latest()] == [
+        ("partner", "Dayo just reached Partner Status! 🎉"),
+        ("sage", "Ada Obi just achieved the rank of Sage! 🥈"),
+        ("purchase", "Chi just bought their Enchiridion guide (Book)! 📘"),
+    ]
+
+
+@pytest.mark.anyio
+async def test_recent_milestones_served_from_memory(seeded_sheets):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        first = (await client.get("/referral/recent-milestones")).json()
+        assert sorted(e["type"] for e in first) == ["purchase", "registration", "registration", "registration", "sage"]
+
+        _log_global_broadcast("master_rank", "Bola Ade", "Abuja")
+        sheets_client.invalidate()
+        seeded_sheets.reset_calls()
+        latest = (await client.get("/referral/recent-milestones")).json()
+        assert latest[0]["text"] == "Bola Ade just reached Enchiridion Mastery! 🏆"
+        assert seeded_sheets.call_count(kind="read") == 0
+
+
+class Disconnecting:
+    """Stands in for the request: the client goes away at the second heartbeat."""
+
+    def __init__(self):
+        self.checks = 0
+
+    async def is_disconnected(self):
+        self.checks += 1
+        return self.checks > 1
+
+
+@pytest.mark.anyio
+async def test_broadcast_stream_resumes_and_pushes(fake_sheets, monkeypatch):
+    from app.routers import referral
+
+    monkeypatch.setattr(referral, "SSE_HEARTBEAT_INTERVAL", 0.05)
+    now = datetime.now()
+    sheets = workbook()
+    sheets["GlobalNotifications"] += [
+        [(now - timedelta(minutes=m)).isoformat(), "sage_rank", f"User {m}", "Lagos", f"text {m}"] for m in (3, 2, 1)
+    ]
+    seed_workbook(fake_sheets, sheets)
+    await referral.seed_live_feed()
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        polled = (await client.get("/referral/global-broadcasts")).json()
+    assert [b["username"] for b in polled] == ["User 1", "User 2", "User 3"]
+
+    # Resume after "User 3": the two later broadcasts, then one pushed live, then a heartbeat
+    stream = referral._broadcast_stream(Disconnecting(), sheets["GlobalNotifications"][2][0])
+    frames = [await stream.__anext__() for _ in range(3)]
+    assert frames[0].startswith("retry:")
+    assert [json.loads(f.split("data: ")[1])["username"] for f in frames[1:]] == ["User 2", "User 1"]
+
+    fake_sheets.reset_calls()
+    await asyncio.get_running_loop().run_in_executor(None, _log_global_broadcast, "master_rank", "Bola Ade", "Abuja")
+    live = await stream.__anext__()
+    assert live.startswith("id: ") and "event: broadcast" in live and '"username": "Bola Ade"' in live
+    assert await stream.__anext__() == ": heartbeat\n\n"
+    with pytest.raises(StopAsyncIteration):
+        await stream.__anext__()
+    assert fake_sheets.call_count("get_all_values") == 0
+
+
+@pytest.mark.anyio
+async def test_other_instances_broadcasts_arrive_by_tail_read(seeded_sheets, monkeypatch):
+    from app.routers import referral
+
+    await referral.seed_live_feed()
+    queue = sheets_client.broadcasts.subscribe()
+
+    other = GoogleSheetsClient(spreadsheet=seeded_sheets)
+    other.write_behind_sheets = set()
+    other.append_row("GlobalNotifications", [datetime.now().isoformat(), "master_rank", "Chi Eze", "Enugu", "..."])
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        # Not due yet: served from memory without the new broadcast
+        assert (await client.get("/referral/global-broadcasts")).json() == []
+
+        monkeypatch.setattr(sheets_client.broadcasts, "refresh_interval", 0)
+        sheets_client._cache["GlobalNotifications"].fetched_at -= 3600
+        seeded_sheets.reset_calls()
+        await client.get("/referral/global-broadcasts")
+        assert seeded_sheets.call_count("values_batch_get") == 1 and seeded_sheets.call_count("get_all_values") == 0
+
+        polled = (await client.get("/referral/global-broadcasts")).json()
+        feed = (await client.get("/referral/recent-milestones")).json()
+    assert [b["username"] for b in polled] == ["Chi Eze"]
+    assert feed[0]["text"] == "Chi Eze just reached Enchiridion Mastery! 🏆"
+    pushed = await asyncio.wait_for(queue.get(), 1)
+    assert pushed.username == "Chi Eze"
+    sheets_client.broadcasts.unsubscribe(queue)
@@ -0,0 +1,83 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.fake_sheets import FakeSpreadsheet
+from app.main import app
+from app.sheets import GoogleSheetsClient, sheets_client
+from tests.conftest import login
+from tests.test_sheets import PARTNERS
+
+
+def names(board):
+    return [(entry["rank"], entry["name"], entry["points"]) for entry in board.top()]
+
+
+def test_leaderboard_follows_point_credits():
+    fake = FakeSpreadsheet({"Partners": PARTNERS + [["c@example.com", "x", "Chi", "CHI3", "0", "150"]]})
+    client = GoogleSheetsClient(spreadsheet=fake)
+    client.get_all_records("Partners")
+    board = client.leaderboard
+    # Revenue without points counts as points; ties keep sheet order
+    assert names(board) == [(1, "A. Obi", 1.5), (2, "Chi", 1.5), (3, "B. Ade", 0.0)]
+
+    client.update_range("Partners", "E3:F3", [[2.0, 200.0]])
+    client.append_row("Partners", ["d@example.com", "x", "Dayo Bello", "DAYO4", "9", "900"])
+    assert names(board) == [(1, "D. Bello", 9.0), (2, "B. Ade", 2.0), (3, "A. Obi", 1.5), (4, "Chi", 1.5)]
+    assert board.top(1)[0]["impact"] == "Elite Partner" and board.top()[3]["impact"] == "Gold Partner"
+    assert fake.call_count("get_all_values") == 1
+    assert not board.stale()
+
+    # A dropped cache means our copy may be off
+    client.invalidate("Partners")
+    assert board.stale()
+
+
+def test_rank_lookup_and_neighbours():
+    partners = [PARTNERS[0]] + [[f"p{i}@example.com", "x", f"Partner {i}", f"P{i}", str(i), ""] for i in range(10)]
+    client = GoogleSheetsClient(spreadsheet=FakeSpreadsheet({"Partners": partners}))
+    client.get_all_records("Partners")
+    board = client.leaderboard
+
+    rank = board.rank_of(" P7@Example.com ", neighbours=1)
+    assert (rank["rank"], rank["total"], rank["percentile"], rank["impact"]) == (3, 10, 80.0, "Platinum Partner")
+    assert [(n["rank"], n["points"], n["isYou"]) for n in rank["neighbours"]] == [(2, 8.0, False), (3, 7.0, True), (4, 6.0, False)]
+    assert [n["rank"] for n in board.rank_of("p9@example.com")["neighbours"]] == [1, 2, 3]
+    assert board.rank_of("nobody@example.com") is None
+
+    # A credit moves the partner; the lookup follows
+    client.update_range("Partners", "E2:F2", [[20.0, 2000.0]])
+    assert board.rank_of("p0@example.com")["rank"] == 1
+    assert board.rank_of("p9@example.com")["rank"] == 2
+
+
+@pytest.mark.anyio
+async def test_leaderboard_endpoint_serves_from_memory(seeded_sheets):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        first = (await client.get("/referral/leaderboard")).json()
+        assert [e["email"] for e in first] == ["ada@example.com", "admin@example.com", "bola@example.com"]
+
+        # The Partners cache expiring does not cost the endpoint a call
+        sheets_client.invalidate("Partners")
+        seeded_sheets.reset_calls()
+        assert (await client.get("/referral/leaderboard")).json() == first
+        assert seeded_sheets.call_count() == 1  # the background reconciliation, not the request
+
+        values = seeded_sheets.values("Partners")
+        values[3][4] = "7"
+        seeded_sheets.seed("Partners", values)
+        sheets_client.leaderboard.reconcile_interval = 0
+        sheets_client.invalidate("Partners")
+        await client.get("/referral/leaderboard")
+        assert (await client.get("/referral/leaderboard")).json()[0]["email"] == "bola@example.com"
+
+
+@pytest.mark.anyio
+async def test_rank_endpoint(seeded_sheets):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        headers = await login(client, "bola@example.com")
+        response = await client.get("/referral/rank", params={"neighbours": 1}, headers=headers)
+        assert (await client.get("/referral/rank")).status_code == 401
+
+    body = response.json()
+    assert body["rank"] == 3 and body["total"] == 3 and body["percentile"] == 33.3
+    assert [n["name"] for n in body["neighbours"]] == ["A. User", "B. Ade"]
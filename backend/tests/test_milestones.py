@@ -0,0 +1,138 @@
+import uuid
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.auth import GoogleSheetsUserDatabase, User, UserManager
+from app.fake_sheets import FakeSpreadsheet
+from app.main import app
+from app.routers.referral import _credit_purchase_background
+from app.sheets import GoogleSheetsClient, sheets_client
+from tests.conftest import seed_workbook, workbook
+
+MILESTONE_HEADERS = ["Timestamp", "ReferrerEmail", "RefereeEmail", "MilestoneType", "PointsAwarded", "UniqueKey"]
+
+
+def purchases(referrer, count, day=1):
+    return [
+        [f"2026-02-{day + i:02d}T10:00:00", referrer, f"r{day + i}@example.com", "book_purchase", 5.0, f"r{day + i}_book_purchase"]
+        for i in range(count)
+    ]
+
+
+def test_legacy_ranks_follow_appends_and_edits():
+    rows = purchases("Ada@Example.com", 5, day=2) + [["2026-01-01T10:00:00", "ada@example.com", "x", "partner", 1.0, "x_partner"]]
+    client = GoogleSheetsClient(spreadsheet=FakeSpreadsheet({"ReferralMilestones": [MILESTONE_HEADERS] + rows}))
+    ranks = client.get_view("ReferralMilestones", "legacy_ranks")
+    assert ranks.rank_data("ada@example.com") == {"rank": "Seeker", "soulsGuided": 5, "masteryDate": None}
+
+    # An out-of-order timestamp still dates the rank by the 6th purchase in time
+    client.append_row("ReferralMilestones", purchases("ada@example.com", 1, day=1)[0])
+    assert ranks.rank_data(" ADA@example.com ") == {"rank": "Sage", "soulsGuided": 6, "masteryDate": "2026-02-06T10:00:00"}
+
+    client.update_range("ReferralMilestones", "D2", [["refund"]])
+    assert ranks.count("ada@example.com") == 5 and ranks.get("ada@example.com").rank == "Seeker"
+
+    for row in purchases("ada@example.com", 11, day=10):
+        client.append_row("ReferralMilestones", row)
+    assert ranks.masters() == ["ada@example.com"]
+    assert ranks.get("ada@example.com").mastery_date == "2026-02-20T10:00:00"
+    assert client.get_view("ReferralMilestones", "legacy_ranks") is ranks
+
+
+@pytest.mark.anyio
+async def test_masters_and_rank_up_read_the_aggregate(fake_sheets):
+    sheets = workbook()
+    sheets["ReferralMilestones"] += purchases("bola@example.com", 16) + purchases("ada@example.com", 4, day=20)
+    seed_workbook(fake_sheets, sheets)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        masters = (await client.get("/referral/masters")).json()
+        assert [(m["username"], m["soulsGuided"], m["masteryDate"]) for m in masters] == [
+            ("Bola Ade", 16, "2026-02-16T10:00:00")
+        ]
+
+        # A 6th purchase reaches Sage: a broadcast, and no rescan of the milestones
+        fake_sheets.reset_calls()
+        _credit_purchase_background("ADA1", "new@example.com")
+        assert fake_sheets.call_count("get_all_values", worksheet="ReferralMilestones") == 0
+        sheets_client.flush()
+        assert [row[1] for row in fake_sheets.values("GlobalNotifications")[1:]] == ["sage_rank", "sage_rank"]
+        assert sheets_client.get_view("ReferralMilestones", "legacy_ranks").get("ada@example.com").rank == "Sage"
+
+
+def test_milestone_keys_claim_once_and_follow_appends(tmp_path):
+    rows = [MILESTONE_HEADERS, ["2026-01-01", "ada@example.com", "b@example.com", "partner", 0.1, "B@example.com_partner"]]
+    fake = FakeSpreadsheet({"ReferralMilestones": rows})
+    client = GoogleSheetsClient(spreadsheet=fake)
+    client.write_behind_sheets = set()
+    client.milestone_keys.path = str(tmp_path / "keys.txt")
+
+    assert not client.claim_milestone(" b@example.com_partner ")
+    # Concurrent credits for one milestone: only the first claim wins until it is released
+    assert client.claim_milestone("c@example.com_partner")
+    assert not client.claim_milestone("c@example.com_partner")
+    client.append_row("ReferralMilestones", ["2026-01-02", "ada@example.com", "c@example.com", "partner", 0.1, "c@example.com_partner"])
+    client.release_milestone("c@example.com_partner")
+    assert not client.claim_milestone("c@example.com_partner")
+    assert client.claim_milestone("d@example.com_partner")
+    client.release_milestone("d@example.com_partner")
+    assert client.claim_milestone("d@example.com_partner")
+    assert fake.call_count("get_all_values") == 1
+
+    # A restart reads the keys from the file and only the rows added since
+    fake.seed("ReferralMilestones", fake.values("ReferralMilestones") + [["2026-01-03", "x", "e@example.com", "partner", "0.1", "e@example.com_partner"]])
+    restarted = GoogleSheetsClient(spreadsheet=fake)
+    restarted.milestone_keys.path = client.milestone_keys.path
+    fake.reset_calls()
+    assert not restarted.claim_milestone("b@example.com_partner")
+    assert not restarted.claim_milestone("c@example.com_partner")
+    assert not restarted.claim_milestone("e@example.com_partner")
+    assert fake.call_count("get_all_values") == 0
+
+
+def test_keys_recorded_by_another_client_are_refused():
+    fake = FakeSpreadsheet({"ReferralMilestones": [MILESTONE_HEADERS]})
+    first, second = GoogleSheetsClient(spreadsheet=fake), GoogleSheetsClient(spreadsheet=fake)
+    for client in (first, second):
+        client.write_behind_sheets = set()
+        assert client.claim_milestone("warmup")
+        client.release_milestone("warmup")
+
+    assert first.claim_milestone("b@example.com_partner")
+    first.append_row("ReferralMilestones", ["2026-01-02", "ada@example.com", "b@example.com", "partner", 0.1, "b@example.com_partner"])
+    first.release_milestone("b@example.com_partner")
+
+    # Once its snapshot expires, the second client's claim catches up by the tail first
+    second._cache["ReferralMilestones"].fetched_at -= 3600
+    fake.reset_calls()
+    assert not second.claim_milestone("b@example.com_partner")
+    assert fake.call_count("values_batch_get") == 1 and fake.call_count("get_all_values") == 0
+
+    # A full reload feeds the keys too
+    first.append_row("ReferralMilestones", ["2026-01-03", "ada@example.com", "c@example.com", "partner", 0.1, "c@example.com_partner"])
+    second.invalidate("ReferralMilestones")
+    second.get_all_records("ReferralMilestones")
+    assert not second.claim_milestone("c@example.com_partner")
+
+
+@pytest.mark.anyio
+async def test_failed_key_load_fails_closed(fake_sheets):
+    sheets = workbook()
+    seed_workbook(fake_sheets, sheets)
+
+    # A transient lookup failure must not leave an empty set behind that lets the key through
+    fake_sheets.fail_next(operation="worksheet", worksheet="ReferralMilestones")
+    with pytest.raises(Exception):
+        sheets_client.claim_milestone("chi@example.com_book_purchase")
+    assert not sheets_client.milestone_keys.loaded
+
+    # Nor is the referrer credited when the keys cannot be read
+    fake_sheets.fail_next("get_all_values", worksheet="ReferralMilestones")
+    manager = UserManager(GoogleSheetsUserDatabase(User, uuid.UUID))
+    await manager.record_milestone_and_credit("ada@example.com", "dayo@example.com", "partner", 0.1)
+    assert fake_sheets.call_count(kind="write") == 0
+    assert len(fake_sheets.values("ReferralMilestones")) == len(sheets["ReferralMilestones"])
+
+    assert not sheets_client.claim_milestone("chi@example.com_book_purchase")
+    assert sheets_client.milestone_keys.loaded
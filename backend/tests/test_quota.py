@@ -0,0 +1,54 @@
+import threading
+import time
+
+from app.quota import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, QuotaScheduler, call_priority
+from tests.test_sheets import PARTNERS, make_client
+
+
+def test_waiting_interactive_calls_go_before_background_ones():
+    quota = QuotaScheduler(reads_per_minute=600, writes_per_minute=600)
+    for _ in range(600):
+        quota.acquire("read")
+    order = []
+
+    def call(name, priority):
+        quota.acquire("read", priority)
+        order.append(name)
+
+    background = threading.Thread(target=call, args=("background", PRIORITY_BACKGROUND))
+    background.start()
+    time.sleep(0.02)
+    interactive = threading.Thread(target=call, args=("interactive", PRIORITY_INTERACTIVE))
+    interactive.start()
+    background.join(2)
+    interactive.join(2)
+
+    assert order == ["interactive", "background"]
+    # Writes have their own budget
+    quota.acquire("write")
+
+
+class RateLimited(Exception):
+    code = 429
+
+    class response:
+        headers = {"Retry-After": "0"}
+
+
+def test_rate_limited_calls_are_retried():
+    client = make_client(Partners=PARTNERS)
+    client.quota = QuotaScheduler(reads_per_minute=6000, writes_per_minute=6000)
+    ws = client.sheet.worksheets["Partners"]
+    original = ws.get_all_values
+    failures = [RateLimited(), RateLimited()]
+
+    def flaky():
+        if failures:
+            raise failures.pop()
+        return original()
+
+    ws.get_all_values = flaky
+    with call_priority(PRIORITY_BACKGROUND):
+        records = client.get_all_records("Partners")
+    assert records[0]["USERNAME"] == "a@example.com"
+    assert client.quota.stats["read"]["rate_limited"] == 2
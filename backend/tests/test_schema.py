@@ -0,0 +1,79 @@
+from datetime import datetime
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app.fake_sheets import FakeSpreadsheet
+from app.main import app
+from app.schema import MILESTONE, PARTNER, Field, Schema, safe_float
+from app.sheets import GoogleSheetsClient, sheets_client
+from tests.conftest import login, seed_workbook, workbook
+from tests.test_sheets import PARTNERS
+
+
+def test_schema_resolves_aliases_and_parses_values():
+    schema = Schema("Row", Field("revenue", "REVENUE (₦)", "Revenue", parse=safe_float), Field("code", "Referral Code"))
+    compiled = schema.compile([" revenue ", "x", "REFERRAL CODE"])
+    assert compiled.positions == [0, 2]
+
+    row = compiled.decode(["₦1,500", "", " ADA1 "])
+    assert row.revenue == 1500.0 and row.code == "ADA1"
+    # Short rows and missing columns fall back to the parsed empty value
+    assert compiled.decode([]) == (0.0, "")
+    assert schema.compile(["other"]).decode(["1"]) == (0.0, "")
+
+    milestone = MILESTONE.compile(["Timestamp", "ReferrerEmail", "MilestoneType"]).decode(
+        ["2026-01-08T10:00:00", " Ada@Example.com", "Book_Purchase"]
+    )
+    assert milestone.at == datetime(2026, 1, 8, 10) and milestone.referrer_email == "ada@example.com"
+    assert milestone.type == "book_purchase" and milestone.points == 0.0
+
+
+def test_typed_rows_follow_writes():
+    fake = FakeSpreadsheet({"Partners": PARTNERS})
+    client = GoogleSheetsClient(spreadsheet=fake)
+    assert [p.points for p in client.get_typed("Partners", PARTNER)] == [1.5, 0.0]
+
+    client.update_range("Partners", "E3:F3", [[2.0, 200.0]])
+    client.append_row("Partners", ["C@example.com", "x", "Chi", "CHI3", "4", "400"])
+    row, partner = client.find_typed("Partners", "referral_code", "chi3", PARTNER)
+    assert row == 4 and partner.email == "c@example.com" and partner.revenue == 400.0
+
+    partners = client.get_typed("Partners", PARTNER)
+    assert [(p.referral_code, p.points) for p in partners] == [("ADA1", 1.5), ("BOLA2", 2.0), ("CHI3", 4.0)]
+    assert fake.call_count("get_all_values") == 1
+
+
+@pytest.mark.anyio
+async def test_stats_and_leaderboard_read_typed_rows(seeded_sheets):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        headers = await login(client, "ada@example.com")
+        stats = (await client.get("/referral/stats", headers=headers)).json()
+        leaderboard = (await client.get("/referral/leaderboard")).json()
+
+    assert stats["points"] == 3.0 and stats["revenue"] == 300.0 and stats["totalReferrals"] == 60
+    assert stats["referralCode"] == "ADA1" and stats["bankName"] == ""
+    assert stats["milestones"] == [
+        {"referee": "chi@example.com", "type": "book_purchase", "points": 5.0, "timestamp": "2026-01-08T10:00:00"}
+    ]
+    assert stats["soulsGuided"] == 1 and stats["legacyRank"] == "Seeker"
+    assert leaderboard[0] == {
+        "rank": 1, "name": "A. Obi", "points": 3.0, "revenue": 300.0, "lifetimeEarnings": 0.0,
+        "impact": "Elite Partner", "email": "ada@example.com",
+    }
+
+
+@pytest.mark.anyio
+async def test_mark_as_paid_completes_only_the_partners_pending_activity(fake_sheets):
+    sheets = workbook()
+    sheets["ActivityLog"].append(["2026-01-09T10:00:00", "BOLA2", "Registration", 0.1, "Referee: x@example.com", "", "PENDING"])
+    seed_workbook(fake_sheets, sheets)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        headers = await login(client, "admin@example.com")
+        body = (await client.post("/referral/mark-as-paid", json={"email": "ada@example.com", "refCode": "ADA1"}, headers=headers)).json()
+
+    sheets_client.flush()
+    assert body["activity_rows_updated"] == 2
+    assert [(row[1], row[6]) for row in fake_sheets.values("ActivityLog")[1:]] == [
+        ("ADA1", "COMPLETED"), ("ADA1", "COMPLETED"), ("BOLA2", "PENDING"), ("ADA1", "COMPLETED"),
+    ]
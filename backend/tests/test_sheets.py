@@ -0,0 +1,387 @@
+import asyncio
+import threading
+import time
+
+from app.fake_sheets import FakeSpreadsheet
+from app.schema import ACTIVITY as ACTIVITY_SCHEMA
+from app.sheets import GoogleSheetsClient
+
+
+class StubWorksheet:
+    def __init__(self, values):
+        self.values = [list(row) for row in values]
+        self.reads = 0
+        self.append_calls = 0
+
+    def get_all_values(self):
+        self.reads += 1
+        return [list(row) for row in self.values]
+
+    def append_row(self, row, table_range=None):
+        return self.append_rows([row], table_range=table_range)
+
+    def append_rows(self, rows, table_range=None):
+        self.append_calls += 1
+        start = len(self.values) + 1
+        self.values.extend([str(v) for v in row] for row in rows)
+        return {"updates": {"updatedRange": f"'Stub'!A{start}:Z{len(self.values)}"}}
+
+    def update_cell(self, row, col, value):
+        self.values[row - 1][col - 1] = str(value)
+
+    def update(self, values, range_name):
+        pass
+
+
+class StubSpreadsheet:
+    def __init__(self, **worksheets):
+        self.worksheets = {name: StubWorksheet(values) for name, values in worksheets.items()}
+        self.batch_gets = []
+
+    def worksheet(self, name):
+        return self.worksheets[name]
+
+    def values_batch_get(self, ranges, params=None):
+        self.batch_gets.append(ranges)
+        names = [r.strip("'") for r in ranges]
+        # The API trims trailing empty cells
+        return {"valueRanges": [
+            {"range": r, "values": [[v for v in row if v != ""] for row in self.worksheets[n].values]}
+            for r, n in zip(ranges, names)
+        ]}
+
+
+def make_client(**worksheets):
+    client = GoogleSheetsClient()
+    client._sheet = StubSpreadsheet(**worksheets)
+    client._initialized = True
+    return client
+
+
+PARTNERS = [
+    ["USERNAME", "PASSWORD", "FULL NAME", "REFERRAL CODE", "POINTS", "REVENUE (₦)"],
+    ["a@example.com", "x", "Ada Obi", "ADA1", "1.5", "150"],
+    ["b@example.com", "x", "Bola Ade", "BOLA2", "0", "0"],
+]
+
+
+def test_get_all_records_is_cached():
+    client = make_client(Partners=PARTNERS)
+    first = client.get_all_records("Partners")
+    second = client.get_all_records("Partners")
+    assert first == second
+    assert first[0]["REFERRAL CODE"] == "ADA1"
+    assert client.sheet.worksheets["Partners"].reads == 1
+
+
+def test_writes_patch_cached_records():
+    client = make_client(Partners=PARTNERS)
+    client.get_all_records("Partners")
+
+    client.update_range("Partners", "E3:F3", [[2.0, 200.0]])
+    client.update_cell("Partners", 2, 3, "Ada O.")
+    client.append_row("Partners", ["c@example.com", "x", "Chi", "CHI3", 0.0, 0.0])
+
+    records = client.get_all_records("Partners")
+    assert client.sheet.worksheets["Partners"].reads == 1
+    assert records[0]["FULL NAME"] == "Ada O."
+    assert records[1]["POINTS"] == "2"
+    assert records[1]["REVENUE (₦)"] == "200"
+    assert records[2]["USERNAME"] == "c@example.com"
+
+
+def test_zero_ttl_disables_cache():
+    client = make_client(Partners=PARTNERS)
+    client.set_cache_ttl("Partners", 0)
+    client.get_all_records("Partners")
+    client.get_all_records("Partners")
+    assert client.sheet.worksheets["Partners"].reads == 2
+
+
+def test_partner_indexes_follow_writes():
+    client = make_client(Partners=PARTNERS)
+    assert client.find_row("Partners", "email", " B@Example.com ") == 3
+    row, record = client.find_record("Partners", "referral_code", "ada1")
+    assert row == 2 and record["FULL NAME"] == "Ada Obi"
+    assert client.find_record("Partners", "email", "nobody@example.com") == (None, None)
+
+    client.append_row("Partners", ["c@example.com", "x", "Chi", "CHI3", 0.0, 0.0])
+    client.update_cell("Partners", 2, 4, "ADA9")
+
+    assert client.find_row("Partners", "email", "c@example.com") == 4
+    assert client.find_row("Partners", "referral_code", "ADA9") == 2
+    assert client.find_row("Partners", "referral_code", "ADA1") is None
+    assert client.sheet.worksheets["Partners"].reads == 1
+
+
+ACTIVITY = [["Timestamp", "REFERRED_BY", "Type", "Points", "DESCRIPTION", "Reported", "Payout Status"]]
+
+
+def test_secondary_indexes_find_a_partners_rows():
+    rows = [["2026-01-0%d" % i, code, "Registration", 0.1, "", "", "PENDING"] for i, code in enumerate(["ADA1", "BOLA2", "ada1"], 1)]
+    client = make_client(ActivityLog=ACTIVITY + rows)
+    client.write_behind_sheets = set()
+    assert [row for row, _ in client.find_all_typed("ActivityLog", "referred_by", "ADA1", ACTIVITY_SCHEMA)] == [2, 4]
+
+    client.append_row("ActivityLog", ["2026-01-04", "Ada1", "Payout", 0.0, "", "", "COMPLETED"])
+    client.update_cell("ActivityLog", 3, 2, "ADA1")
+    client.update_cell("ActivityLog", 2, 2, "CHI3")
+    matches = client.find_all_typed("ActivityLog", "referred_by", "ada1", ACTIVITY_SCHEMA)
+    assert [(row, act.payout_status) for row, act in matches] == [(3, "PENDING"), (4, "PENDING"), (5, "COMPLETED")]
+    assert client.find_all_typed("ActivityLog", "referred_by", "nobody", ACTIVITY_SCHEMA) == []
+    assert client.sheet.worksheets["ActivityLog"].reads == 1
+
+
+def test_write_behind_buffers_until_flush():
+    client = make_client(ActivityLog=ACTIVITY)
+    client.append_flush_interval = 60
+    ws = client.sheet.worksheets["ActivityLog"]
+
+    client.append_row("ActivityLog", ["t1", "ADA1", "Browsing", 0.0, "", "", "PENDING"])
+    client.append_row("ActivityLog", ["t2", "ADA1", "Social Share", 0.0, "", "", "PENDING"])
+    assert ws.append_calls == 0
+
+    # A cache miss flushes first, so reads always include our own rows
+    records = client.get_all_records("ActivityLog")
+    assert [r["Timestamp"] for r in records] == ["t1", "t2"]
+    assert ws.append_calls == 1
+
+    client.append_row("ActivityLog", ["t3", "ADA1", "Browsing", 0.0, "", "", "PENDING"])
+    assert [r["Timestamp"] for r in client.get_all_records("ActivityLog")] == ["t1", "t2", "t3"]
+    assert client.flush() == 1
+    assert ws.append_calls == 2
+    assert len(ws.values) == 4
+
+
+def test_write_behind_flushes_full_batches():
+    client = make_client(ActivityLog=ACTIVITY)
+    client.append_flush_interval = 60
+    client.append_batch_size = 3
+    ws = client.sheet.worksheets["ActivityLog"]
+    for i in range(7):
+        client.append_row("ActivityLog", [f"t{i}", "ADA1", "Browsing", 0.0, "", "", "PENDING"])
+    assert ws.append_calls == 2
+    assert client.flush() == 1
+    assert len(ws.values) == 8
+
+
+def test_unit_of_work_commits_one_batch():
+    client = make_client(Partners=PARTNERS)
+    calls = []
+    client.sheet.values_batch_update = lambda body: calls.append(body)
+
+    with client.unit_of_work():
+        client.update_cell("Partners", 3, 5, 4.0)
+        client.update_cell("Partners", 3, 5, 5.0)
+        with client.unit_of_work():
+            client.update_range("Partners", "A3:B3", [["b2@example.com", "y"]])
+        # Reads inside the unit already see the pending edits
+        assert client.find_row("Partners", "email", "b2@example.com") == 3
+        assert calls == []
+
+    assert len(calls) == 1
+    assert [d["range"] for d in calls[0]["data"]] == ["'Partners'!E3", "'Partners'!A3:B3"]
+    assert calls[0]["data"][0]["values"] == [[5.0]]
+
+
+def test_unit_of_work_rolls_back_on_error():
+    client = make_client(Partners=PARTNERS)
+    client.sheet.values_batch_update = lambda body: None
+    try:
+        with client.unit_of_work():
+            client.update_cell("Partners", 2, 3, "Changed")
+            raise ValueError("handler failed")
+    except ValueError:
+        pass
+    assert client.get_all_records("Partners")[0]["FULL NAME"] == "Ada Obi"
+    assert client.sheet.worksheets["Partners"].reads == 1
+
+
+def test_get_many_records_batches_cache_misses():
+    client = make_client(Partners=PARTNERS, ActivityLog=ACTIVITY + [["t1", "ADA1", "Browsing", "0", "", "", ""]])
+    client.get_all_records("Partners")
+
+    sheets = client.get_many_records(["Partners", "ActivityLog"])
+    assert client.sheet.batch_gets == [["'ActivityLog'"]]
+    assert sheets["Partners"][1]["USERNAME"] == "b@example.com"
+    assert sheets["ActivityLog"][0]["Payout Status"] == ""
+
+    # Both are cached now
+    client.get_many_records(["Partners", "ActivityLog"])
+    assert len(client.sheet.batch_gets) == 1
+    assert client.sheet.worksheets["ActivityLog"].reads == 0
+
+
+def test_async_facade_runs_off_loop_and_joins_units():
+    client = make_client(Partners=PARTNERS)
+    calls = []
+    client.sheet.values_batch_update = lambda body: calls.append(body)
+
+    async def scenario():
+        records = [dict(r) for r in await client.aget_all_records("Partners")]
+        async with client.unit_of_work():
+            await client.aupdate_cell("Partners", 2, 3, "Ada O.")
+            await client.aupdate_range("Partners", "E3:F3", [[2.0, 200.0]])
+        return records, await client.afind_record("Partners", "email", "a@example.com")
+
+    records, (row, record) = asyncio.run(scenario())
+    assert records[0]["FULL NAME"] == "Ada Obi"
+    assert row == 2 and record["FULL NAME"] == "Ada O."
+    assert len(calls) == 1 and len(calls[0]["data"]) == 2
+    assert client.sheet.worksheets["Partners"].reads == 1
+
+
+def test_concurrent_reads_share_one_fetch():
+    client = make_client(Partners=PARTNERS)
+    client.set_cache_ttl("Partners", 0)
+    ws = client.sheet.worksheets["Partners"]
+    started = threading.Event()
+    release = threading.Event()
+    original = ws.get_all_values
+
+    def slow_get_all_values():
+        started.set()
+        release.wait(5)
+        return original()
+
+    ws.get_all_values = slow_get_all_values
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(client.get_all_records("Partners"))) for _ in range(5)]
+    threads[0].start()
+    started.wait(5)
+    for t in threads[1:]:
+        t.start()
+    while client.metrics["deduplicated_fetches"] < 4:
+        time.sleep(0.001)
+    release.set()
+    for t in threads:
+        t.join(5)
+
+    assert ws.reads == 1
+    assert client.metrics["fetches"] == 1
+    assert len(results) == 5 and all(r[0]["USERNAME"] == "a@example.com" for r in results)
+
+
+BROADCASTS = [
+    ["Timestamp", "BroadcastType", "Username", "State", "Text"],
+    ["t1", "sage_rank", "Ada Obi", "Lagos", "Alert 1"],
+    ["t2", "master_rank", "Bola Ade", "Oyo", "Alert 2"],
+]
+
+
+def expire(client, worksheet_name):
+    client._cache[worksheet_name].fetched_at -= 3600
+
+
+def test_append_only_sheets_refresh_by_their_tail():
+    fake = FakeSpreadsheet({"GlobalNotifications": BROADCASTS})
+    client = GoogleSheetsClient(spreadsheet=fake)
+    client.write_behind_sheets = set()
+    client.get_all_records("GlobalNotifications")
+
+    client.append_row("GlobalNotifications", ["t3", "sage_rank", "Chi", "Edo", "Alert 3"])
+    fake.seed("GlobalNotifications", BROADCASTS + [["t3", "sage_rank", "Chi", "Edo", "Alert 3"], ["t4", "sage_rank", "Dan", "", "Alert 4"]])
+    fake.reset_calls()
+    expire(client, "GlobalNotifications")
+
+    records = client.get_all_records("GlobalNotifications")
+    assert [r["Text"] for r in records] == ["Alert 1", "Alert 2", "Alert 3", "Alert 4"]
+    assert records[3]["State"] == ""
+    assert fake.call_count(kind="read") == 1 and fake.call_count("values_batch_get") == 1
+    assert client.metrics["tail_fetches"] == 1
+
+    # Nothing new: still one small read
+    fake.reset_calls()
+    expire(client, "GlobalNotifications")
+    assert len(client.get_many_records(["GlobalNotifications"])["GlobalNotifications"]) == 4
+    assert fake.call_count("values_batch_get") == 1 and fake.call_count("get_all_values") == 0
+
+
+def test_tail_reads_fall_back_to_a_full_reload():
+    fake = FakeSpreadsheet({"GlobalNotifications": BROADCASTS})
+    client = GoogleSheetsClient(spreadsheet=fake)
+    client.get_all_records("GlobalNotifications")
+
+    # A row was deleted
+    fake.seed("GlobalNotifications", BROADCASTS[:2])
+    fake.reset_calls()
+    expire(client, "GlobalNotifications")
+    assert [r["Text"] for r in client.get_all_records("GlobalNotifications")] == ["Alert 1"]
+    assert fake.call_count("get_all_values") == 1
+
+    # A column was added
+    fake.seed("GlobalNotifications", [row + ["x"] for row in BROADCASTS])
+    fake.reset_calls()
+    expire(client, "GlobalNotifications")
+    assert client.get_all_records("GlobalNotifications")[1]["x"] == "x"
+    assert fake.call_count("get_all_values") == 1
+
+    # Periodic full reloads pick up edits made in place elsewhere
+    client.full_reload_interval = 0
+    fake.seed("GlobalNotifications", [BROADCASTS[0], ["t1", "sage_rank", "Ada Obi", "Lagos", "Edited"], BROADCASTS[2]])
+    fake.reset_calls()
+    expire(client, "GlobalNotifications")
+    assert client.get_all_records("GlobalNotifications")[0]["Text"] == "Edited"
+    assert fake.call_count("get_all_values") == 1 and client.metrics["tail_fetches"] == 0
+
+
+def test_get_columns_reads_only_the_named_columns():
+    fake = FakeSpreadsheet({"Partners": PARTNERS})
+    client = GoogleSheetsClient(spreadsheet=fake)
+
+    rows = client.get_columns("Partners", "REFERRAL CODE", ("NAME", "FULL NAME"), "MISSING")
+    assert rows == [("ADA1", "Ada Obi", ""), ("BOLA2", "Bola Ade", "")]
+    # Header first, then the two columns; the whole sheet is never downloaded
+    assert fake.call_count("values_batch_get") == 2 and fake.call_count("get_all_values") == 0
+
+    # Header known now: one call, and a moved column is still found
+    fake.seed("Partners", [[row[3], *row[:3], *row[4:]] for row in PARTNERS])
+    fake.reset_calls()
+    assert client.get_columns("Partners", "REFERRAL CODE", "FULL NAME") == [("ADA1", "Ada Obi"), ("BOLA2", "Bola Ade")]
+    assert fake.call_count("values_batch_get") == 2
+    fake.reset_calls()
+    assert client.get_columns("Partners", "USERNAME")[1] == ("b@example.com",)
+    assert fake.call_count("values_batch_get") == 1
+
+    # A fresh snapshot is projected without any call
+    client.get_all_records("Partners")
+    fake.reset_calls()
+    assert client.get_columns("Partners", "POINTS") == [("1.5",), ("0",)]
+    assert fake.call_count() == 0
+
+
+def test_iter_chunks_streams_blocks():
+    rows = [[f"t{i}", "ADA1", "Browsing", str(i)] for i in range(7)]
+    fake = FakeSpreadsheet({"ActivityLog": [ACTIVITY[0]] + rows})
+    client = GoogleSheetsClient(spreadsheet=fake)
+
+    chunks = list(client.iter_chunks("ActivityLog", "Timestamp", "Points", chunk_size=3))
+    assert [len(c) for c in chunks] == [3, 3, 1]
+    assert chunks[2] == [("t6", "6")]
+    assert fake.call_count("values_batch_get") == 4
+
+    async def collect():
+        return [chunk async for chunk in client.aiter_chunks("ActivityLog", "Timestamp", chunk_size=7)]
+
+    fake.reset_calls()
+    assert [len(c) for c in asyncio.run(collect())] == [7]
+    # A full block may be followed by more rows, so one more (empty) read ends the stream
+    assert fake.call_count("values_batch_get") == 2
+
+
+def test_fresh_lookups_do_not_lose_another_clients_credit():
+    fake = FakeSpreadsheet({"Partners": [PARTNERS[0], ["a@example.com", "x", "Ada Obi", "ADA1", "3", "300"]]})
+    first, second = GoogleSheetsClient(spreadsheet=fake), GoogleSheetsClient(spreadsheet=fake)
+    second.get_all_records("Partners")  # the stale snapshot
+
+    def credit(client, points):
+        row, record = client.find_record("Partners", "email", "a@example.com", fresh=True)
+        total = round(float(record["POINTS"]) + points, 2)
+        client.update_range("Partners", f"E{row}:F{row}", [[total, total * 100]])
+
+    credit(first, 5)
+    fake.reset_calls()
+    credit(second, 0.1)
+    assert fake.values("Partners")[1][4:6] == ["8.1", "810"]
+    assert fake.call_count("values_batch_get") == 1 and fake.call_count("get_all_values") == 0
+    assert second.get_all_records("Partners")[0]["POINTS"] == "8.1"
@@ -0,0 +1,40 @@
+from app.sheets import SQLiteSheetsClient
+from app.storage import SQLiteSpreadsheet
+from tests.test_sheets import PARTNERS
+
+HEADERS = PARTNERS[0]
+
+
+def test_sqlite_client_round_trip(tmp_path):
+    path = str(tmp_path / "store.db")
+    client = SQLiteSheetsClient(path)
+    client.get_or_create_worksheet("Partners", HEADERS)
+    for row in PARTNERS[1:]:
+        client.append_row("Partners", row)
+
+    client.update_range("Partners", "E3:F3", [[2.5, 250.0]])
+    with client.unit_of_work():
+        client.update_cell("Partners", 2, 3, "Ada O.")
+        client.update_cell("Partners", 2, 5, 3.0)
+
+    # A fresh client on the same file sees everything, in the Sheets layout
+    reopened = SQLiteSheetsClient(path)
+    assert reopened.get_all_values("Partners")[0] == HEADERS
+    records = reopened.get_many_records(["Partners"])["Partners"]
+    assert [r["FULL NAME"] for r in records] == ["Ada O.", "Bola Ade"]
+    assert records[0]["POINTS"] == "3"
+    assert records[1]["REVENUE (₦)"] == "250"
+    assert reopened.find_row("Partners", "referral_code", "bola2") == 3
+    assert reopened.find_cell("Partners", "b@example.com", 1).row == 3
+
+
+def test_sqlite_import_from_spreadsheet():
+    source = SQLiteSpreadsheet(":memory:")
+    source.add_worksheet("Partners").append_rows(PARTNERS)
+    store = SQLiteSpreadsheet(":memory:")
+
+    assert store.import_from(source) == 3
+    ws = store.worksheet("Partners")
+    assert ws.get_all_values() == PARTNERS
+    assert ws.row_values(2)[3] == "ADA1"
+    assert ws.append_row(["c@example.com"])["updates"]["updatedRange"] == "'Partners'!A4:A4"
@@ -0,0 +1,90 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+
+from app import main
+from app.fake_sheets import FakeSpreadsheet
+from app.main import app
+from app.sheets import GoogleSheetsClient, sheets_client
+from app.tracing import Histogram, call_labels, request_trace
+from tests.test_sheets import PARTNERS
+
+
+def test_calls_are_attributed_to_the_current_trace():
+    client = GoogleSheetsClient(spreadsheet=FakeSpreadsheet({"Partners": PARTNERS}))
+    with request_trace() as trace:
+        client.get_all_records("Partners")
+        client.get_all_records("Partners")
+    assert [(op, ws) for op, ws, _ in trace.calls] == [("worksheet", "Partners"), ("get_all_values", "Partners")]
+    header = trace.server_timing()
+    assert header.startswith("app;dur=")
+    assert 'sheets-get_all_values-Partners;dur=' in header and 'desc="get_all_values Partners x1"' in header
+
+    # Outside a request nothing is collected
+    client.set_cache_ttl("Partners", 0)
+    client.get_all_records("Partners")
+    assert len(trace.calls) == 2
+
+
+def test_call_labels_name_the_worksheet():
+    class Book:
+        title = "Enchiridion"
+
+        def values_batch_get(self, ranges):
+            pass
+
+        def worksheet(self, title):
+            pass
+
+    class Sheet:
+        title = "Admin Audit"
+        spreadsheet = Book()
+
+        def append_row(self, row):
+            pass
+
+    assert call_labels(Sheet().append_row, (["x"],), {}) == ("append_row", "Admin Audit")
+    assert call_labels(Book().values_batch_get, (["'Partners'", "'ActivityLog'!A1:B2"],), {}) == (
+        "values_batch_get", "ActivityLog,Partners")
+    assert call_labels(Book().worksheet, ("Partners",), {}) == ("worksheet", "Partners")
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("demo_seconds", "Demo.", ("op",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "read")
+    histogram.observe(0.5, "read")
+    histogram.observe(5, "read")
+    lines = histogram.render()
+    assert 'demo_seconds_bucket{op="read",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{op="read",le="1"} 2' in lines
+    assert 'demo_seconds_bucket{op="read",le="+Inf"} 3' in lines
+    assert 'demo_seconds_count{op="read"} 3' in lines
+
+
+@pytest.mark.anyio
+async def test_server_timing_header_and_metrics_route(fake_sheets, monkeypatch):
+    fake_sheets.seed("Reviews", fake_sheets.values("Reviews") + [
+        ["r1", "Jane", "Doctor", "", "5", "Great", "approved", "2026-01-05T10:00:00", ""],
+    ])
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        # Off by default: no timings for anonymous clients, no unauthenticated scrapes
+        assert "Server-Timing" not in (await ac.get("/reviews/")).headers
+        assert (await ac.get("/metrics")).status_code == 404
+
+        monkeypatch.setattr(main, "SERVER_TIMING", True)
+        monkeypatch.setattr(main, "METRICS_TOKEN", "scrape-me")
+        sheets_client.invalidate("Reviews")
+        response = await ac.get("/reviews/")
+        await ac.put("/reviews/r1", params={"status": "approved"})
+        # A parameter value equal to a literal segment still gets the route's template
+        await ac.put("/reviews/reviews", params={"status": "approved"})
+        assert (await ac.get("/metrics", headers={"Authorization": "Bearer wrong"})).status_code == 401
+        scrape = await ac.get("/metrics", headers={"Authorization": "Bearer scrape-me"})
+
+    assert response.status_code == 200
+    assert 'desc="get_all_values Reviews x1"' in response.headers["Server-Timing"]
+    assert scrape.status_code == 200
+    assert 'sheets_api_call_duration_seconds_count{operation="get_all_values",worksheet="Reviews"}' in scrape.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/reviews/",status="200"}' in scrape.text
+    assert 'http_request_duration_seconds_count{method="PUT",route="/reviews/{review_id}",status="401"}' in scrape.text
+    assert 'route="/{review_id}' not in scrape.text
+    assert 'sheets_snapshot_fetches_total{outcome="fetches"}' in scrape.text